@@ -0,0 +1,224 @@
+"""
+Drive a realistic request mix at the app and report latency per route.
+
+Virtual users are sampled from the seeded population (flask seed-data) and
+each runs in its own thread, repeatedly picking a page weighted by how often
+real users hit it. By default requests go through Flask's test client in
+this process; pass --url to load a running server instead. Run from the
+repository root:
+
+    python benchmarks/load_test.py --users 20 --seconds 30
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --users 20
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select  # noqa: E402
+from website import create_app, db  # noqa: E402
+from website.models import Class, ClassMembership, User, class_question_sets  # noqa: E402
+from website.seeding import SEED_PASSWORD, SEED_PREFIX  # noqa: E402
+
+# (route name, relative weight, URL template) for each kind of user
+STUDENT_MIX = [
+    ("views.home", 20, "/"),
+    ("classes.my_classes", 15, "/classes/my_classes"),
+    ("classes.class_detail", 15, "/classes/class/{class_id}"),
+    ("classes.class_chat", 20, "/classes/class/{class_id}/chat"),
+    ("classes.view_assignments", 10, "/classes/class/{class_id}/assignments"),
+    ("tests.flashcards", 15, "/tests/flashcards/{set_id}"),
+    ("tests.search", 5, "/tests/search?q={term}"),
+]
+TEACHER_MIX = [
+    ("views.home", 15, "/"),
+    ("classes.my_classes", 15, "/classes/my_classes"),
+    ("classes.class_detail", 20, "/classes/class/{class_id}"),
+    ("classes.class_chat", 15, "/classes/class/{class_id}/chat"),
+    ("classes.class_analytics", 10, "/classes/class/{class_id}/analytics"),
+    ("tests.question_sets", 15, "/tests/question_sets"),
+    ("tests.flashcards", 10, "/tests/flashcards/{set_id}"),
+]
+SEARCH_TERMS = ["inflation", "monopoly", "elasticity", "GDP", "taxation", "exchange"]
+TEACHER_SHARE = 0.1
+
+
+def sample_users(count, rng):
+    """Pick seeded users along with a class and a shared set each can open"""
+    users = []
+    teachers = int(round(count * TEACHER_SHARE))
+    for role, wanted in (("teacher", teachers), ("student", count - teachers)):
+        if wanted == 0:
+            continue
+        ids = db.session.execute(
+            select(User.id).where(User.role == role, User.username.like(f"{SEED_PREFIX}%"))
+        ).scalars().all()
+        for user_id in rng.sample(ids, min(wanted, len(ids))):
+            if role == "teacher":
+                class_ids = select(Class.id).where(Class.teacher_id == user_id)
+            else:
+                class_ids = select(ClassMembership.class_id).where(ClassMembership.user_id == user_id)
+            row = db.session.execute(
+                select(class_question_sets.c.class_id, class_question_sets.c.question_set_id)
+                .where(class_question_sets.c.class_id.in_(class_ids))
+                .limit(1)
+            ).first()
+            if row is None:
+                continue
+            username = db.session.get(User, user_id).username
+            users.append({
+                "id": user_id,
+                "username": username,
+                "role": role,
+                "class_id": row.class_id,
+                "set_id": row.question_set_id,
+            })
+    if not users:
+        sys.exit("No seeded users found. Run 'flask --app main seed-data' first.")
+    return users
+
+
+class InProcessClient:
+    """Signed-in Flask test client for one virtual user"""
+
+    def __init__(self, app, user):
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session["_user_id"] = str(user["id"])
+
+    def get(self, path):
+        response = self.client.get(path)
+        response.close()
+        return response.status_code
+
+
+class HttpClient:
+    """requests.Session signed in to a running server"""
+
+    def __init__(self, base_url, user):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        while True:
+            response = self.session.post(
+                f"{self.base_url}/auth/login",
+                data={"username": user["username"], "password": SEED_PASSWORD},
+            )
+            if response.status_code not in (429, 503):
+                break
+            # Sign-ins are rate limited; wait as told rather than failing
+            time.sleep(float(response.headers.get("Retry-After", 1)))
+
+    def get(self, path):
+        return self.session.get(self.base_url + path).status_code
+
+
+def virtual_user(client, user, mix, stop, results, rng):
+    names = [name for name, _, _ in mix]
+    weights = [weight for _, weight, _ in mix]
+    templates = {name: template for name, _, template in mix}
+    while not stop.is_set():
+        name = rng.choices(names, weights)[0]
+        path = templates[name].format(
+            class_id=user["class_id"], set_id=user["set_id"], term=rng.choice(SEARCH_TERMS)
+        )
+        started = time.perf_counter()
+        try:
+            status = client.get(path)
+        except Exception:
+            status = None
+        elapsed = time.perf_counter() - started
+        results.append((name, elapsed, status))
+
+
+def summarise(results, seconds):
+    """Per-route count, throughput, error count and latency percentiles (ms)"""
+    by_route = {}
+    for name, elapsed, status in results:
+        by_route.setdefault(name, []).append((elapsed, status))
+    summary = {}
+    for name, samples in sorted(by_route.items()):
+        latencies = np.array([elapsed for elapsed, _ in samples]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary[name] = {
+            "requests": len(samples),
+            "throughput": len(samples) / seconds,
+            "errors": sum(1 for _, status in samples if status is None or status >= 500),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users.")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the summary to this file.")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    app = create_app({"RATELIMIT_ENABLED": False})
+    with app.app_context():
+        users = sample_users(args.users, rng)
+
+    print(f"Starting {len(users)} virtual user(s) against {args.url or 'in-process app'}")
+    clients = [
+        HttpClient(args.url, user) if args.url else InProcessClient(app, user)
+        for user in users
+    ]
+
+    # One list per thread so appends never contend
+    per_thread = [[] for _ in users]
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=virtual_user,
+            args=(
+                client,
+                user,
+                TEACHER_MIX if user["role"] == "teacher" else STUDENT_MIX,
+                stop,
+                per_thread[i],
+                random.Random(args.seed + i),
+            ),
+        )
+        for i, (client, user) in enumerate(zip(clients, users))
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    results = [sample for samples in per_thread for sample in samples]
+    summary = summarise(results, elapsed)
+    print(f"\n{'route':<28}{'reqs':>7}{'req/s':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, row in summary.items():
+        print(
+            f"{name:<28}{row['requests']:>7}{row['throughput']:>8.1f}{row['errors']:>8}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+        )
+    print(f"\nTotal: {len(results)} requests, {len(results) / elapsed:.1f} req/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"seconds": elapsed, "users": len(users), "routes": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Compare writer/reader throughput of the storage profiles in website/storage.py.
+
+Writer threads insert chat-style messages one commit at a time while reader
+threads repeatedly load the latest messages, the same mix as a busy class
+chat page. Run from the repository root:
+
+    python benchmarks/sqlite_concurrency.py --writers 4 --readers 8 --seconds 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, exc, text  # noqa: E402
+from website.storage import STORAGE_PROFILES, engine_options, install_pragmas  # noqa: E402
+
+SEED_MESSAGES = 2000
+
+
+def make_engine(path, profile, read_only=False):
+    if read_only:
+        url = f"sqlite:///file:{path}?mode=ro&uri=true"
+    else:
+        url = f"sqlite:///{path}"
+    engine = create_engine(url, **engine_options(profile))
+    install_pragmas(engine, profile, read_only=read_only)
+    return engine
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE chat_message (id INTEGER PRIMARY KEY, class_id INTEGER, "
+                "user_id INTEGER, message TEXT, timestamp REAL)"
+            )
+        )
+        connection.execute(
+            text("CREATE INDEX ix_chat_class ON chat_message (class_id, timestamp)")
+        )
+        connection.execute(
+            text(
+                "INSERT INTO chat_message (class_id, user_id, message, timestamp) "
+                "VALUES (:class_id, :user_id, :message, :timestamp)"
+            ),
+            [
+                {"class_id": i % 10, "user_id": i % 50, "message": f"seed {i}", "timestamp": i}
+                for i in range(SEED_MESSAGES)
+            ],
+        )
+
+
+def writer(engine, stop, counts, worker):
+    n = 0
+    while not stop.is_set():
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    text(
+                        "INSERT INTO chat_message (class_id, user_id, message, timestamp) "
+                        "VALUES (:class_id, :user_id, :message, :timestamp)"
+                    ),
+                    {"class_id": n % 10, "user_id": worker, "message": "hello", "timestamp": time.time()},
+                )
+            counts["writes"] += 1
+        except exc.OperationalError:
+            counts["write_errors"] += 1
+        n += 1
+
+
+def reader(engine, stop, counts, worker):
+    n = 0
+    while not stop.is_set():
+        try:
+            with engine.connect() as connection:
+                connection.execute(
+                    text(
+                        "SELECT id, user_id, message FROM chat_message "
+                        "WHERE class_id = :class_id ORDER BY timestamp DESC LIMIT 100"
+                    ),
+                    {"class_id": (worker + n) % 10},
+                ).all()
+            counts["reads"] += 1
+        except exc.OperationalError:
+            counts["read_errors"] += 1
+        n += 1
+
+
+def run(profile, writers, readers, seconds, read_replica):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        write_engine = make_engine(path, profile)
+        seed(write_engine)
+        read_engine = make_engine(path, profile, read_only=True) if read_replica else write_engine
+
+        # One counter dict per thread, summed afterwards
+        per_thread = [
+            {"writes": 0, "write_errors": 0, "reads": 0, "read_errors": 0}
+            for _ in range(writers + readers)
+        ]
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=writer, args=(write_engine, stop, per_thread[i], i))
+            for i in range(writers)
+        ] + [
+            threading.Thread(target=reader, args=(read_engine, stop, per_thread[writers + i], i))
+            for i in range(readers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        write_engine.dispose()
+        read_engine.dispose()
+    totals = {key: sum(counts[key] for counts in per_thread) for key in per_thread[0]}
+    totals["writes"] /= seconds
+    totals["reads"] /= seconds
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--profiles", nargs="+", default=list(STORAGE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.writers} writer(s), {args.readers} reader(s), {args.seconds:g}s per run")
+    print(f"{'profile':<16}{'writes/s':>10}{'reads/s':>10}{'w-errors':>10}{'r-errors':>10}")
+    for profile in args.profiles:
+        variants = [(profile, False)]
+        if STORAGE_PROFILES[profile]["pragmas"].get("journal_mode") == "WAL":
+            variants.append((profile + "+reader", True))
+        for label, read_replica in variants:
+            result = run(profile, args.writers, args.readers, args.seconds, read_replica)
+            print(
+                f"{label:<16}{result['writes']:>10.0f}{result['reads']:>10.0f}"
+                f"{result['write_errors']:>10}{result['read_errors']:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Performance regression suite for hot functions and routes.
+
+Each benchmark is timed over many samples against a freshly seeded database,
+and compared with the most recent saved run in benchmarks/results/ using a
+one-sided Mann-Whitney U test. A benchmark is flagged as a regression when
+it is significantly slower (p < --alpha) and its median moved by more than
+--min-change. Run from the repository root:
+
+    python benchmarks/suite.py                 # compare with the last saved run
+    python benchmarks/suite.py --save          # ...and save this run as the new baseline
+    python benchmarks/suite.py -k flashcards   # only benchmarks whose name contains this
+"""
+import argparse
+import gc
+import hashlib
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from website import create_app, db  # noqa: E402
+from website.hashing import password_hasher  # noqa: E402
+from website.models import Class, ClassMembership, class_question_sets  # noqa: E402
+from website.seeding import SEED_PASSWORD, seed_population  # noqa: E402
+from website.sn import create_dataframe, plot_gdp_trend  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SEED_SCALE = {
+    "teachers": 40,
+    "students": 1200,
+    "classes_per_teacher": 3,
+    "students_per_class": 30,
+    "sets_per_teacher": 4,
+    "questions_per_set": 40,
+    "sets_shared_per_class": 2,
+    "messages_per_class": 200,
+    "assignments_per_class": 5,
+}
+
+BENCHMARKS = []
+# Reference workload used to correct for the machine being faster or slower
+# than when the baseline was recorded (shared CI runners, laptops on battery)
+CALIBRATION = "calibration"
+
+
+def benchmark(name, repeats=30, number=1):
+    """
+    Register a benchmark. Each of `repeats` samples times `number` calls;
+    the sample is the mean time per call.
+    """
+
+    def register(fn):
+        BENCHMARKS.append({"name": name, "fn": fn, "repeats": repeats, "number": number})
+        return fn
+
+    return register
+
+
+class Fixture:
+    """Seeded app, signed-in clients and inputs shared by every benchmark"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                "RATELIMIT_ENABLED": False,
+                "PASSWORD_HASH_WORKERS": 0,
+            }
+        )
+        with self.app.app_context():
+            self.password_hash = password_hasher.generate(SEED_PASSWORD)
+            seed_population(SEED_SCALE, self.password_hash, seed=0, progress=lambda _: None)
+            teacher_id, class_id = db.session.execute(
+                select(Class.teacher_id, Class.id).order_by(Class.id).limit(1)
+            ).one()
+            student_id = db.session.execute(
+                select(ClassMembership.user_id).where(ClassMembership.class_id == class_id).limit(1)
+            ).scalar()
+            set_id = db.session.execute(
+                select(class_question_sets.c.question_set_id)
+                .where(class_question_sets.c.class_id == class_id)
+                .limit(1)
+            ).scalar()
+        self.class_id = class_id
+        self.set_id = set_id
+        self.teacher = self._client(teacher_id)
+        self.student = self._client(student_id)
+        self.stats_data = _gdp_series(240)
+        self.data_frame = create_dataframe(self.stats_data)
+
+    def _client(self, user_id):
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+        return client
+
+
+def _gdp_series(points):
+    """Rows shaped like the Trading Economics historical GDP response"""
+    dates = pd.date_range("1960-12-31", periods=points, freq="QE")
+    values = np.cumsum(np.random.default_rng(0).normal(10, 3, points)) + 500
+    return [
+        {
+            "Country": "United Kingdom",
+            "Category": "GDP",
+            "DateTime": date.strftime("%Y-%m-%dT00:00:00"),
+            "Value": float(value),
+            "Frequency": "Quarterly",
+            "HistoricalDataSymbol": "UKGDP",
+            "LastUpdate": "2024-01-01T00:00:00",
+        }
+        for date, value in zip(dates, values)
+    ]
+
+
+def _get(client, path):
+    response = client.get(path)
+    assert response.status_code == 200, f"{path} returned {response.status_code}"
+    response.close()
+
+
+@benchmark(CALIBRATION, repeats=40, number=5)
+def bench_calibration(fx):
+    # Fixed pure-Python work; only machine speed changes its timing
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    hashlib.sha256(str(total).encode()).hexdigest()
+
+
+@benchmark("sn.create_dataframe", repeats=50, number=20)
+def bench_create_dataframe(fx):
+    create_dataframe(fx.stats_data)
+
+
+@benchmark("sn.plot_gdp_trend", repeats=15)
+def bench_plot_gdp_trend(fx):
+    # Writes website/static/gdp_plot.png relative to the working directory,
+    # which main() points at a temporary directory
+    plot_gdp_trend(fx.data_frame, "united kingdom")
+
+
+@benchmark("route.class_detail", repeats=40, number=5)
+def bench_class_detail(fx):
+    _get(fx.teacher, f"/classes/class/{fx.class_id}")
+
+
+@benchmark("route.class_chat", repeats=40, number=5)
+def bench_class_chat(fx):
+    _get(fx.student, f"/classes/class/{fx.class_id}/chat")
+
+
+@benchmark("route.flashcards", repeats=40, number=5)
+def bench_flashcards(fx):
+    _get(fx.student, f"/tests/flashcards/{fx.set_id}")
+
+
+@benchmark("hashing.verify", repeats=8)
+def bench_password_verify(fx):
+    with fx.app.app_context():
+        password_hasher.verify(fx.password_hash, SEED_PASSWORD)
+
+
+@benchmark("models.generate_code", repeats=40, number=50)
+def bench_generate_code(fx):
+    with fx.app.app_context():
+        Class.generate_code()
+
+
+def take_sample(spec, fx):
+    """Mean seconds per call over one sample of `number` calls"""
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(spec["number"]):
+            spec["fn"](fx)
+        return (time.perf_counter() - started) / spec["number"]
+    finally:
+        gc.enable()
+
+
+def run_benchmarks(specs, fx):
+    """
+    Sample every benchmark in interleaved rounds, so drift over the run
+    (thermal throttling, other load) spreads across all of them instead of
+    landing on whichever ran last.
+    """
+    for spec in specs:
+        spec["fn"](fx)  # warm-up: imports, caches, first-query costs
+    samples = {spec["name"]: [] for spec in specs}
+    for round_number in range(max(spec["repeats"] for spec in specs)):
+        for spec in specs:
+            if round_number < spec["repeats"]:
+                samples[spec["name"]].append(take_sample(spec, fx))
+    return samples
+
+
+def mann_whitney_greater(current, baseline):
+    """
+    One-sided Mann-Whitney U test (normal approximation with tie and
+    continuity correction). Returns the p-value for "current tends to be
+    larger than baseline".
+    """
+    n1, n2 = len(current), len(baseline)
+    ranks = pd.Series(list(current) + list(baseline)).rank(method="average").to_numpy()
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    _, tie_counts = np.unique(ranks, return_counts=True)
+    tie_term = (tie_counts**3 - tie_counts).sum() / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def latest_baseline():
+    if not os.path.isdir(RESULTS_DIR):
+        return None, None
+    runs = sorted(f for f in os.listdir(RESULTS_DIR) if f.endswith(".json"))
+    if not runs:
+        return None, None
+    path = os.path.join(RESULTS_DIR, runs[-1])
+    with open(path) as f:
+        return path, json.load(f)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-k", dest="keyword", help="Only run benchmarks whose name contains this.")
+    parser.add_argument("--save", action="store_true", help="Save this run as the new baseline.")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Significance level.")
+    parser.add_argument("--min-change", type=float, default=0.10, help="Smallest median change to flag (0.10 = 10%%).")
+    args = parser.parse_args()
+
+    specs = [
+        s for s in BENCHMARKS
+        if s["name"] == CALIBRATION or not args.keyword or args.keyword in s["name"]
+    ]
+    baseline_path, baseline = latest_baseline()
+    print(f"Comparing with {os.path.relpath(baseline_path) if baseline_path else 'no baseline'}")
+
+    results = {}
+    repo_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            print("Seeding benchmark database...")
+            fx = Fixture(directory)
+            all_samples = run_benchmarks(specs, fx)
+            speed = _machine_speed(all_samples, baseline)
+            print(f"\n{'benchmark':<24}{'median':>11}{'IQR':>10}{'baseline':>11}{'change':>9}{'p':>9}  status")
+            for name, samples in all_samples.items():
+                status = _report(name, samples, baseline, speed, args)
+                results[name] = {
+                    "samples": samples,
+                    "median": float(np.median(samples)),
+                    "regression": status == "SLOWER",
+                }
+            with fx.app.app_context():
+                db.engine.dispose()
+        finally:
+            os.chdir(repo_dir)
+
+    regressions = [name for name, row in results.items() if row.get("regression")]
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = os.path.join(RESULTS_DIR, f"{stamp}.json")
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "created": stamp,
+                    "commit": _git_commit(),
+                    "python": platform.python_version(),
+                    "machine": platform.platform(),
+                    "cpus": os.cpu_count(),
+                    "benchmarks": {
+                        name: {"samples": row["samples"], "median": row["median"]}
+                        for name, row in results.items()
+                    },
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nSaved baseline {os.path.relpath(path)}")
+
+    if regressions:
+        print(f"\n{len(regressions)} significant slowdown(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def _machine_speed(all_samples, baseline):
+    """
+    How much slower this machine is running than when the baseline was
+    recorded, measured by the calibration workload (1.0 = same speed).
+    """
+    previous = (baseline or {}).get("benchmarks", {}).get(CALIBRATION)
+    if previous is None or CALIBRATION not in all_samples:
+        return 1.0
+    speed = float(np.median(all_samples[CALIBRATION])) / previous["median"]
+    print(f"Machine speed vs baseline: x{speed:.2f} (baseline timings scaled to match)")
+    return speed
+
+
+def _report(name, samples, baseline, speed, args):
+    """Print one benchmark's comparison row and return its status"""
+    median = float(np.median(samples))
+    q1, q3 = np.percentile(samples, [25, 75])
+    row = f"{name:<24}{_ms(median):>11}{_ms(q3 - q1):>10}"
+    previous = (baseline or {}).get("benchmarks", {}).get(name)
+    if previous is None:
+        print(f"{row}{'-':>11}{'-':>9}{'-':>9}  new")
+        return "new"
+    if name == CALIBRATION:
+        print(f"{row}{_ms(previous['median']):>11}{median / previous['median'] - 1:>+9.1%}{'-':>9}  reference")
+        return "reference"
+    expected = [sample * speed for sample in previous["samples"]]
+    change = median / (previous["median"] * speed) - 1
+    p_slower = mann_whitney_greater(samples, expected)
+    p_faster = mann_whitney_greater(expected, samples)
+    if p_slower < args.alpha and change > args.min_change:
+        status = "SLOWER"
+    elif p_faster < args.alpha and change < -args.min_change:
+        status = "faster"
+    else:
+        status = "ok"
+    p = p_slower if change >= 0 else p_faster
+    print(f"{row}{_ms(previous['median'] * speed):>11}{change:>+9.1%}{p:>9.3f}  {status}")
+    return status
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.3f}ms"
+
+
+if __name__ == "__main__":
+    sys.exit(main())
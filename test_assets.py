@@ -0,0 +1,156 @@
+"""
+EconSpark Asset Pipeline Tests
+Checks fingerprinting, precompressed variants, immutable caching of
+/assets/ responses, and that third-party files are only served locally
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website.assets import (
+    IMMUTABLE_MAX_AGE,
+    VENDORED_ASSETS,
+    AssetPipeline,
+    asset_pipeline,
+    fingerprinted_name,
+)
+from website.models import User
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_build(directory):
+    print_section("Testing Asset Builds")
+    source = os.path.join(directory, "static")
+    output = os.path.join(directory, "built")
+    script = b"function graph() { return 'supply and demand'; }\n" * 50
+    write(os.path.join(source, "app.js"), script)
+    write(os.path.join(source, "tiny.css"), b"a{}")
+    write(os.path.join(source, "img", "logo.svg"), b"<svg></svg>" * 40)
+    write(os.path.join(source, "photo.png"), b"\x89PNG")
+
+    pipeline = AssetPipeline()
+    manifest = pipeline.build(source, output)
+    print_test("JS, CSS and nested SVG are fingerprinted", sorted(manifest) == ["app.js", "img/logo.svg", "tiny.css"])
+    print_test("Other files are left to /static", "photo.png" not in manifest)
+    built = os.path.join(output, manifest["app.js"])
+    print_test("Fingerprint goes before the extension", manifest["app.js"].startswith("app.") and manifest["app.js"].endswith(".js"))
+    print_test("Built copy matches the source", open(built, "rb").read() == script)
+    print_test("gzip variant decompresses to the source", gzip.decompress(open(built + ".gz", "rb").read()) == script)
+    print_test(
+        "No variant is kept when compression doesn't help",
+        not os.path.exists(os.path.join(output, manifest["tiny.css"]) + ".gz"),
+    )
+    print_test("Manifest is written next to the builds", os.path.exists(os.path.join(output, "manifest.json")))
+
+    write(os.path.join(source, "app.js"), script + b"// changed\n")
+    changed = pipeline.build(source, output)
+    print_test("Changing a file changes its fingerprint", changed["app.js"] != manifest["app.js"])
+    print_test("Unchanged files keep theirs", changed["tiny.css"] == manifest["tiny.css"])
+    print_test("Fingerprint length is fixed", fingerprinted_name("a.js", "0123456789abcdef0123") == "a.0123456789ab.js")
+
+
+def test_urls(app, directory):
+    print_section("Testing Asset URLs")
+    with app.test_request_context():
+        print_test("Built assets link to /assets/", asset_pipeline.url("kg-lib.js") == f"/assets/{asset_pipeline.manifest['kg-lib.js']}")
+        print_test("Unknown files fall back to /static/", asset_pipeline.url("missing.js") == "/static/missing.js")
+        for name in VENDORED_ASSETS:
+            print_test(f"{name} is never loaded from upstream", asset_pipeline.url(name).startswith("/"))
+
+        source = os.path.join(directory, "vendored")
+        write(os.path.join(source, "kg.0.2.6.js"), b"var KG = {};")
+        pipeline = AssetPipeline()
+        pipeline.manifest = pipeline.build(source, os.path.join(directory, "vendored_built"))
+        print_test("A vendored file is served from /assets/", pipeline.url("kg.0.2.6.js").startswith("/assets/kg.0.2.6."))
+
+
+def test_serving(app, user_id):
+    print_section("Testing /assets/ Responses")
+    client = app.test_client()
+    with app.test_request_context():
+        url = asset_pipeline.url("kg-lib.js")
+    source = open(os.path.join(app.static_folder, "kg-lib.js"), "rb").read()
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    print_test("gzip is served when accepted", response.headers.get("Content-Encoding") == "gzip")
+    print_test("gzip body decompresses to the source", gzip.decompress(response.get_data()) == source)
+    print_test("Response is immutable for a year", response.cache_control.immutable and response.cache_control.max_age == IMMUTABLE_MAX_AGE)
+    print_test("Response is public", response.cache_control.public)
+    print_test("Response varies on Accept-Encoding", "Accept-Encoding" in response.headers.get("Vary", ""))
+    print_test("Content type is JavaScript", "javascript" in response.mimetype)
+    gzip_etag = response.headers["ETag"]
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    print_test("Identity is served otherwise", "Content-Encoding" not in response.headers and response.get_data() == source)
+    print_test("Each encoding has its own ETag", response.headers["ETag"] != gzip_etag)
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+    print_test("Matching ETag gets 304", response.status_code == 304)
+
+    print_test("Unknown built names get 404", client.get("/assets/kg-lib.000000000000.js").status_code == 404)
+    print_test("Paths outside the manifest get 404", client.get("/assets/../website/__init__.py").status_code == 404)
+
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    body = client.get("/sim/graphing_tool").get_data(as_text=True)
+    print_test("Simulator page links the fingerprinted library", url in body)
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'assets.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            user = User(username="asset_student", password="x", role="student")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        test_build(directory)
+        test_urls(app, directory)
+        test_serving(app, user_id)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("ASSET TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All asset checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,238 @@
+"""
+EconSpark Flashcard Attempt Tests
+Checks that attempt batches are validated before they are stored and that
+class analytics fold new attempts into their running totals
+"""
+
+import json
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website.models import User, Class, ClassMembership, QuestionSet, Question, QuizAttempt
+from website.analytics import class_analytics_cache, summarise
+from website.tests import MAX_ATTEMPT_BATCH, MAX_ATTEMPT_LATENCY_MS
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def seed():
+    """A set of two questions shared with a class of one student"""
+    teacher = User(username="attempt_teacher", password="x", role="teacher")
+    student = User(username="attempt_student", password="x", role="student")
+    outsider = User(username="attempt_outsider", password="x", role="student")
+    db.session.add_all([teacher, student, outsider])
+    db.session.flush()
+
+    class_obj = Class(name="Attempt Class", code="ATTEMPT1", teacher_id=teacher.id)
+    question_set = QuestionSet(name="Attempt Set", user_id=teacher.id)
+    other_set = QuestionSet(name="Other Set", user_id=teacher.id)
+    db.session.add_all([class_obj, question_set, other_set])
+    db.session.flush()
+    db.session.add(ClassMembership(user_id=student.id, class_id=class_obj.id))
+    class_obj.question_sets.append(question_set)
+    questions = [
+        Question(question=f"Q{i}", answer=f"A{i}", user_id=teacher.id, question_set_id=question_set.id)
+        for i in range(2)
+    ]
+    stray = Question(question="Stray", answer="S", user_id=teacher.id, question_set_id=other_set.id)
+    db.session.add_all(questions + [stray])
+    db.session.commit()
+    return {
+        "teacher": teacher.id,
+        "student": student.id,
+        "outsider": outsider.id,
+        "class": class_obj.id,
+        "set": question_set.id,
+        "questions": [q.id for q in questions],
+        "stray": stray.id,
+    }
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def post_raw(client, set_id, body):
+    """Post a JSON body as text, so it can hold NaN and Infinity"""
+    return client.post(
+        f"/tests/flashcards/{set_id}/attempts", data=body, content_type="application/json"
+    )
+
+
+def stored_latencies(app):
+    with app.app_context():
+        return [
+            row.latency_ms
+            for row in QuizAttempt.query.order_by(QuizAttempt.id).all()
+        ]
+
+
+def clear_attempts(app):
+    with app.app_context():
+        QuizAttempt.query.delete()
+        db.session.commit()
+
+
+def test_recording(app, ids):
+    print_section("Testing Attempt Recording")
+    client = client_for(app, ids["student"])
+    q0, q1 = ids["questions"]
+    attempts = [
+        {"question_id": q0, "correct": True, "latency_ms": 1500},
+        {"question_id": q1, "correct": False, "latency_ms": 2500.7},
+    ]
+    response = post_raw(client, ids["set"], json.dumps({"attempts": attempts}))
+    print_test("Valid batch returns 200", response.status_code == 200)
+    print_test("Both attempts recorded", response.get_json() == {"recorded": 2})
+    print_test("Latencies stored as whole milliseconds", stored_latencies(app) == [1500, 2500])
+    clear_attempts(app)
+
+
+def test_latency_validation(app, ids):
+    print_section("Testing Latency Validation")
+    client = client_for(app, ids["student"])
+    q0 = ids["questions"][0]
+    cases = [
+        ("NaN", None),
+        ("Infinity", None),
+        ("-Infinity", None),
+        ("1e300", MAX_ATTEMPT_LATENCY_MS),
+        ("-40", 0),
+        ('"1200"', None),
+        ("true", None),
+        ("null", None),
+    ]
+    body = '{"attempts": [%s]}' % ", ".join(
+        f'{{"question_id": {q0}, "correct": true, "latency_ms": {latency}}}'
+        for latency, _ in cases
+    )
+    response = post_raw(client, ids["set"], body)
+    print_test("NaN/Infinity latencies don't cause a 500", response.status_code == 200)
+    print_test("Every attempt is still recorded", response.get_json() == {"recorded": len(cases)})
+    stored = stored_latencies(app)
+    for (latency, expected), actual in zip(cases, stored):
+        print_test(f"latency_ms {latency} stored as {expected}", actual == expected)
+    clear_attempts(app)
+
+
+def test_payload_validation(app, ids):
+    print_section("Testing Payload Validation")
+    student = client_for(app, ids["student"])
+    q0 = ids["questions"][0]
+
+    for name, body in (
+        ("JSON array body", "[1, 2]"),
+        ("Missing attempts", "{}"),
+        ("Attempts not a list", '{"attempts": "all of them"}'),
+        ("Malformed JSON", "{attempts"),
+        ("Oversized batch", json.dumps({"attempts": [{"question_id": q0}] * (MAX_ATTEMPT_BATCH + 1)})),
+    ):
+        response = post_raw(student, ids["set"], body)
+        print_test(f"{name} returns 400", response.status_code == 400)
+
+    body = json.dumps({"attempts": [
+        {"question_id": [q0], "correct": True},
+        {"question_id": str(q0), "correct": True},
+        {"question_id": True, "correct": True},
+        {"question_id": ids["stray"], "correct": True},
+        "not an attempt",
+        {"question_id": q0, "correct": True},
+    ]})
+    response = post_raw(student, ids["set"], body)
+    print_test("Bad question ids don't cause a 500", response.status_code == 200)
+    print_test("Only the valid attempt is recorded", response.get_json() == {"recorded": 1})
+    clear_attempts(app)
+
+    response = post_raw(
+        client_for(app, ids["outsider"]), ids["set"], json.dumps({"attempts": []})
+    )
+    print_test("Outsider gets 403", response.status_code == 403)
+
+
+def test_analytics(app, ids):
+    print_section("Testing Class Analytics")
+    client = client_for(app, ids["student"])
+    q0, q1 = ids["questions"]
+    post_raw(client, ids["set"], json.dumps({"attempts": [
+        {"question_id": q0, "correct": True, "latency_ms": 1000},
+        {"question_id": q1, "correct": False, "latency_ms": 3000},
+    ]}))
+    class_analytics_cache.clear()
+    with app.app_context():
+        summary = summarise(class_analytics_cache.totals(ids["class"]))
+    print_test("Summary counts both attempts", summary["attempts"] == 2)
+    print_test("Student accuracy is 50%", summary["students"][0]["accuracy"] == 0.5)
+    print_test(
+        "Hardest question is listed first",
+        [q["question"] for q in summary["questions"]] == ["Q1", "Q0"],
+    )
+
+    post_raw(client, ids["set"], json.dumps({"attempts": [
+        {"question_id": q1, "correct": True, "latency_ms": "NaN"},
+    ]}))
+    with app.app_context():
+        summary = summarise(class_analytics_cache.totals(ids["class"]))
+    q1_stats = next(q for q in summary["questions"] if q["question"] == "Q1")
+    print_test("New attempts are folded into cached totals", summary["attempts"] == 3)
+    print_test(
+        "Attempts without a latency don't skew the average",
+        q1_stats["avg_latency_ms"] == 3000.0,
+    )
+
+    response = client_for(app, ids["teacher"]).get(f"/classes/class/{ids['class']}/analytics")
+    print_test("Teacher analytics page returns 200", response.status_code == 200)
+    response = client.get(f"/classes/class/{ids['class']}/analytics")
+    print_test("Students can't view analytics", response.status_code == 302)
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'attempts.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            ids = seed()
+
+        test_recording(app, ids)
+        test_latency_validation(app, ids)
+        test_payload_validation(app, ids)
+        test_analytics(app, ids)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("ATTEMPT TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All attempt checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
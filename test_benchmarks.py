@@ -0,0 +1,132 @@
+"""
+EconSpark Benchmark Suite Tests
+Checks the suite's significance test, machine-speed correction, baseline
+lookup and regression verdicts without running the timed benchmarks
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import suite  # noqa: E402
+
+ARGS = argparse.Namespace(alpha=0.01, min_change=0.10)
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def quietly(fn, *args):
+    with redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+
+def test_mann_whitney():
+    print_section("Testing the Mann-Whitney U Test")
+    p = suite.mann_whitney_greater([4, 5, 6], [1, 2, 3])
+    # Normal approximation with continuity correction, as scipy's asymptotic mode
+    print_test("Matches the reference p-value for a small sample", abs(p - 0.0404) < 1e-3)
+    slower = [1.2 + i * 0.001 for i in range(30)]
+    same = [1.0 + i * 0.001 for i in range(30)]
+    print_test("Clearly slower samples are significant", suite.mann_whitney_greater(slower, same) < 1e-6)
+    print_test("Clearly faster samples are not", suite.mann_whitney_greater(same, slower) > 0.99)
+    print_test("Identical samples are not significant", suite.mann_whitney_greater(same, same) > 0.4)
+    print_test("All-tied samples don't divide by zero", suite.mann_whitney_greater([1, 1], [1, 1]) == 1.0)
+
+
+def baseline_with(samples, calibration=None):
+    benchmarks = {"route.x": {"samples": samples, "median": sorted(samples)[len(samples) // 2]}}
+    if calibration is not None:
+        benchmarks[suite.CALIBRATION] = {"samples": [calibration] * 10, "median": calibration}
+    return {"benchmarks": benchmarks}
+
+
+def test_verdicts():
+    print_section("Testing Regression Verdicts")
+    base = [0.010 + i * 0.0001 for i in range(30)]
+    baseline = baseline_with(base)
+    slower = [s * 1.5 for s in base]
+    faster = [s * 0.5 for s in base]
+    noisy = [s * 1.05 for s in base]
+    print_test("A 50% slowdown is SLOWER", quietly(suite._report, "route.x", slower, baseline, 1.0, ARGS) == "SLOWER")
+    print_test("A 50% speedup is faster", quietly(suite._report, "route.x", faster, baseline, 1.0, ARGS) == "faster")
+    print_test("A 5% change is within --min-change", quietly(suite._report, "route.x", noisy, baseline, 1.0, ARGS) == "ok")
+    print_test("A benchmark without a baseline is new", quietly(suite._report, "route.y", base, baseline, 1.0, ARGS) == "new")
+    print_test(
+        "A slower machine excuses a proportional slowdown",
+        quietly(suite._report, "route.x", slower, baseline, 1.5, ARGS) == "ok",
+    )
+
+    samples = {suite.CALIBRATION: [0.02] * 10}
+    print_test("Machine speed is the calibration ratio", quietly(suite._machine_speed, samples, baseline_with(base, 0.01)) == 2.0)
+    print_test("No calibration baseline means speed 1", quietly(suite._machine_speed, samples, baseline) == 1.0)
+
+
+def test_baselines():
+    print_section("Testing Baseline Lookup")
+    saved = suite.RESULTS_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        suite.RESULTS_DIR = os.path.join(directory, "missing")
+        print_test("No results directory means no baseline", suite.latest_baseline() == (None, None))
+        suite.RESULTS_DIR = directory
+        print_test("An empty directory means no baseline", suite.latest_baseline() == (None, None))
+        for stamp in ("20250101T000000Z", "20250301T000000Z", "20250201T000000Z"):
+            with open(os.path.join(directory, f"{stamp}.json"), "w") as f:
+                json.dump({"created": stamp}, f)
+        path, data = suite.latest_baseline()
+        print_test("The newest run is the baseline", data == {"created": "20250301T000000Z"})
+    suite.RESULTS_DIR = saved
+
+
+def test_sampling():
+    print_section("Testing Sampling")
+    calls = []
+    specs = [
+        {"name": "a", "fn": lambda fx: calls.append("a"), "repeats": 3, "number": 2},
+        {"name": "b", "fn": lambda fx: calls.append("b"), "repeats": 1, "number": 1},
+    ]
+    samples = suite.run_benchmarks(specs, None)
+    print_test("Each benchmark is warmed up once first", calls[:2] == ["a", "b"])
+    print_test("Rounds interleave benchmarks", calls[2:] == ["a", "a", "b", "a", "a", "a", "a"])
+    print_test("One sample per repeat", {name: len(s) for name, s in samples.items()} == {"a": 3, "b": 1})
+    print_test("Every benchmark registers a distinct name", len({s["name"] for s in suite.BENCHMARKS}) == len(suite.BENCHMARKS))
+
+
+def run_all_tests():
+    test_mann_whitney()
+    test_verdicts()
+    test_baselines()
+    test_sampling()
+
+    print_section("BENCHMARK SUITE TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All benchmark suite checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,195 @@
+"""
+EconSpark Class Bundle Tests
+Checks the per-class flashcard bundle: its contents, revalidation across
+gzip and identity encodings, and that checking for changes is one query
+no matter how many sets are shared
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website.bundles import bundle_cache, shared_set_versions
+from website.models import User, Class, ClassMembership, QuestionSet, Question
+from website.querybudget import query_guard
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def seed():
+    """
+    A class with a teacher's set and a student's clone of a clone of a
+    second set shared with it, and a second class with more shared sets
+    """
+    teacher = User(username="bundle_teacher", password="x", role="teacher")
+    student = User(username="bundle_student", password="x", role="student")
+    outsider = User(username="bundle_outsider", password="x", role="student")
+    db.session.add_all([teacher, student, outsider])
+    db.session.flush()
+
+    small = Class(name="Bundle Class", code="BUNDLE01", teacher_id=teacher.id)
+    large = Class(name="Bundle Class 2", code="BUNDLE02", teacher_id=teacher.id)
+    sets = [QuestionSet(name=f"Bundle Set {i}", user_id=teacher.id) for i in range(6)]
+    db.session.add_all([small, large] + sets)
+    db.session.flush()
+    db.session.add(ClassMembership(user_id=student.id, class_id=small.id))
+    root_question = None
+    for question_set in sets:
+        for i in range(2):
+            question = Question(question=f"{question_set.name} Q{i}", answer=f"A{i}",
+                                user_id=teacher.id, question_set_id=question_set.id)
+            db.session.add(question)
+            root_question = root_question or question
+    db.session.flush()
+    child = QuestionSet.clone(sets[1], teacher, "Bundle Child")
+    db.session.flush()
+    grandchild = QuestionSet.clone(child, teacher, "Bundle Grandchild")
+    db.session.flush()
+    small.question_sets.extend([sets[0], grandchild])
+    large.question_sets.extend(sets[2:])
+    db.session.commit()
+    return {
+        "teacher": teacher.id,
+        "student": student.id,
+        "outsider": outsider.id,
+        "small": small.id,
+        "large": large.id,
+        "sets": [s.id for s in sets],
+        "grandchild": grandchild.id,
+    }
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def bundle_url(class_id):
+    return f"/classes/class/{class_id}/bundle"
+
+
+def test_contents(app, ids):
+    print_section("Testing Bundle Contents")
+    response = client_for(app, ids["student"]).get(bundle_url(ids["small"]))
+    print_test("Member gets 200", response.status_code == 200)
+    payload = json.loads(response.get_data())
+    print_test(
+        "Bundle lists every shared set",
+        [s["id"] for s in payload["sets"]] == [ids["sets"][0], ids["grandchild"]],
+    )
+    print_test(
+        "A clone of a clone carries the cards it inherits",
+        [card[1] for card in payload["sets"][1]["cards"]] == ["Bundle Set 1 Q0", "Bundle Set 1 Q1"],
+    )
+
+    response = client_for(app, ids["outsider"]).get(bundle_url(ids["small"]))
+    print_test("Outsider gets 403", response.status_code == 403)
+
+
+def test_encodings(app, ids):
+    print_section("Testing Encodings and Revalidation")
+    client = client_for(app, ids["student"])
+    url = bundle_url(ids["small"])
+
+    zipped = client.get(url, headers={"Accept-Encoding": "gzip"})
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    print_test("gzip is used when accepted", zipped.headers.get("Content-Encoding") == "gzip")
+    print_test("Identity is sent otherwise", "Content-Encoding" not in plain.headers)
+    print_test(
+        "Both encodings carry the same content",
+        gzip.decompress(zipped.get_data()) == plain.get_data(),
+    )
+    print_test("ETag is weak", plain.headers["ETag"].startswith("W/"))
+    print_test("Response varies on Accept-Encoding", "Accept-Encoding" in plain.headers.get("Vary", ""))
+
+    etag = zipped.headers["ETag"]
+    response = client.get(url, headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+    print_test("gzip ETag revalidates the identity copy", response.status_code == 304)
+    response = client.get(url, headers={"If-None-Match": etag.removeprefix("W/")})
+    print_test("A strong form of the tag matches too", response.status_code == 304)
+
+    with app.app_context():
+        source = db.session.get(QuestionSet, ids["sets"][1])
+        question = source.effective_questions()[0]
+        question.edit_in(source, "Edited at the root", "A")
+        db.session.commit()
+    response = client.get(url, headers={"If-None-Match": etag})
+    print_test("A change at the root of a shared clone invalidates the bundle", response.status_code == 200)
+    payload = json.loads(response.get_data())
+    print_test(
+        "The clone still bundles the card it was cloned with",
+        payload["sets"][1]["cards"][0][1] == "Bundle Set 1 Q0",
+    )
+
+
+def test_version_queries(app, ids):
+    print_section("Testing Version Lookup")
+    with app.app_context():
+        _, versions = shared_set_versions(ids["small"])
+        print_test("One version per shared set", [v[0] for v in versions] == [ids["sets"][0], ids["grandchild"]])
+        print_test("Unknown class has no versions", shared_set_versions(999999) == ([], ()))
+
+    client = client_for(app, ids["teacher"])
+    counts = {}
+    for name in ("small", "large"):
+        client.get(bundle_url(ids[name]))
+        client.get(bundle_url(ids[name]))
+        counts[name] = query_guard.last_report["count"]
+        print_test(
+            f"Cached bundle for the {name} class repeats no statements",
+            not query_guard.last_report["repeated"],
+        )
+    print_test("Checking for changes costs the same for 2 or 4 sets", counts["small"] == counts["large"])
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'bundle.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            ids = seed()
+        bundle_cache._entries.clear()
+
+        test_contents(app, ids)
+        test_encodings(app, ids)
+        test_version_queries(app, ids)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("BUNDLE TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All bundle checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,341 @@
+"""
+EconSpark Copy-on-Write Cloning Tests
+Checks that a clone keeps showing the questions it was cloned with while
+the source, the clone and clones of the clone are edited independently,
+and that the clone columns are migrated onto existing databases
+"""
+
+import os
+import sys
+import tempfile
+from sqlalchemy import create_engine, inspect, text
+from website import create_app, db
+from website.migrations import upgrade
+from website.models import User, QuestionSet, Question
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def shown(set_id):
+    """(question, answer) pairs a set shows, in order"""
+    question_set = db.session.get(QuestionSet, set_id)
+    return [(q.question, q.answer) for q in question_set.effective_questions()]
+
+
+def new_set(owner, name, questions):
+    question_set = QuestionSet(name=name, user_id=owner.id)
+    db.session.add(question_set)
+    db.session.flush()
+    db.session.add_all(
+        Question(question=q, answer=a, user_id=owner.id, question_set_id=question_set.id)
+        for q, a in questions
+    )
+    db.session.commit()
+    return question_set
+
+
+def find(set_id, question_text):
+    """The row a set shows for a question"""
+    question_set = db.session.get(QuestionSet, set_id)
+    return next(q for q in question_set.effective_questions() if q.question == question_text)
+
+
+ORIGINAL = [("Q1", "A1"), ("Q2", "A2"), ("Q3", "A3")]
+
+
+def test_clone_is_one_row(teacher, student):
+    print_section("Testing Clone Creation")
+    source = new_set(teacher, "Clone Source", ORIGINAL)
+    questions_before = Question.query.count()
+    clone = QuestionSet.clone(source, student, "Clone Source (copy)")
+    db.session.commit()
+    print_test("Cloning inserts no question rows", Question.query.count() == questions_before)
+    print_test("Clone shows every source question in order", shown(clone.id) == ORIGINAL)
+
+
+def test_source_edits_dont_reach_clone(teacher, student):
+    print_section("Testing Source Changes After Cloning")
+    source = new_set(teacher, "Edited Source", ORIGINAL)
+    clone = QuestionSet.clone(source, student, "Edited Source (copy)")
+    db.session.commit()
+
+    find(source.id, "Q1").edit_in(source, "Q1 v2", "A1 v2")
+    db.session.commit()
+    print_test("Source shows the teacher's edit", shown(source.id)[0] == ("Q1 v2", "A1 v2"))
+    print_test("Clone keeps the question as it was cloned", shown(clone.id) == ORIGINAL)
+
+    find(source.id, "Q2").remove_from(source)
+    db.session.commit()
+    print_test("Source no longer shows the deleted question", [q for q, _ in shown(source.id)] == ["Q1 v2", "Q3"])
+    print_test("Clone still shows the deleted question", shown(clone.id) == ORIGINAL)
+
+    find(source.id, "Q1 v2").edit_in(source, "Q1 v3", "A1 v3")
+    db.session.commit()
+    print_test("A second source edit doesn't reach the clone either", shown(clone.id) == ORIGINAL)
+
+    copies = Question.query.filter_by(question_set_id=clone.id).count()
+    print_test("Only the changed questions were copied into the clone", copies == 2)
+
+    plain = new_set(teacher, "Uncloned Set", ORIGINAL)
+    question = find(plain.id, "Q3")
+    question_id = question.id
+    question.remove_from(plain)
+    db.session.commit()
+    print_test(
+        "Deleting from a set nobody cloned removes the row",
+        db.session.get(Question, question_id) is None,
+    )
+
+
+def test_clone_edits_dont_reach_source(teacher, student):
+    print_section("Testing Clone Changes")
+    source = new_set(teacher, "Stable Source", ORIGINAL)
+    clone = QuestionSet.clone(source, student, "Stable Source (copy)")
+    db.session.commit()
+
+    find(clone.id, "Q1").edit_in(clone, "My Q1", "My A1")
+    find(clone.id, "Q3").remove_from(clone)
+    db.session.commit()
+    print_test("Clone shows its edit in place", shown(clone.id) == [("My Q1", "My A1"), ("Q2", "A2")])
+    print_test("Source is untouched", shown(source.id) == ORIGINAL)
+
+    find(clone.id, "My Q1").edit_in(clone, "My Q1 again", "My A1 again")
+    db.session.commit()
+    print_test(
+        "Editing the clone's own copy updates it in place",
+        shown(clone.id)[0] == ("My Q1 again", "My A1 again")
+        and Question.query.filter_by(question_set_id=clone.id).count() == 2,
+    )
+
+
+def test_grandchildren(teacher, student, other):
+    print_section("Testing Clones of Clones")
+    source = new_set(teacher, "Root Set", ORIGINAL)
+    child = QuestionSet.clone(source, student, "Child Set")
+    db.session.commit()
+    find(child.id, "Q1").edit_in(child, "Child Q1", "Child A1")
+    db.session.commit()
+    grandchild = QuestionSet.clone(child, other, "Grandchild Set")
+    db.session.commit()
+    expected = [("Child Q1", "Child A1"), ("Q2", "A2"), ("Q3", "A3")]
+    print_test("Grandchild inherits the child's edit and the root's questions", shown(grandchild.id) == expected)
+
+    find(child.id, "Child Q1").edit_in(child, "Child Q1 v2", "Child A1 v2")
+    db.session.commit()
+    print_test("Child's later edit doesn't reach the grandchild", shown(grandchild.id) == expected)
+
+    find(source.id, "Q2").edit_in(source, "Root Q2 v2", "Root A2 v2")
+    find(source.id, "Q3").remove_from(source)
+    db.session.commit()
+    print_test("Root edits and deletes reach neither clone", shown(grandchild.id) == expected)
+    print_test(
+        "Child keeps its own view",
+        shown(child.id) == [("Child Q1 v2", "Child A1 v2"), ("Q2", "A2"), ("Q3", "A3")],
+    )
+
+    find(grandchild.id, "Q2").edit_in(grandchild, "GC Q2", "GC A2")
+    db.session.commit()
+    find(child.id, "Q2").edit_in(child, "Child Q2", "Child A2")
+    db.session.commit()
+    print_test(
+        "Grandchild's own edit wins over edits further up, without duplicates",
+        shown(grandchild.id) == [("Child Q1", "Child A1"), ("GC Q2", "GC A2"), ("Q3", "A3")],
+    )
+
+    find(child.id, "Q3").remove_from(child)
+    db.session.commit()
+    print_test("Child's removal doesn't reach the grandchild", ("Q3", "A3") in shown(grandchild.id))
+
+
+def test_source_additions_dont_reach_clone(teacher, student, other):
+    print_section("Testing Questions Added After Cloning")
+    source = new_set(teacher, "Growing Source", ORIGINAL)
+    child = QuestionSet.clone(source, student, "Growing Source (copy)")
+    db.session.commit()
+
+    db.session.add(Question(question="Q4", answer="A4", user_id=teacher.id, question_set_id=source.id))
+    db.session.commit()
+    print_test("Source shows the new question", ("Q4", "A4") in shown(source.id))
+    print_test("Clone doesn't inherit it", shown(child.id) == ORIGINAL)
+
+    grandchild = QuestionSet.clone(child, other, "Growing Source (copy of copy)")
+    db.session.commit()
+    db.session.add(Question(question="Q5", answer="A5", user_id=student.id, question_set_id=child.id))
+    db.session.commit()
+    print_test("A clone of the clone doesn't see it either", shown(grandchild.id) == ORIGINAL)
+    print_test("The clone shows its own additions", shown(child.id) == ORIGINAL + [("Q5", "A5")])
+
+    later = QuestionSet.clone(source, other, "Growing Source (later copy)")
+    db.session.commit()
+    print_test("Clones made afterwards do include it", shown(later.id) == ORIGINAL + [("Q4", "A4")])
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def test_delete_source_set(app, ids):
+    print_section("Testing Deleting a Cloned Set")
+    with app.app_context():
+        teacher, student, other = (db.session.get(User, ids[key]) for key in ("teacher", "student", "other"))
+        source = new_set(teacher, "Doomed Set", ORIGINAL)
+        child = QuestionSet.clone(source, student, "Survivor")
+        db.session.commit()
+        find(child.id, "Q1").edit_in(child, "Child Q1", "Child A1")
+        find(child.id, "Q3").remove_from(child)
+        db.session.commit()
+        grandchild = QuestionSet.clone(child, other, "Survivor's Copy")
+        db.session.commit()
+        find(grandchild.id, "Q2").edit_in(grandchild, "GC Q2", "GC A2")
+        db.session.commit()
+        child_before, grandchild_before = shown(child.id), shown(grandchild.id)
+        source_id, child_id, grandchild_id = source.id, child.id, grandchild.id
+
+    client_for(app, ids["teacher"]).post(f"/tests/delete_set/{source_id}")
+
+    with app.app_context():
+        print_test("Source set is deleted", db.session.get(QuestionSet, source_id) is None)
+        print_test("Child is detached from it", db.session.get(QuestionSet, child_id).source_set_id is None)
+        print_test("Child shows the same questions", shown(child_id) == child_before)
+        print_test("Grandchild shows the same questions", shown(grandchild_id) == grandchild_before)
+
+        find(child_id, "Q2").edit_in(db.session.get(QuestionSet, child_id), "Child Q2", "Child A2")
+        db.session.commit()
+        print_test(
+            "Grandchild's edit still replaces the materialised copy",
+            shown(grandchild_id) == grandchild_before,
+        )
+
+
+def test_routes(app, ids):
+    print_section("Testing Question Routes")
+    with app.app_context():
+        teacher, student = db.session.get(User, ids["teacher"]), db.session.get(User, ids["student"])
+        source = new_set(teacher, "Route Source", ORIGINAL)
+        clone = QuestionSet.clone(source, student, "Route Source (copy)")
+        db.session.commit()
+        question_id = find(source.id, "Q1").id
+        source_id, clone_id = source.id, clone.id
+
+    client = client_for(app, ids["teacher"])
+    response = client.post(f"/tests/delete_question/{question_id}", data={"set_id": "abc"})
+    print_test("Non-numeric set_id doesn't cause a 500", response.status_code == 302)
+    with app.app_context():
+        print_test("It falls back to the question's own set", [q for q, _ in shown(source_id)] == ["Q2", "Q3"])
+        print_test("Clone still shows the deleted question", shown(clone_id) == ORIGINAL)
+        question_id = find(source_id, "Q2").id
+
+    client.post(
+        f"/tests/edit_question/{source_id}/{question_id}",
+        data={"question": "Edited over HTTP", "answer": "New answer"},
+    )
+    with app.app_context():
+        print_test("Teacher edit through the route stays out of the clone", shown(clone_id) == ORIGINAL)
+
+    deck = client_for(app, ids["student"]).get(f"/tests/flashcards/{clone_id}/deck").get_json()
+    print_test(
+        "Clone's flashcard deck is unchanged",
+        [(card["question"], card["answer"]) for card in deck["cards"]] == ORIGINAL,
+    )
+
+
+def test_migration(directory):
+    print_section("Testing Migration of an Existing Database")
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'old.db')}")
+    with engine.begin() as connection:
+        # The question tables as they were before cloning existed
+        connection.execute(text(
+            "CREATE TABLE question_set (id INTEGER PRIMARY KEY, name VARCHAR(150) NOT NULL, "
+            "description VARCHAR(500), user_id INTEGER)"
+        ))
+        connection.execute(text(
+            "CREATE TABLE question (id INTEGER PRIMARY KEY, question VARCHAR(500) NOT NULL, "
+            "answer VARCHAR(500) NOT NULL, user_id INTEGER, question_set_id INTEGER)"
+        ))
+        for table in ("class_membership", "class_question_sets", "chat_message", "assignment", "quiz_attempt"):
+            connection.execute(text(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, user_id INTEGER, "
+                                    "class_id INTEGER, question_set_id INTEGER, timestamp DATETIME, "
+                                    "creator_id INTEGER, question_id INTEGER)"))
+        connection.execute(text("INSERT INTO question VALUES (1, 'Old', 'Row', 1, 1)"))
+
+    applied = upgrade(engine)
+    columns = {
+        table: {column["name"] for column in inspect(engine).get_columns(table)}
+        for table in ("question_set", "question")
+    }
+    print_test("Clone migration is applied", any(version == 1 for version, _ in applied))
+    print_test("question_set.source_set_id is added", "source_set_id" in columns["question_set"])
+    print_test(
+        "question.source_question_id and is_removed are added",
+        {"source_question_id", "is_removed"} <= columns["question"],
+    )
+    with engine.connect() as connection:
+        print_test(
+            "Existing rows default to not removed",
+            connection.execute(text("SELECT is_removed FROM question WHERE id = 1")).scalar() == 0,
+        )
+    print_test("Running it again applies nothing", upgrade(engine) == [])
+    engine.dispose()
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'cloning.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            teacher = User(username="clone_teacher", password="x", role="teacher")
+            student = User(username="clone_student", password="x", role="student")
+            other = User(username="clone_other", password="x", role="student")
+            db.session.add_all([teacher, student, other])
+            db.session.commit()
+
+            test_clone_is_one_row(teacher, student)
+            test_source_edits_dont_reach_clone(teacher, student)
+            test_clone_edits_dont_reach_source(teacher, student)
+            test_grandchildren(teacher, student, other)
+            test_source_additions_dont_reach_clone(teacher, student, other)
+            ids = {"teacher": teacher.id, "student": student.id, "other": other.id}
+
+        test_delete_source_set(app, ids)
+        test_routes(app, ids)
+
+        with app.app_context():
+            db.engine.dispose()
+
+        test_migration(directory)
+
+    print_section("CLONING TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All cloning checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,136 @@
+"""
+EconSpark Response Compression Tests
+Checks gzip for HTML and JSON responses, weak ETags and 304s on repeat
+GETs, and that streamed and small responses are left alone
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+from flask import Response, jsonify
+from website import create_app, db
+from website.compression import compression
+from website.models import User
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def add_test_routes(app):
+    big = {"rows": [{"price": p, "quantity": 100 - p} for p in range(100)]}
+    app.add_url_rule("/_test/big.json", "test_big", lambda: jsonify(big), methods=["GET", "POST"])
+    app.add_url_rule("/_test/small.json", "test_small", lambda: jsonify(ok=True))
+
+    def strong():
+        response = Response("x" * 4096, mimetype="text/plain")
+        response.set_etag("fixed")
+        return response
+
+    app.add_url_rule("/_test/strong.txt", "test_strong", strong)
+    app.add_url_rule(
+        "/_test/stream", "test_stream", lambda: Response(iter(["x" * 4096]), mimetype="text/plain")
+    )
+
+
+def test_gzip(app, user_id):
+    print_section("Testing gzip")
+    client = app.test_client()
+    plain = client.get("/_test/big.json", headers={"Accept-Encoding": "identity"})
+    print_test("Identity clients get the plain body", "Content-Encoding" not in plain.headers)
+
+    response = client.get("/_test/big.json", headers={"Accept-Encoding": "gzip"})
+    print_test("JSON is gzipped when accepted", response.headers.get("Content-Encoding") == "gzip")
+    print_test("gzip body decompresses to the plain body", gzip.decompress(response.get_data()) == plain.get_data())
+    print_test("Compressed body is smaller", len(response.get_data()) < len(plain.get_data()))
+    print_test("Responses vary on Accept-Encoding", "Accept-Encoding" in response.headers.get("Vary", ""))
+
+    response = client.get("/_test/small.json", headers={"Accept-Encoding": "gzip"})
+    print_test("Bodies under the minimum size are not gzipped", "Content-Encoding" not in response.headers)
+    response = client.get("/_test/stream", headers={"Accept-Encoding": "gzip"})
+    print_test("Streamed responses are passed through", "Content-Encoding" not in response.headers and "ETag" not in response.headers)
+
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    response = client.get("/classes/my_classes", headers={"Accept-Encoding": "gzip"})
+    print_test("HTML pages are gzipped", response.headers.get("Content-Encoding") == "gzip")
+    print_test("Pages are private and revalidated", response.headers.get("Cache-Control") == "private, no-cache")
+
+    body = "\n".join(compression.render())
+    print_test("Bytes in and out are exported", 'econspark_compression_bytes_in_total{endpoint="test_big"}' in body)
+
+
+def test_conditional(app):
+    print_section("Testing ETags and 304s")
+    client = app.test_client()
+    response = client.get("/_test/big.json", headers={"Accept-Encoding": "gzip"})
+    etag, weak = response.get_etag()
+    print_test("GETs get a weak ETag", etag is not None and weak)
+
+    again = client.get("/_test/big.json", headers={"Accept-Encoding": "gzip", "If-None-Match": f'W/"{etag}"'})
+    print_test("A matching If-None-Match gets 304", again.status_code == 304)
+    print_test("The 304 has no body", again.get_data() == b"")
+    identity = client.get("/_test/big.json", headers={"Accept-Encoding": "identity", "If-None-Match": f'W/"{etag}"'})
+    print_test("The weak ETag matches across encodings", identity.status_code == 304)
+    stale = client.get("/_test/big.json", headers={"If-None-Match": 'W/"stale"'})
+    print_test("A stale ETag gets the full body", stale.status_code == 200)
+    post = client.post("/_test/big.json")
+    print_test("Only GET and HEAD are tagged", post.status_code == 200 and "ETag" not in post.headers)
+
+    response = client.get("/_test/strong.txt", headers={"Accept-Encoding": "gzip"})
+    print_test("A strong ETag is weakened once the body is gzipped", response.get_etag() == ("fixed", True))
+    response = client.get("/_test/strong.txt", headers={"Accept-Encoding": "identity"})
+    print_test("A strong ETag is kept on the plain body", response.get_etag() == ("fixed", False))
+
+    body = "\n".join(compression.render())
+    print_test("304s are exported", 'econspark_not_modified_total{endpoint="test_big"}' in body)
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'compression.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        add_test_routes(app)
+        with app.app_context():
+            user = User(username="compression_teacher", password="x", role="teacher")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        test_gzip(app, user_id)
+        test_conditional(app)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("COMPRESSION TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All compression checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
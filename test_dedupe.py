@@ -0,0 +1,343 @@
+"""
+EconSpark Near-Duplicate Detection Tests
+Checks the MinHash arithmetic, the LSH index's view of committed and
+other-process writes, and duplicate warnings when sharing cloned sets
+"""
+
+import os
+import sys
+import tempfile
+import time
+import zlib
+from datetime import timedelta
+from website import create_app, db
+from website import dedupe
+from website.dedupe import (
+    DUPLICATE_THRESHOLD,
+    NUM_PERMUTATIONS,
+    duplicate_index,
+    minhash,
+    shingles,
+    similarity,
+)
+from website.fragments import bump_data_versions
+from website.models import User, Class, QuestionSet, Question
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def reference_minhash(text):
+    """The same signature computed with Python integers, which can't overflow"""
+    prime = int(dedupe._PRIME)
+    hashes = [zlib.crc32(s.encode()) % prime for s in shingles(text)]
+    return [
+        min((int(a) * h + int(b)) % prime for h in hashes)
+        for a, b in zip(dedupe._HASH_A, dedupe._HASH_B)
+    ]
+
+
+def test_minhash():
+    print_section("Testing MinHash Signatures")
+    texts = [
+        "What is the price elasticity of demand?",
+        "zzzz~~~~ ÿþ unusual shingles \U0001f600 " * 20,
+        "ab",
+    ]
+    for text in texts:
+        print_test(
+            f"Signature matches exact arithmetic ({text[:20]!r})",
+            minhash(text).tolist() == reference_minhash(text),
+        )
+    print_test("Signature has one value per permutation", len(minhash(texts[0])) == NUM_PERMUTATIONS)
+    print_test("Signature values stay below the prime", int(minhash(texts[1]).max()) < int(dedupe._PRIME))
+
+    a = minhash("What is the price elasticity of demand?")
+    b = minhash("What is price elasticity of demand?")
+    c = minhash("Explain comparative advantage in trade")
+    print_test("Identical text has similarity 1", similarity(a, a) == 1.0)
+    print_test("Near-duplicate clears the threshold", similarity(a, b) >= DUPLICATE_THRESHOLD)
+    print_test("Unrelated text stays below the threshold", similarity(a, c) < DUPLICATE_THRESHOLD)
+
+
+def matching_ids(text, set_ids=None):
+    return {question_id for question_id, _ in duplicate_index.find_similar(text, set_ids)}
+
+
+def test_index_updates(app, ids):
+    print_section("Testing Index Updates")
+    text = "What does the law of diminishing returns state?"
+    with app.app_context():
+        print_test("Nothing matches before the question exists", matching_ids(text) == set())
+
+        question = Question(question=text, answer="...", user_id=ids["teacher"], question_set_id=ids["set_a"])
+        db.session.add(question)
+        db.session.commit()
+        print_test("Committed insert is found", matching_ids(text) == {question.id})
+        print_test(
+            "Set filter excludes other sets",
+            matching_ids(text, {ids["set_b"]}) == set(),
+        )
+
+        question.question = "Define opportunity cost"
+        db.session.commit()
+        print_test("Committed edit replaces the old text", matching_ids(text) == set())
+
+        question.question = text
+        db.session.flush()
+        db.session.rollback()
+        print_test("Rolled-back edit is not applied", matching_ids(text) == set())
+
+        db.session.delete(question)
+        db.session.commit()
+        print_test("Committed delete is removed", matching_ids("Define opportunity cost") == set())
+
+
+def write_elsewhere(statement):
+    """Write through a separate connection, as another worker would: the row
+    and the data_version bump arrive without this process's commit hooks"""
+    with db.engine.begin() as connection:
+        connection.execute(statement)
+        connection.execute(
+            db.text(
+                "INSERT INTO data_version (name, version) VALUES ('question', 1) "
+                "ON CONFLICT(name) DO UPDATE SET version = version + 1"
+            )
+        )
+    db.session.rollback()
+
+
+def test_other_process_writes(app, ids):
+    print_section("Testing Writes From Other Processes")
+    text = "How does a price ceiling cause a shortage?"
+    questions = Question.__table__
+    with app.app_context():
+        # Age the seeded rows so only this test's writes fall inside the
+        # catch-up overlap
+        with db.engine.begin() as connection:
+            connection.execute(db.update(questions).values(updated_at=dedupe.utcnow() - timedelta(hours=1)))
+        write_elsewhere(
+            db.insert(questions).values(
+                question=text, answer="...", user_id=ids["teacher"],
+                question_set_id=ids["set_a"], is_removed=False,
+            )
+        )
+
+        saved_interval = dedupe.FRESHNESS_INTERVAL
+        dedupe.FRESHNESS_INTERVAL = 3600
+        print_test(
+            "Within the freshness interval the index isn't re-checked",
+            matching_ids(text) == set(),
+        )
+        dedupe.FRESHNESS_INTERVAL = 0
+        added = []
+        original_add = duplicate_index._add
+        duplicate_index._add = lambda *args: (added.append(args[0]), original_add(*args))
+        found = matching_ids(text)
+        duplicate_index._add = original_add
+        print_test("After the interval the index catches up", len(found) == 1)
+        print_test(
+            "Catching up only re-reads recently changed rows",
+            added == list(found),
+        )
+        (question_id,) = found
+
+        write_elsewhere(
+            db.update(questions)
+            .where(questions.c.id == question_id)
+            .values(question="What is a binding price floor?", updated_at=dedupe.utcnow())
+        )
+        print_test(
+            "Edits from other processes replace the old text",
+            matching_ids(text) == set() and matching_ids("What is a binding price floor?") == {question_id},
+        )
+
+        write_elsewhere(
+            db.update(questions)
+            .where(questions.c.id == question_id)
+            .values(is_removed=True, updated_at=dedupe.utcnow())
+        )
+        print_test("Removals from other processes are dropped", matching_ids("What is a binding price floor?") == set())
+
+        hard = Question(question="Explain what a tariff does to imports", answer="...",
+                        user_id=ids["teacher"], question_set_id=ids["set_a"])
+        db.session.add(hard)
+        db.session.commit()
+        hard_id = hard.id
+        with db.engine.begin() as connection:
+            connection.execute(db.delete(questions).where(questions.c.id == hard_id))
+        db.session.rollback()
+        found = dedupe.find_duplicates("Explain what a tariff does to imports", None)
+        print_test("Questions deleted elsewhere aren't returned", found == [])
+        print_test("...and are dropped from the index", hard_id not in duplicate_index._signatures)
+
+        # Bulk writes in this process bump the version without row hooks
+        db.session.execute(
+            db.insert(Question),
+            [{"question": "Why do firms in perfect competition earn zero profit?", "answer": "...",
+              "user_id": ids["teacher"], "question_set_id": ids["set_a"]}],
+        )
+        bump_data_versions(db.session, [Question])
+        db.session.commit()
+        print_test(
+            "Bulk insert is picked up through the version counter",
+            len(matching_ids("Why do firms in perfect competition earn zero profit?")) == 1,
+        )
+
+        question = Question(question="Define consumer surplus please", answer="...",
+                            user_id=ids["teacher"], question_set_id=ids["set_a"])
+        db.session.add(question)
+        db.session.commit()
+        version = duplicate_index._version
+        rebuilt = []
+        original_add = duplicate_index._add
+        duplicate_index._add = lambda *args: (rebuilt.append(args), original_add(*args))
+        duplicate_index.ensure_loaded()
+        duplicate_index._add = original_add
+        print_test(
+            "This process's own commits don't force a rebuild",
+            not rebuilt and duplicate_index._version == version,
+        )
+        dedupe.FRESHNESS_INTERVAL = saved_interval
+
+
+def test_background_build(app):
+    print_section("Testing the Background Build")
+    with app.app_context():
+        expected = Question.query.filter_by(is_removed=False).count()
+        text = Question.query.filter_by(is_removed=False).first().question
+
+    original_minhash = dedupe.minhash
+
+    def slow_minhash(text):
+        time.sleep(0.05)
+        return original_minhash(text)
+
+    dedupe.minhash = slow_minhash
+    try:
+        duplicate_index.init_app(app)
+        duplicate_index.init_app(app)
+        started = time.monotonic()
+        with app.app_context():
+            during = duplicate_index.find_similar(text)
+        waited = time.monotonic() - started
+    finally:
+        dedupe.minhash = original_minhash
+    print_test("Lookups during the build don't wait for it", during == [] and waited < 0.5)
+    print_test("The build finishes in the background", duplicate_index.wait_until_ready(10))
+    print_test("Only the latest build is kept, and it is complete", len(duplicate_index._signatures) == expected)
+    with app.app_context():
+        print_test("Lookups work once it's ready", len(duplicate_index.find_similar(text)) >= 1)
+
+
+def test_share_warnings(app, ids):
+    print_section("Testing Duplicate Warnings When Sharing")
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(ids["teacher"])
+
+    response = client.post(
+        f"/classes/class/{ids['class_b']}/share_question_set",
+        data={"set_id": ids["clone_of_a"]},
+        follow_redirects=True,
+    )
+    body = response.get_data(as_text=True)
+    print_test(
+        "Sharing a clone checks the questions it inherits",
+        "1 question(s) look like near-duplicates" in body,
+    )
+
+    response = client.post(
+        f"/classes/class/{ids['class_c']}/share_question_set",
+        data={"set_id": ids["set_b"]},
+        follow_redirects=True,
+    )
+    body = response.get_data(as_text=True)
+    print_test(
+        "Questions inherited by an already shared clone are compared",
+        "1 question(s) look like near-duplicates" in body,
+    )
+
+
+def seed():
+    teacher = User(username="dedupe_teacher", password="x", role="teacher")
+    db.session.add(teacher)
+    db.session.flush()
+    set_a = QuestionSet(name="Set A", user_id=teacher.id)
+    set_b = QuestionSet(name="Set B", user_id=teacher.id)
+    db.session.add_all([set_a, set_b])
+    db.session.flush()
+    db.session.add_all([
+        Question(question="Explain the law of demand with an example", answer="...",
+                 user_id=teacher.id, question_set_id=set_a.id),
+        Question(question="Explain the law of demand using an example", answer="...",
+                 user_id=teacher.id, question_set_id=set_b.id),
+    ])
+    clone_of_a = QuestionSet.clone(set_a, teacher, "Set A (copy)")
+    classes = [
+        Class(name=f"Dedupe Class {c}", code=f"DEDUPE0{c}", teacher_id=teacher.id)
+        for c in "ABC"
+    ]
+    db.session.add_all(classes)
+    db.session.flush()
+    classes[1].question_sets.append(set_b)
+    classes[2].question_sets.append(clone_of_a)
+    db.session.commit()
+    return {
+        "teacher": teacher.id,
+        "set_a": set_a.id,
+        "set_b": set_b.id,
+        "clone_of_a": clone_of_a.id,
+        "class_b": classes[1].id,
+        "class_c": classes[2].id,
+    }
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'dedupe.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            ids = seed()
+        duplicate_index.wait_until_ready(10)
+
+        test_minhash()
+        test_index_updates(app, ids)
+        test_other_process_writes(app, ids)
+        test_background_build(app)
+        test_share_warnings(app, ids)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("DEDUPE TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All dedupe checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,154 @@
+"""
+EconSpark Economics Model Tests
+Checks the NumPy models against hand-worked textbook answers, parameter
+validation, and the /sim/api/models endpoints
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+from website import create_app, db
+from website.economics import MAX_CURVE_POINTS, MODELS, evaluate, resolve_parameters
+from website.models import User
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def close(value, expected):
+    return value is not None and abs(value - expected) < 1e-6
+
+
+def test_market():
+    print_section("Testing the Market Model")
+    outcomes = evaluate("market", {})["outcomes"]
+    print_test("Default equilibrium quantity is 4", close(outcomes["quantity"], 4))
+    print_test("Default equilibrium price is 6", close(outcomes["consumer_price"], 6))
+    print_test("No tax means no deadweight loss", close(outcomes["deadweight_loss"], 0))
+
+    outcomes = evaluate("market", {"tax": 2})["outcomes"]
+    print_test("A tax of 2 cuts quantity to 3", close(outcomes["quantity"], 3))
+    print_test("Consumers pay 7", close(outcomes["consumer_price"], 7))
+    print_test("Producers keep 5", close(outcomes["producer_price"], 5))
+    print_test("Tax revenue is 6", close(outcomes["tax_revenue"], 6))
+    print_test("Deadweight loss is 1", close(outcomes["deadweight_loss"], 1))
+
+    outcomes = evaluate("market", {"tax": 20})["outcomes"]
+    print_test("A prohibitive tax stops trade rather than going negative", close(outcomes["quantity"], 0))
+
+    curves = evaluate("market", {"tax": 2}, points=10)["curves"]
+    print_test("Taxed market draws the shifted supply curve", "supply_with_tax" in curves)
+    print_test("Curves have the requested resolution", len(curves["demand"]["x"]) == 10)
+    curves = evaluate("market", {}, points=10**6)["curves"]
+    print_test("Curve resolution is capped", len(curves["demand"]["x"]) == MAX_CURVE_POINTS)
+
+
+def test_monopoly_and_ppf():
+    print_section("Testing the Monopoly and PPF Models")
+    outcomes = evaluate("monopoly", {})["outcomes"]
+    print_test("Monopoly quantity is 4", close(outcomes["monopoly_quantity"], 4))
+    print_test("Monopoly price is 6", close(outcomes["monopoly_price"], 6))
+    print_test("Marginal revenue equals marginal cost", close(outcomes["marginal_revenue"], 2))
+    print_test("Competitive quantity is 8", close(outcomes["competitive_quantity"], 8))
+    print_test("Deadweight loss is 8", close(outcomes["deadweight_loss"], 8))
+    print_test("Lerner index is 2/3", abs(outcomes["lerner_index"] - 2 / 3) < 1e-3)
+
+    outcomes = evaluate("ppf", {})["outcomes"]
+    print_test("Frontier at x=50 is 100*sqrt(0.75)", abs(outcomes["y"] - 100 * np.sqrt(0.75)) < 1e-6)
+    outcomes = evaluate("ppf", {"x": 100})["outcomes"]
+    print_test("Infinite opportunity cost is reported as null", outcomes["opportunity_cost"] is None)
+
+    grid = MODELS["market"].outcomes(
+        demand_intercept=np.array([8.0, 10.0, 12.0]), demand_slope=1, supply_intercept=2,
+        supply_slope=1, tax=0,
+    )
+    print_test("Models broadcast over arrays", np.allclose(grid["quantity"](), [3, 4, 5]))
+
+
+def test_validation():
+    print_section("Testing Parameter Validation")
+    params = resolve_parameters("market", {"tax": "1.5"})
+    print_test("Numeric strings are accepted", params["tax"] == 1.5)
+    print_test("Missing parameters take their defaults", params["demand_intercept"] == 10)
+    for values, reason in (
+        ({"bogus": 1}, "Unknown parameters"),
+        ({"tax": "lots"}, "Non-numbers"),
+        ({"tax": -1}, "Out-of-range values"),
+        ({"demand_slope": 0}, "A zero slope"),
+    ):
+        try:
+            resolve_parameters("market", values)
+            raised = False
+        except ValueError:
+            raised = True
+        print_test(f"{reason} are rejected", raised)
+
+
+def test_routes(app, user_id):
+    print_section("Testing /sim/api/models")
+    client = app.test_client()
+    print_test("Login is required", client.get("/sim/api/models").status_code == 302)
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+
+    listing = client.get("/sim/api/models").get_json()
+    print_test("Every model is listed", set(listing) == set(MODELS))
+    response = client.get("/sim/api/models/market?tax=2&points=5")
+    print_test("A model runs from query arguments", response.status_code == 200 and response.get_json()["outcomes"]["quantity"] == 3)
+    print_test("Unknown models get 404", client.get("/sim/api/models/oligopoly").status_code == 404)
+    response = client.get("/sim/api/models/market?tax=-5")
+    print_test("Bad parameters get 400 with a message", response.status_code == 400 and "tax" in response.get_json()["error"])
+    print_test("A bad point count gets 400", client.get("/sim/api/models/market?points=many").status_code == 400)
+
+
+def run_all_tests():
+    test_market()
+    test_monopoly_and_ppf()
+    test_validation()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'economics.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            user = User(username="economics_student", password="x", role="student")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        test_routes(app, user_id)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("ECONOMICS TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All economics checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,215 @@
+"""
+EconSpark Export Tests
+Checks the streamed CSV/JSON downloads for question sets and class data,
+including who is allowed to download them
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website.models import (
+    User,
+    Class,
+    ClassMembership,
+    QuestionSet,
+    Question,
+    ChatMessage,
+    can_access_question_set,
+)
+from website.export import EXPORT_BATCH_SIZE
+
+# More than one batch, so streaming has to page
+QUESTIONS = EXPORT_BATCH_SIZE * 2 + 7
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def seed():
+    """A teacher's set shared with one class; a member and an outsider"""
+    teacher = User(username="export_teacher", password="x", role="teacher")
+    member = User(username="export_member", password="x", role="student")
+    outsider = User(username="export_outsider", password="x", role="student")
+    db.session.add_all([teacher, member, outsider])
+    db.session.flush()
+
+    class_obj = Class(name="Export Class", code="EXPORT01", teacher_id=teacher.id)
+    question_set = QuestionSet(name="Export Set", user_id=teacher.id)
+    db.session.add_all([class_obj, question_set])
+    db.session.flush()
+    db.session.add(ClassMembership(user_id=member.id, class_id=class_obj.id))
+    class_obj.question_sets.append(question_set)
+    db.session.add_all(
+        Question(
+            question=f"Question {i}, with \"quotes\"",
+            answer=f"Answer {i}",
+            user_id=teacher.id,
+            question_set_id=question_set.id,
+        )
+        for i in range(QUESTIONS)
+    )
+    db.session.add(
+        ChatMessage(message="Hello, class", user_id=member.id, class_id=class_obj.id)
+    )
+    db.session.commit()
+    return {
+        "teacher": teacher.id,
+        "member": member.id,
+        "outsider": outsider.id,
+        "class": class_obj.id,
+        "set": question_set.id,
+    }
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def test_question_set_export(app, ids):
+    print_section("Testing Question Set Export")
+    teacher = client_for(app, ids["teacher"])
+
+    response = teacher.get(f"/export/question_set/{ids['set']}/csv")
+    print_test("CSV export returns 200", response.status_code == 200)
+    print_test("CSV export is streamed", response.is_streamed)
+    print_test("CSV export is text/csv", response.mimetype == "text/csv")
+    print_test(
+        "CSV export is an attachment",
+        f'filename="question_set_{ids["set"]}.csv"'
+        in response.headers.get("Content-Disposition", ""),
+    )
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    print_test("CSV has a header row", rows[0] == ["id", "question", "answer"])
+    print_test(f"CSV has all {QUESTIONS} questions across batches", len(rows) == QUESTIONS + 1)
+    print_test(
+        "CSV quoting round-trips commas and quotes",
+        rows[1][1] == 'Question 0, with "quotes"',
+    )
+
+    response = teacher.get(f"/export/question_set/{ids['set']}/json")
+    items = json.loads(response.get_data(as_text=True))
+    print_test("JSON export parses as one array", isinstance(items, list))
+    print_test(f"JSON has all {QUESTIONS} questions", len(items) == QUESTIONS)
+    print_test(
+        "JSON rows keep question order",
+        [item["id"] for item in items] == sorted(item["id"] for item in items),
+    )
+
+    response = teacher.get(f"/export/question_set/{ids['set']}/xml")
+    print_test("Unsupported format redirects", response.status_code == 302)
+
+
+def test_question_set_access(app, ids):
+    print_section("Testing Question Set Access Control")
+    with app.app_context():
+        question_set = db.session.get(QuestionSet, ids["set"])
+        print_test(
+            "Owner can access",
+            can_access_question_set(question_set, db.session.get(User, ids["teacher"])),
+        )
+        print_test(
+            "Class member can access",
+            can_access_question_set(question_set, db.session.get(User, ids["member"])),
+        )
+        print_test(
+            "Outsider cannot access",
+            not can_access_question_set(question_set, db.session.get(User, ids["outsider"])),
+        )
+
+    response = client_for(app, ids["member"]).get(f"/export/question_set/{ids['set']}/csv")
+    print_test("Class member can export a shared set", response.status_code == 200)
+    response.close()
+
+    response = client_for(app, ids["outsider"]).get(f"/export/question_set/{ids['set']}/csv")
+    print_test("Outsider is redirected", response.status_code == 302)
+    print_test(
+        "Outsider gets no question text",
+        b"Question 0" not in response.get_data(),
+    )
+
+    response = app.test_client().get(f"/export/question_set/{ids['set']}/csv")
+    print_test("Anonymous user is sent to log in", response.status_code == 302)
+
+
+def test_class_exports(app, ids):
+    print_section("Testing Class Data Export")
+    teacher = client_for(app, ids["teacher"])
+    member = client_for(app, ids["member"])
+
+    response = teacher.get(f"/export/class/{ids['class']}/roster/csv")
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    print_test("Roster export returns 200", response.status_code == 200)
+    print_test(
+        "Roster lists enrolled students only",
+        [row[1] for row in rows[1:]] == ["export_member"],
+    )
+
+    response = teacher.get(f"/export/class/{ids['class']}/chat/json")
+    messages = json.loads(response.get_data(as_text=True))
+    print_test(
+        "Chat export includes author and message",
+        [(m["username"], m["message"]) for m in messages]
+        == [("export_member", "Hello, class")],
+    )
+
+    response = teacher.get(f"/export/class/{ids['class']}/assignments/csv")
+    print_test("Assignment export returns 200", response.status_code == 200)
+    response.close()
+
+    for kind in ("roster", "chat", "assignments"):
+        response = member.get(f"/export/class/{ids['class']}/{kind}/csv")
+        print_test(f"Student cannot export class {kind}", response.status_code == 302)
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'export.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            ids = seed()
+
+        test_question_set_export(app, ids)
+        test_question_set_access(app, ids)
+        test_class_exports(app, ids)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("EXPORT TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All export checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,171 @@
+"""
+EconSpark Flashcard Deck Tests
+Checks the paged JSON deck endpoint and its ETag/Last-Modified revalidation,
+for a set and for a clone that inherits from it
+"""
+
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website.models import User, QuestionSet, Question
+from website.tests import DECK_PAGE_SIZE, MAX_DECK_PAGE_SIZE
+
+CARDS = DECK_PAGE_SIZE + 5
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def seed():
+    """A teacher's set of CARDS questions, cloned by a student"""
+    teacher = User(username="deck_teacher", password="x", role="teacher")
+    student = User(username="deck_student", password="x", role="student")
+    db.session.add_all([teacher, student])
+    db.session.flush()
+    question_set = QuestionSet(name="Deck Set", user_id=teacher.id)
+    db.session.add(question_set)
+    db.session.flush()
+    questions = [
+        Question(question=f"Q{i}", answer=f"A{i}", user_id=teacher.id, question_set_id=question_set.id)
+        for i in range(CARDS)
+    ]
+    db.session.add_all(questions)
+    db.session.flush()
+    clone = QuestionSet.clone(question_set, student, "Deck Set (copy)")
+    db.session.commit()
+    return {
+        "teacher": teacher.id,
+        "student": student.id,
+        "set": question_set.id,
+        "clone": clone.id,
+        "first_question": questions[0].id,
+    }
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def deck_url(set_id, **params):
+    query = "&".join(f"{key}={value}" for key, value in params.items())
+    return f"/tests/flashcards/{set_id}/deck" + (f"?{query}" if query else "")
+
+
+def test_paging(app, ids):
+    print_section("Testing Deck Paging")
+    client = client_for(app, ids["teacher"])
+
+    deck = client.get(deck_url(ids["set"])).get_json()
+    print_test("First page has the default page size", len(deck["cards"]) == DECK_PAGE_SIZE)
+    print_test("Total counts every card", deck["total"] == CARDS)
+    print_test("Page count rounds up", deck["pages"] == 2)
+    print_test("Cards carry only id, question and answer", set(deck["cards"][0]) == {"id", "question", "answer"})
+
+    deck = client.get(deck_url(ids["set"], page=2)).get_json()
+    print_test("Last page holds the remainder", [c["question"] for c in deck["cards"]] == [f"Q{i}" for i in range(DECK_PAGE_SIZE, CARDS)])
+
+    deck = client.get(deck_url(ids["set"], page=0, per_page=10 ** 6)).get_json()
+    print_test("Page is clamped to 1", deck["page"] == 1)
+    print_test("per_page is clamped to the maximum", deck["per_page"] == MAX_DECK_PAGE_SIZE)
+    deck = client.get(deck_url(ids["set"], per_page="lots")).get_json()
+    print_test("Non-numeric per_page falls back to the default", deck["per_page"] == DECK_PAGE_SIZE)
+
+    deck = client_for(app, ids["student"]).get(deck_url(ids["clone"])).get_json()
+    print_test("Clone's deck lists the inherited cards", deck["total"] == CARDS)
+
+
+def test_revalidation(app, ids):
+    print_section("Testing Deck Revalidation")
+    client = client_for(app, ids["teacher"])
+    url = deck_url(ids["set"])
+
+    response = client.get(url)
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    print_test("Deck has an ETag", bool(etag))
+    print_test("Deck has a Last-Modified", bool(last_modified))
+    print_test("Deck is private and revalidated", "private" in response.headers["Cache-Control"] and "no-cache" in response.headers["Cache-Control"])
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    print_test("Matching ETag gets 304", response.status_code == 304)
+    print_test("304 has no body", response.get_data() == b"")
+    response = client.get(url, headers={"If-Modified-Since": last_modified})
+    print_test("Unchanged Last-Modified gets 304", response.status_code == 304)
+
+    other_page = client.get(deck_url(ids["set"], page=2)).headers.get("ETag")
+    print_test("Each page has its own ETag", other_page != etag)
+
+    clone_client = client_for(app, ids["student"])
+    clone_etag = clone_client.get(deck_url(ids["clone"])).headers.get("ETag")
+
+    with app.app_context():
+        question = db.session.get(Question, ids["first_question"])
+        question.edit_in(question.question_set, "Edited Q0", "Edited A0")
+        db.session.commit()
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    print_test("Editing a question invalidates the ETag", response.status_code == 200)
+    print_test("Fresh deck shows the edit", response.get_json()["cards"][0]["question"] == "Edited Q0")
+
+    response = clone_client.get(deck_url(ids["clone"]), headers={"If-None-Match": clone_etag})
+    print_test("A change up the clone's lineage revalidates it", response.status_code == 200)
+    print_test("Clone still shows the card it was cloned with", response.get_json()["cards"][0]["question"] == "Q0")
+
+
+def test_access(app, ids):
+    print_section("Testing Deck Access")
+    response = client_for(app, ids["student"]).get(deck_url(ids["set"]))
+    print_test("Outsider gets 403", response.status_code == 403)
+    response = client_for(app, ids["teacher"]).get(deck_url(999999))
+    print_test("Missing set gets 404", response.status_code == 404)
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'deck.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            ids = seed()
+
+        test_paging(app, ids)
+        test_revalidation(app, ids)
+        test_access(app, ids)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("FLASHCARD DECK TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All flashcard deck checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
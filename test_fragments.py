@@ -0,0 +1,223 @@
+"""
+EconSpark Fragment Cache Tests
+Checks that cached page fragments are reused per user and invalidated by
+committed writes, bulk writes and other processes, but not by rollbacks or
+by writes to other users' data
+"""
+
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website.fragments import FragmentCache, bump_data_versions, data_versions, fragment_cache
+from website.models import User, Class, ClassMembership, QuestionSet, Question
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+class Renderer:
+    """Render callable that counts how often the cache calls it"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"<p>render {self.calls}</p>"
+
+
+def test_reuse_and_invalidation(app, teacher_id):
+    print_section("Testing Reuse and Invalidation")
+    cache = FragmentCache()
+    render = Renderer()
+    models = (QuestionSet,)
+    with app.app_context():
+        first = cache.render("lists", teacher_id, models, render)
+        second = cache.render("lists", teacher_id, models, render)
+        print_test("Second render is served from the cache", render.calls == 1 and first == second)
+        cache.render("lists", teacher_id + 1, models, render)
+        print_test("Each user gets their own entry", render.calls == 2)
+
+        db.session.add(QuestionSet(name="Fragment Set", user_id=teacher_id))
+        db.session.flush()
+        db.session.rollback()
+        cache.render("lists", teacher_id, models, render)
+        print_test("A rolled-back write doesn't invalidate", render.calls == 2)
+
+        db.session.add(QuestionSet(name="Fragment Set", user_id=teacher_id))
+        db.session.commit()
+        cache.render("lists", teacher_id, models, render)
+        print_test("A committed write invalidates", render.calls == 3)
+
+        db.session.add(Class(name="Untracked By Lists", code="FRAGCL01", teacher_id=teacher_id))
+        db.session.commit()
+        cache.render("lists", teacher_id, models, render)
+        print_test("Writes to other models don't invalidate", render.calls == 3)
+
+        set_id = QuestionSet.query.filter_by(name="Fragment Set").one().id
+        db.session.execute(
+            db.insert(Question),
+            [{"question": "Bulk", "answer": "B", "user_id": teacher_id, "question_set_id": set_id}],
+        )
+        bump_data_versions(db.session, [Question])
+        db.session.commit()
+        cache.render("lists", teacher_id, (QuestionSet, Question), render)
+        cache.render("lists", teacher_id, (QuestionSet, Question), render)
+        print_test("Fragments over several models are cached too", render.calls == 4)
+
+        before = data_versions((Question,), teacher_id)
+        with db.engine.begin() as connection:
+            connection.execute(
+                db.text(
+                    "INSERT INTO data_version (name, version) VALUES (:name, 1) "
+                    "ON CONFLICT(name) DO UPDATE SET version = version + 1"
+                ),
+                {"name": f"question:{teacher_id}"},
+            )
+        db.session.rollback()
+        print_test("Another process's bump is seen", data_versions((Question,), teacher_id) != before)
+        cache.render("lists", teacher_id, (QuestionSet, Question), render)
+        print_test("...and invalidates the fragment", render.calls == 5)
+
+
+def test_scoping(app, teacher_id):
+    print_section("Testing Per-User Versions")
+    cache = FragmentCache()
+    render = Renderer()
+    models = (Class, ClassMembership, QuestionSet, Question)
+    with app.app_context():
+        other = User(username="fragment_other", password="x", role="teacher")
+        student = User(username="fragment_student", password="x", role="student")
+        db.session.add_all([other, student])
+        db.session.commit()
+        other_id, student_id = other.id, student.id
+
+        def renders(user_id):
+            calls = render.calls
+            cache.render("lists", user_id, models, render)
+            return render.calls - calls
+
+        for user_id in (teacher_id, other_id, student_id):
+            renders(user_id)
+        db.session.add(QuestionSet(name="Other's Set", user_id=other_id))
+        db.session.commit()
+        print_test("Another teacher's new set doesn't invalidate", renders(teacher_id) == 0)
+        print_test("...but their own lists are re-rendered", renders(other_id) == 1)
+
+        class_obj = Class(name="Scoped Class", code="FRAGCL02", teacher_id=teacher_id)
+        db.session.add(class_obj)
+        db.session.flush()
+        db.session.add(ClassMembership(user_id=student_id, class_id=class_obj.id))
+        db.session.commit()
+        print_test("Joining a class invalidates the student", renders(student_id) == 1)
+        print_test("...and the teacher", renders(teacher_id) == 1)
+        print_test("...but nobody else", renders(other_id) == 0)
+        class_obj.name = "Scoped Class (renamed)"
+        db.session.commit()
+        print_test("Renaming a class invalidates its members", renders(student_id) == 1)
+
+        source = QuestionSet.query.filter_by(name="Fragment Set").one()
+        QuestionSet.clone(source, db.session.get(User, other_id), "Fragment Set (copy)")
+        db.session.commit()
+        renders(teacher_id)
+        renders(other_id)
+        db.session.add(Question(question="Q", answer="A", user_id=teacher_id, question_set_id=source.id))
+        db.session.commit()
+        print_test("A question invalidates the set's owner", renders(teacher_id) == 1)
+        print_test("...and owners of its clones", renders(other_id) == 1)
+        print_test("...but not unrelated users", renders(student_id) == 0)
+
+        db.session.execute(db.insert(QuestionSet), [{"name": "Bulk Set", "user_id": other_id}])
+        bump_data_versions(db.session, [QuestionSet])
+        db.session.commit()
+        print_test("Bulk writes without users invalidate everyone", renders(student_id) == 1)
+
+
+def test_limits(app, teacher_id):
+    print_section("Testing TTL and Size Limits")
+    with app.app_context():
+        cache = FragmentCache(max_entries=2, ttl=0)
+        render = Renderer()
+        cache.render("a", teacher_id, (Class,), render)
+        cache.render("a", teacher_id, (Class,), render)
+        print_test("Expired entries are re-rendered", render.calls == 2)
+
+        cache = FragmentCache(max_entries=2)
+        for name in ("a", "b", "c"):
+            cache.render(name, teacher_id, (Class,), render)
+        print_test("Cache holds at most max_entries", cache.stats()["size"] == 2)
+        calls = render.calls
+        cache.render("a", teacher_id, (Class,), render)
+        print_test("Least recently used entry was evicted", render.calls == calls + 1)
+        print_test("Hits and misses are counted", cache.stats()["misses"] == 4 and cache.stats()["hits"] == 0)
+
+
+def test_home_page(app, teacher_id):
+    print_section("Testing Home Page Lists")
+    fragment_cache.clear()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(teacher_id)
+
+    client.get("/")
+    hits = fragment_cache.stats()["hits"]
+    client.get("/")
+    print_test("Repeat visit reuses the lists fragment", fragment_cache.stats()["hits"] == hits + 1)
+
+    with app.app_context():
+        db.session.add(QuestionSet(name="Brand New Set", user_id=teacher_id))
+        db.session.commit()
+    body = client.get("/").get_data(as_text=True)
+    print_test("A new set shows up straight away", "Brand New Set" in body)
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'fragments.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            teacher = User(username="fragment_teacher", password="x", role="teacher")
+            db.session.add(teacher)
+            db.session.commit()
+            teacher_id = teacher.id
+
+        test_reuse_and_invalidation(app, teacher_id)
+        test_scoping(app, teacher_id)
+        test_limits(app, teacher_id)
+        test_home_page(app, teacher_id)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("FRAGMENT CACHE TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All fragment cache checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,169 @@
+"""
+EconSpark Simulator Graph Registry Tests
+Checks that the shipped graph definitions load, that malformed files are
+rejected at startup with the file named, and the definition endpoint
+"""
+
+import copy
+import json
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website.graphs import GraphDefinitionError, GraphRegistry, graph_registry, validate_definition
+from website.models import User
+
+VALID = {
+    "schema": "Schema",
+    "params": [{"name": "a", "value": 5, "min": 0, "max": 10}],
+    "layout": {
+        "TwoHorizontalGraphs": {
+            "sidebar": {"controls": [{"sliders": [{"param": "a"}]}]},
+        }
+    },
+}
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def invalid(definition):
+    try:
+        validate_definition(definition)
+    except GraphDefinitionError:
+        return True
+    return False
+
+
+def broken(change):
+    definition = copy.deepcopy(VALID)
+    change(definition)
+    return invalid(definition)
+
+
+def test_validation():
+    print_section("Testing Definition Validation")
+    print_test("A complete definition is accepted", not invalid(VALID))
+    print_test("A non-object is rejected", invalid([]))
+    print_test("A missing schema is rejected", broken(lambda d: d.pop("schema")))
+    print_test("A missing layout is rejected", broken(lambda d: d.pop("layout")))
+    print_test("Two layouts are rejected", broken(lambda d: d["layout"].update(Other={})))
+    print_test("A param without bounds is rejected", broken(lambda d: d["params"][0].pop("max")))
+    print_test("A repeated param is rejected", broken(lambda d: d["params"].append(dict(d["params"][0]))))
+    print_test("A value outside min..max is rejected", broken(lambda d: d["params"][0].update(value=11)))
+    print_test(
+        "A slider for an undeclared param is rejected",
+        broken(lambda d: d["layout"]["TwoHorizontalGraphs"]["sidebar"]["controls"][0]["sliders"].append({"param": "b"})),
+    )
+
+
+def write_graph(directory, filename, data):
+    with open(os.path.join(directory, filename), "w") as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+
+
+def load_error(files):
+    with tempfile.TemporaryDirectory() as directory:
+        for filename, data in files.items():
+            write_graph(directory, filename, data)
+        try:
+            GraphRegistry().load(directory)
+        except GraphDefinitionError as e:
+            return str(e)
+    return None
+
+
+def test_loading():
+    print_section("Testing Registry Loading")
+    print_test("The shipped definitions load", len(graph_registry.graphs) >= 4)
+    with tempfile.TemporaryDirectory() as directory:
+        write_graph(directory, "b-graph.json", {"title": "Beta", "order": 1, "definition": VALID})
+        write_graph(directory, "a-graph.json", {"title": "Alpha", "order": 2, "definition": VALID})
+        write_graph(directory, "notes.txt", "not a graph")
+        registry = GraphRegistry()
+        registry.load(directory)
+        print_test("Only .json files are loaded", set(registry.graphs) == {"a-graph", "b-graph"})
+        print_test("Graphs are ordered by their order field", [g.id for g in registry.ordered()] == ["b-graph", "a-graph"])
+        graph = registry.get("a-graph")
+        print_test("Definitions are kept minified", graph.payload == json.dumps(VALID, separators=(",", ":")).encode())
+        print_test("Equal definitions share an ETag", graph.etag == registry.get("b-graph").etag)
+
+    error = load_error({"bad.json": "{not json"})
+    print_test("Invalid JSON is rejected naming the file", error is not None and error.startswith("bad.json:"))
+    error = load_error({"untitled.json": {"definition": VALID}})
+    print_test("A missing title is rejected", error is not None and "title" in error)
+    error = load_error({"Upper.json": {"title": "x", "definition": VALID}})
+    print_test("Ids with capitals are rejected", error is not None and error.startswith("Upper.json:"))
+    error = load_error({"empty.json": {"title": "x", "definition": {}}})
+    print_test("Definition errors name the file", error is not None and error.startswith("empty.json: definition.schema"))
+
+
+def test_routes(app, user_id):
+    print_section("Testing /sim/graphs/<id>.json")
+    client = app.test_client()
+    graph = graph_registry.ordered()[0]
+    url = f"/sim/graphs/{graph.id}.json"
+    print_test("Login is required", client.get(url).status_code == 302)
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    print_test("A definition is served as JSON", response.status_code == 200 and response.get_json()["schema"])
+    print_test("Browsers must revalidate", response.cache_control.no_cache and response.cache_control.private)
+    print_test("Revalidation is a 304", client.get(url, headers={"If-None-Match": f'"{graph.etag}"'}).status_code == 304)
+    print_test("Unknown graphs get 404", client.get("/sim/graphs/nope.json").status_code == 404)
+
+    body = client.get("/sim/graphing_tool").get_data(as_text=True)
+    print_test("The page has a tab per graph", all(f"/sim/graphs/{g.id}.json" in body for g in graph_registry.ordered()))
+    print_test("The page no longer inlines definitions", graph.payload.decode() not in body)
+
+
+def run_all_tests():
+    test_validation()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'graphs.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            user = User(username="graphs_student", password="x", role="student")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        test_loading()
+        test_routes(app, user_id)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("GRAPH REGISTRY TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All graph registry checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,160 @@
+"""
+EconSpark Password Hashing Tests
+Checks hash method normalisation, rehash-on-login, and that a full or
+backed-up hashing pool answers 503 instead of tying up the request
+"""
+
+import os
+import sys
+import tempfile
+from werkzeug.security import generate_password_hash
+from website import create_app, db
+from website.hashing import HashingBusy, normalise_method, password_hasher
+from website.models import User
+
+FAST_METHOD = "pbkdf2:sha256:1000"
+# Slow enough that a tiny timeout always expires first
+SLOW_METHOD = "pbkdf2:sha256:3000000"
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def make_app(directory, name, **config):
+    return create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, name)}",
+            "RATELIMIT_ENABLED": False,
+            **config,
+        }
+    )
+
+
+def add_user(app, username, password, method):
+    with app.app_context():
+        user = User(username=username, password=generate_password_hash(password, method=method), role="student")
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def stored_hash(app, user_id):
+    with app.app_context():
+        return db.session.get(User, user_id).password
+
+
+def login(app, username, password):
+    return app.test_client().post("/auth/login", data={"username": username, "password": password})
+
+
+def test_normalise_method():
+    print_section("Testing Method Normalisation")
+    print_test("Bare pbkdf2 gets its defaults", normalise_method("pbkdf2").startswith("pbkdf2:sha256:"))
+    print_test("Explicit iterations are kept", normalise_method("pbkdf2:sha256:1000") == "pbkdf2:sha256:1000")
+    print_test("scrypt gets default parameters", normalise_method("scrypt") == "scrypt:32768:8:1")
+    print_test("Partial scrypt parameters are filled in", normalise_method("scrypt:16384") == "scrypt:16384:8:1")
+
+
+def test_rehash_on_login(directory):
+    print_section("Testing Rehash on Login")
+    app = make_app(directory, "inline.db", PASSWORD_HASH_WORKERS=0, PASSWORD_HASH_METHOD=FAST_METHOD)
+    current = add_user(app, "hash_current", "password123", FAST_METHOD)
+    outdated = add_user(app, "hash_outdated", "password123", "pbkdf2:sha256:2000")
+
+    with app.app_context():
+        print_test("Current hash needs no rehash", not password_hasher.needs_rehash(stored_hash(app, current)))
+        print_test("Outdated hash needs a rehash", password_hasher.needs_rehash(stored_hash(app, outdated)))
+
+    before = stored_hash(app, current)
+    response = login(app, "hash_current", "password123")
+    print_test("Login with a current hash succeeds", response.status_code == 302)
+    print_test("Current hash is left alone", stored_hash(app, current) == before)
+
+    before = stored_hash(app, outdated)
+    login(app, "hash_outdated", "wrong password")
+    print_test("A failed login doesn't rehash", stored_hash(app, outdated) == before)
+    response = login(app, "hash_outdated", "password123")
+    after = stored_hash(app, outdated)
+    print_test("Login with an outdated hash succeeds", response.status_code == 302)
+    print_test("Outdated hash is upgraded to the configured method", after.startswith(FAST_METHOD + "$"))
+    print_test("Upgraded hash still verifies", login(app, "hash_outdated", "password123").status_code == 302)
+
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_busy(directory):
+    print_section("Testing a Busy Hashing Pool")
+    app = make_app(
+        directory,
+        "pooled.db",
+        PASSWORD_HASH_WORKERS=1,
+        PASSWORD_HASH_QUEUE_LIMIT=1,
+        PASSWORD_HASH_RETRY_AFTER=7,
+        PASSWORD_HASH_METHOD=FAST_METHOD,
+    )
+    add_user(app, "hash_pooled", "password123", FAST_METHOD)
+    slow = add_user(app, "hash_slow", "password123", SLOW_METHOD)
+
+    response = login(app, "hash_pooled", "password123")
+    print_test("Login through the pool succeeds", response.status_code == 302)
+
+    password_hasher._slots.acquire()
+    try:
+        response = login(app, "hash_pooled", "password123")
+    finally:
+        password_hasher._slots.release()
+    print_test("A full queue answers 503", response.status_code == 503)
+    print_test("503 carries Retry-After", response.headers.get("Retry-After") == "7")
+
+    app.config["PASSWORD_HASH_TIMEOUT"] = 0.01
+    response = login(app, "hash_slow", "password123")
+    print_test("A hash that outlasts the timeout answers 503, not 500", response.status_code == 503)
+    print_test("Timed-out login doesn't rehash", stored_hash(app, slow).startswith(SLOW_METHOD + "$"))
+    with app.app_context():
+        try:
+            password_hasher.verify(stored_hash(app, slow), "password123")
+            raised = False
+        except HashingBusy:
+            raised = True
+    # The abandoned hash keeps its queue slot until the worker finishes it
+    print_test("The timed-out hash still counts against the queue", raised)
+
+    password_hasher._pool.shutdown(cancel_futures=True)
+    with app.app_context():
+        db.engine.dispose()
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        test_normalise_method()
+        test_rehash_on_login(directory)
+        test_busy(directory)
+
+    print_section("HASHING TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All hashing checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
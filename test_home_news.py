@@ -0,0 +1,166 @@
+"""
+EconSpark Home Page News Tests
+Checks that the home page renders without waiting on News API, that
+headlines are refreshed once in the background, and that failures back off
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+import requests
+from website import create_app, db
+from website import sn
+from website.models import User
+from website.views import HOME_ARTICLE_COUNT
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+class FakeNewsAPI:
+    """Stands in for News API: counts calls and can be held or made to fail"""
+
+    def __init__(self, count=HOME_ARTICLE_COUNT + 3):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+        self.articles = [
+            {"title": f"Headline {i}", "url": f"https://example.com/{i}", "source": {"name": "Wire"}}
+            for i in range(count)
+        ]
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        self.release.wait(timeout)
+        if self.fail:
+            raise requests.exceptions.ConnectionError("News API is down")
+        response = requests.models.Response()
+        response.status_code = 200
+        response._content = json.dumps({"status": "ok", "articles": self.articles}).encode()
+        return response
+
+
+def use_fake(fake):
+    sn.requests = types.SimpleNamespace(get=fake.get, exceptions=requests.exceptions)
+    sn.headline_cache.__init__()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def test_home_doesnt_wait(app, user_id):
+    print_section("Testing Home Page Without Cached Headlines")
+    fake = FakeNewsAPI()
+    fake.release.clear()
+    use_fake(fake)
+    client = client_for(app, user_id)
+
+    started = time.monotonic()
+    responses = [client.get("/") for _ in range(3)]
+    elapsed = time.monotonic() - started
+    body = responses[0].get_data(as_text=True)
+    print_test("Home page returns 200 while News API hangs", all(r.status_code == 200 for r in responses))
+    print_test("Home page doesn't wait for News API", elapsed < sn.HEADLINES_TIMEOUT)
+    print_test("Page loads the news panel afterwards", "/news_fragment" in body and "Loading news..." in body)
+    print_test("Only one background refresh is started", wait_for(lambda: fake.calls == 1) and fake.calls == 1)
+
+    fake.release.set()
+    print_test("Refresh completes", wait_for(lambda: sn.headline_cache.peek() is not None))
+    body = client.get("/").get_data(as_text=True)
+    print_test("Cached headlines are rendered inline", "Headline 0" in body and "/news_fragment" not in body)
+    print_test(
+        f"Only {HOME_ARTICLE_COUNT} headlines are shown",
+        f"Headline {HOME_ARTICLE_COUNT - 1}" in body and f"Headline {HOME_ARTICLE_COUNT}" not in body,
+    )
+    print_test("Fresh headlines aren't fetched again", fake.calls == 1)
+
+
+def test_news_fragment(app, user_id):
+    print_section("Testing News Fragment")
+    fake = FakeNewsAPI()
+    use_fake(fake)
+    client = client_for(app, user_id)
+
+    body = client.get("/news_fragment").get_data(as_text=True)
+    print_test("Fragment fetches headlines when none are cached", "Headline 0" in body and fake.calls == 1)
+    client.get("/news_fragment")
+    print_test("Fragment reuses fresh headlines", fake.calls == 1)
+
+    fake = FakeNewsAPI()
+    fake.fail = True
+    use_fake(fake)
+    response = client.get("/news_fragment")
+    print_test("News API failure still renders the fragment", response.status_code == 200)
+    print_test("Failure shows the empty message", "No news articles available" in response.get_data(as_text=True))
+    client.get("/news_fragment")
+    client.get("/")
+    print_test("Failures back off instead of retrying every request", fake.calls == 1)
+
+
+def run_all_tests():
+    original_requests = sn.requests
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'news.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            user = User(username="news_student", password="x", role="student")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        try:
+            test_home_doesnt_wait(app, user_id)
+            test_news_fragment(app, user_id)
+        finally:
+            sn.requests = original_requests
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("HOME NEWS TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All home news checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,143 @@
+"""
+EconSpark Identity Cache Tests
+Checks that logged-in users are loaded from the short-TTL identity cache
+and that role, password, username and account changes take effect at once
+"""
+
+import os
+import sys
+import tempfile
+import time
+from website import create_app, db
+from website.identity import IdentityCache, UserSnapshot, identity_cache
+from website.models import User
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def add_user(app, username, role="student"):
+    with app.app_context():
+        user = User(username=username, password="x", role=role)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def update_user(app, user_id, **values):
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        for name, value in values.items():
+            setattr(user, name, value)
+        db.session.commit()
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def can_create_class(client):
+    """The create-class form is only shown to teachers"""
+    return client.get("/classes/create_class").status_code == 200
+
+
+def test_cache(app):
+    print_section("Testing Cached Loads")
+    user_id = add_user(app, "identity_cached")
+    cache = IdentityCache(ttl=0.2)
+    with app.app_context():
+        first = cache.load(user_id)
+        second = cache.load(user_id)
+        print_test("Loaded identity is a snapshot", isinstance(first, UserSnapshot))
+        print_test("Snapshot carries id, username and role", (first.id, first.username, first.role) == (user_id, "identity_cached", "student"))
+        print_test("Second load is a cache hit", second is first and cache.stats()["hits"] == 1)
+        print_test("Unknown id loads as None", cache.load(999999) is None)
+
+        db.session.execute(db.update(User).where(User.id == user_id).values(role="teacher"))
+        db.session.commit()
+        print_test("Core-level writes are only seen after the TTL", cache.load(user_id).role == "student")
+        time.sleep(0.25)
+        print_test("Expired entries are re-read", cache.load(user_id).role == "teacher")
+
+        cache = IdentityCache(max_entries=1)
+        other_id = add_user(app, "identity_other")
+        cache.load(user_id)
+        cache.load(other_id)
+        print_test("Cache holds at most max_entries", cache.stats()["size"] == 1)
+
+
+def test_invalidation(app):
+    print_section("Testing Invalidation on Change")
+    user_id = add_user(app, "identity_student")
+    client = client_for(app, user_id)
+    identity_cache._entries.clear()
+
+    print_test("Student can't open the create-class form", not can_create_class(client))
+    print_test("Identity is now cached", user_id in identity_cache._entries)
+
+    update_user(app, user_id, role="teacher")
+    print_test("Promotion takes effect on the next request", can_create_class(client))
+    update_user(app, user_id, role="student")
+    print_test("Demotion takes effect on the next request", not can_create_class(client))
+
+    client.get("/classes/create_class")
+    update_user(app, user_id, username="identity_renamed")
+    print_test("Renaming drops the cached identity", user_id not in identity_cache._entries)
+    client.get("/classes/create_class")
+    update_user(app, user_id, password="changed")
+    print_test("A password change drops the cached identity", user_id not in identity_cache._entries)
+
+    client.get("/classes/create_class")
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+    print_test("Deleting the account drops the cached identity", user_id not in identity_cache._entries)
+    response = client.get("/classes/create_class")
+    print_test("A deleted account is sent to log in", response.status_code == 302 and "/auth/login" in response.headers["Location"])
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'identity.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+
+        test_cache(app)
+        test_invalidation(app)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("IDENTITY CACHE TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All identity cache checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,168 @@
+"""
+EconSpark Seeder and Load Test Tests
+Seeds a small synthetic population through the seed-data command and
+drives the load-test virtual users against it in-process
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+from sqlalchemy import func, select
+from website import create_app, db
+from website.models import (
+    User,
+    Class,
+    ClassMembership,
+    QuestionSet,
+    Question,
+    ChatMessage,
+    Assignment,
+    class_question_sets,
+)
+from website.seeding import SEED_PASSWORD
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import load_test  # noqa: E402
+
+SCALE = [
+    "--teachers", "2", "--students", "6", "--classes-per-teacher", "2",
+    "--students-per-class", "3", "--sets-per-teacher", "2", "--questions-per-set", "4",
+    "--sets-shared-per-class", "1", "--messages-per-class", "2", "--assignments-per-class", "1",
+]
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def count(target):
+    return db.session.execute(select(func.count()).select_from(target)).scalar()
+
+
+def test_seed_data(app):
+    print_section("Testing seed-data")
+    result = app.test_cli_runner().invoke(args=["seed-data", *SCALE])
+    print_test("Command exits cleanly", result.exit_code == 0)
+    with app.app_context():
+        expected = {
+            User: 8, Class: 4, ClassMembership: 12, QuestionSet: 4, Question: 16,
+            class_question_sets: 4, ChatMessage: 8, Assignment: 4,
+        }
+        for target, wanted in expected.items():
+            name = getattr(target, "__tablename__", getattr(target, "name", None))
+            print_test(f"{wanted} {name} rows", count(target) == wanted)
+        teacher_of = dict(db.session.execute(select(Class.id, Class.teacher_id)).all())
+        owner_of = dict(db.session.execute(select(QuestionSet.id, QuestionSet.user_id)).all())
+        print_test(
+            "Sets are only shared with their owner's classes",
+            all(teacher_of[c] == owner_of[s] for c, s in db.session.execute(select(class_question_sets)).all()),
+        )
+
+    result = app.test_cli_runner().invoke(args=["seed-data", *SCALE, "--seed", "1"])
+    print_test("Seeding again adds a second population", result.exit_code == 0)
+    with app.app_context():
+        print_test("Second run doesn't collide with the first", count(User) == 16)
+
+    response = app.test_client().post(
+        "/auth/login", data={"username": seeded_username(app), "password": SEED_PASSWORD}
+    )
+    print_test("Seeded accounts can sign in with SEED_PASSWORD", response.status_code == 302)
+
+
+class StoppingClient:
+    """Wraps a virtual user's client and stops the run after some requests"""
+
+    def __init__(self, client, stop, requests):
+        self.client = client
+        self.stop = stop
+        self.remaining = requests
+
+    def get(self, path):
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.stop.set()
+        return self.client.get(path)
+
+
+def seeded_username(app):
+    with app.app_context():
+        return db.session.execute(select(User.username).where(User.role == "student")).scalars().first()
+
+
+def test_virtual_users(app):
+    print_section("Testing Virtual Users")
+    with app.app_context():
+        users = load_test.sample_users(10, random.Random(0))
+    print_test("Sampled users are seeded accounts", all(user["username"].startswith("seed") for user in users))
+    print_test("Some users are teachers", any(user["role"] == "teacher" for user in users))
+    with app.app_context():
+        shared = set(db.session.execute(select(class_question_sets)).all())
+    print_test(
+        "Each user gets a class with a shared set",
+        all((user["class_id"], user["set_id"]) in shared for user in users),
+    )
+
+    results = []
+    stop = threading.Event()
+    client = StoppingClient(load_test.InProcessClient(app, users[-1]), stop, requests=30)
+    load_test.virtual_user(client, users[-1], load_test.STUDENT_MIX, stop, results, random.Random(0))
+    print_test("Virtual user records one result per request", len(results) == 30)
+    print_test("No request fails", all(status is not None and status < 500 for _, _, status in results))
+    print_test(
+        "Requests follow the route mix",
+        {name for name, _, _ in results} <= {name for name, _, _ in load_test.STUDENT_MIX},
+    )
+
+    summary = load_test.summarise(
+        [("a", 0.001, 200), ("a", 0.003, 200), ("a", 0.002, 500), ("b", 0.010, None)], seconds=2
+    )
+    print_test("Summary counts requests and throughput", summary["a"]["requests"] == 3 and summary["a"]["throughput"] == 1.5)
+    print_test("5xx and failed requests are errors", summary["a"]["errors"] == 1 and summary["b"]["errors"] == 1)
+    print_test("Percentiles are in milliseconds", abs(summary["a"]["p50_ms"] - 2.0) < 1e-9)
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'load.db')}",
+                "RATELIMIT_ENABLED": False,
+                "PASSWORD_HASH_WORKERS": 0,
+            }
+        )
+
+        test_seed_data(app)
+        test_virtual_users(app)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("LOAD TEST TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All load test checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,305 @@
+"""
+EconSpark Market Simulation Tests
+Checks round clearing for both mechanisms, seats and orders, the round
+history used by streams, the registry's caps and host lock, and the
+market API, event stream and trading page
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from website import create_app, db
+from website import simulator
+from website.market_sim import (
+    MAX_ROUNDS_PER_STEP,
+    Market,
+    MarketError,
+    MarketRegistry,
+    clear_double_auction,
+    clear_posted_price,
+    market_registry,
+)
+from website.models import User
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def raises(fn, *args, **kwargs):
+    try:
+        fn(*args, **kwargs)
+    except MarketError:
+        return True
+    return False
+
+
+def test_double_auction():
+    print_section("Testing Double-Auction Clearing")
+    bids = np.array([4.0, 10.0, 6.0, 8.0])
+    asks = np.array([9.0, 3.0, 7.0, 5.0])
+    price, buyers, sellers = clear_double_auction(bids, asks)
+    print_test("The two highest bids meet the two lowest asks", sorted(buyers) == [1, 3] and sorted(sellers) == [1, 3])
+    # Two units clear anywhere in [max(5, 6), min(8, 7)]
+    print_test("Price is the midpoint of the clearing range", price == 6.5)
+
+    price, buyers, _ = clear_double_auction(np.array([1.0, 2.0]), np.array([3.0, 4.0]))
+    print_test("No overlap means no trade", price is None and len(buyers) == 0)
+    price, buyers, sellers = clear_double_auction(np.array([5.0]), np.array([5.0]))
+    print_test("An equal bid and ask trade at that price", price == 5.0 and len(buyers) == len(sellers) == 1)
+
+    rng = np.random.default_rng(0)
+    bounded = True
+    for _ in range(200):
+        bids = rng.uniform(0, 100, rng.integers(1, 50))
+        asks = rng.uniform(0, 100, rng.integers(1, 50))
+        price, buyers, sellers = clear_double_auction(bids, asks)
+        if price is None:
+            continue
+        losers_bid = np.delete(bids, buyers)
+        losers_ask = np.delete(asks, sellers)
+        bounded &= bool(
+            (bids[buyers] >= price).all()
+            and (asks[sellers] <= price).all()
+            # Nobody left out wanted to trade at the price on both sides at once
+            and not ((losers_bid > price).any() and (losers_ask < price).any())
+            and len(buyers) == len(sellers)
+        )
+    print_test("Every trader is willing at the price and no trade is left on the table", bounded)
+
+
+def test_posted_price():
+    print_section("Testing Posted-Price Clearing")
+    bids = np.array([10.0, 9.0, 8.0, 1.0])
+    asks = np.array([1.0, 2.0])
+    price, buyers, sellers = clear_posted_price(bids, asks, 5.0, np.random.default_rng(0))
+    print_test("Trades at the posted price", price == 5.0)
+    print_test("Volume is the short side", len(buyers) == len(sellers) == 2)
+    print_test("Only willing buyers are served", set(buyers.tolist()) <= {0, 1, 2})
+
+    served = set()
+    for seed in range(20):
+        _, buyers, _ = clear_posted_price(bids, asks, 5.0, np.random.default_rng(seed))
+        served.update(buyers.tolist())
+    print_test("The long side is rationed at random", served == {0, 1, 2})
+
+    price, buyers, _ = clear_posted_price(bids, np.array([6.0]), 5.0, np.random.default_rng(0))
+    print_test("No willing sellers means no trade", price is None and len(buyers) == 0)
+
+
+def test_market():
+    print_section("Testing Markets")
+    print_test("Too many agents are rejected", raises(Market, 1, buyers=10**6))
+    print_test("An unknown mechanism is rejected", raises(Market, 1, mechanism="barter"))
+    print_test("A posted-price market needs a price", raises(Market, 1, mechanism="posted_price"))
+    print_test("Inverted ranges are rejected", raises(Market, 1, value_range=(50, 10)))
+
+    market = Market(1, buyers=3, sellers=2, seed=0)
+    seats = [market.join(user_id) for user_id in (10, 11, 12, 13, 14)]
+    print_test("Seats alternate to the side with fewer humans", [side for side, _ in seats[:4]] == ["buyer", "seller", "buyer", "seller"])
+    print_test("Joining again returns the same seat", market.join(10) == seats[0])
+    print_test("A full market refuses new players", raises(market.join, 15))
+    print_test("Orders need a seat", raises(market.submit, 99, 50.0))
+    print_test("Orders outside the price range are refused", raises(market.submit, 10, market.price_ceiling + 1))
+    print_test("NaN orders are refused", raises(market.submit, 10, float("nan")))
+    print_test("Steps are bounded", raises(market.step, 0) and raises(market.step, MAX_ROUNDS_PER_STEP + 1))
+
+    market.submit(10, market.price_ceiling)
+    summary = market.step()[0]
+    print_test("Humans without an order sit the round out", summary["bids"] == 1 and summary["asks"] == 0)
+    print_test("Orders last one round", market.state(10)["seat"]["pending_order"] is None)
+
+    market = Market(1, buyers=2000, sellers=2000, seed=1)
+    summaries = market.step(20)
+    print_test("Rounds are numbered", [s["round"] for s in summaries] == list(range(1, 21)))
+    print_test("Efficiency never exceeds 1", all(s["efficiency"] <= 1 + 1e-9 for s in summaries))
+    print_test("Bots never trade at a loss", (market.sides["buyer"]["profit"] >= 0).all() and (market.sides["seller"]["profit"] >= 0).all())
+    print_test("Rounds of 4000 agents clear in milliseconds", max(s["clear_ms"] for s in summaries) < 50)
+
+    posted = Market(1, buyers=100, sellers=100, mechanism="posted_price", posted_price=55, seed=2)
+    print_test("Posted-price rounds trade at the posted price", all(s["price"] in (55.0, None) for s in posted.step(5)))
+
+    # Values and costs are both uniform on [10, 100], so 55 is the competitive price
+    posted = Market(1, buyers=500, sellers=500, mechanism="posted_price", posted_price=55, seed=3)
+    summaries = posted.step(10)
+    print_test("Bots take the posted price by their reservation price", all(s["efficiency"] > 0.95 for s in summaries))
+    print_test(
+        "Bots at a posted price still never trade at a loss",
+        (posted.sides["buyer"]["profit"] >= 0).all() and (posted.sides["seller"]["profit"] >= 0).all(),
+    )
+
+
+def test_rounds_after():
+    print_section("Testing Round History")
+    market = Market(1, buyers=10, sellers=10, seed=0)
+    market.step(3)
+    print_test("Only later rounds are returned", [s["round"] for s in market.rounds_after(1)] == [2, 3])
+    print_test("Nothing new returns at once without a timeout", market.rounds_after(3) == [])
+
+    started = time.monotonic()
+    print_test("A timeout with no new round returns nothing", market.rounds_after(3, timeout=0.1) == [])
+    print_test("...after waiting", time.monotonic() - started >= 0.1)
+
+    threading.Timer(0.05, market.step).start()
+    started = time.monotonic()
+    summaries = market.rounds_after(3, timeout=5)
+    print_test("A new round wakes the waiter", [s["round"] for s in summaries] == [4])
+    print_test("...without waiting out the timeout", time.monotonic() - started < 1)
+
+
+def test_registry(directory):
+    print_section("Testing the Market Registry")
+    registry = MarketRegistry(max_markets=4, max_per_user=2)
+    first = registry.create(1, buyers=5, sellers=5)
+    registry.create(1, buyers=5, sellers=5)
+    print_test("A teacher's markets are capped", raises(registry.create, 1, buyers=5, sellers=5))
+    registry.create(2, buyers=5, sellers=5)
+    registry.create(3, buyers=5, sellers=5)
+    print_test("The registry is capped without evicting live games", raises(registry.create, 4) and registry.get(first.id) is first)
+    registry.close(first.id)
+    print_test("Closing frees the teacher's slot", registry.get(first.id) is None and registry.create(1, buyers=5, sellers=5))
+
+    registry.idle_seconds = 0
+    registry.create(5, buyers=5, sellers=5)
+    print_test("Idle markets are dropped", len(registry._markets) == 1)
+
+    path = os.path.join(directory, "markets.lock")
+    host, other = MarketRegistry(), MarketRegistry()
+    print_test("The first worker becomes the host", host.claim_host(path))
+    print_test("Another worker can't host", not other.claim_host(path))
+    print_test("The host keeps hosting", host.claim_host(path))
+    host._host_file.close()
+    print_test("A worker takes over once the host is gone", other.claim_host(path))
+    other._host_file.close()
+
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def test_routes(app, teacher_id, student_id):
+    print_section("Testing the Market API")
+    teacher = login(app.test_client(), teacher_id)
+    student = login(app.test_client(), student_id)
+
+    print_test("Students can't start markets", student.post("/sim/market", json={}).status_code == 403)
+    print_test("Non-numeric settings get 400", teacher.post("/sim/market", json={"buyers": "many"}).status_code == 400)
+    print_test("Oversized markets get 400", teacher.post("/sim/market", json={"buyers": 10**6}).status_code == 400)
+    response = teacher.post("/sim/market", json={"buyers": 50, "sellers": 50, "seed": 1})
+    print_test("Teachers can start markets", response.status_code == 201)
+    market_id = response.get_json()["id"]
+    url = f"/sim/market/{market_id}"
+
+    print_test("Unknown markets get 404", student.get("/sim/market/nope").status_code == 404)
+    print_test("Orders before joining get 400", student.post(f"{url}/order", json={"price": 50}).status_code == 400)
+    seat = student.post(f"{url}/join").get_json()["seat"]
+    print_test("Joining gives a seat", seat is not None and seat["side"] == "buyer")
+    print_test("Non-numeric orders get 400", student.post(f"{url}/order", json={"price": "lots"}).status_code == 400)
+    response = student.post(f"{url}/order", json={"price": 60})
+    print_test("Orders are recorded", response.get_json()["seat"]["pending_order"] == 60)
+    print_test("Students can't run rounds", student.post(f"{url}/step").status_code == 403)
+    print_test("Bad round counts get 400", teacher.post(f"{url}/step", json={"rounds": "x"}).status_code == 400)
+    rounds = teacher.post(f"{url}/step", json={"rounds": 2}).get_json()["rounds"]
+    print_test("The teacher runs rounds", [r["round"] for r in rounds] == [1, 2])
+
+    saved = simulator.STREAM_SECONDS
+    simulator.STREAM_SECONDS = 0.2
+    try:
+        response = student.get(f"{url}/stream", headers={"Last-Event-ID": "1"})
+        body = response.get_data(as_text=True)
+        response.close()
+    finally:
+        simulator.STREAM_SECONDS = saved
+    print_test("The stream is an event stream", response.mimetype == "text/event-stream")
+    print_test("The stream resumes after Last-Event-ID", "id: 2\nevent: round" in body and "id: 1\n" not in body)
+    print_test("The stream slot is given back", simulator._stream_slots._value == simulator.MAX_STREAMS)
+
+    saved = simulator._stream_slots
+    simulator._stream_slots = threading.BoundedSemaphore(1)
+    simulator._stream_slots.acquire()
+    try:
+        response = student.get(f"{url}/stream")
+    finally:
+        simulator._stream_slots = saved
+    print_test("Streams past the cap get 503", response.status_code == 503 and "Retry-After" in response.headers)
+
+    page = student.get(f"/sim/trading/{market_id}").get_data(as_text=True)
+    print_test("The trading page reads the stream", f"{url}/stream" in page and "EventSource" in page)
+    print_test("Students don't get teacher controls", 'id="closeButton"' not in page)
+    print_test("Teachers get teacher controls", 'id="closeButton"' in teacher.get(f"/sim/trading/{market_id}").get_data(as_text=True))
+    print_test("The lobby lets teachers start markets", 'id="createForm"' in teacher.get("/sim/trading").get_data(as_text=True))
+    print_test("Unknown games get 404", student.get("/sim/trading/nope").status_code == 404)
+
+    saved = simulator.market_registry
+    simulator.market_registry = MarketRegistry()
+    try:
+        response = student.get(url)
+    finally:
+        simulator.market_registry = saved
+    print_test("Workers that don't host markets answer 503", response.status_code == 503)
+
+    print_test("Students can't close markets", student.delete(url).status_code == 403)
+    print_test("The teacher closes the market", teacher.delete(url).status_code == 204)
+    print_test("A closed market is gone", student.get(url).status_code == 404)
+
+
+def run_all_tests():
+    test_double_auction()
+    test_posted_price()
+    test_market()
+    test_rounds_after()
+
+    with tempfile.TemporaryDirectory() as directory:
+        test_registry(directory)
+
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'market.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            teacher = User(username="market_teacher", password="x", role="teacher")
+            student = User(username="market_student", password="x", role="student")
+            db.session.add_all([teacher, student])
+            db.session.commit()
+            teacher_id, student_id = teacher.id, student.id
+
+        test_routes(app, teacher_id, student_id)
+        for market_id in list(market_registry._markets):
+            market_registry.close(market_id)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("MARKET TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All market checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,141 @@
+"""
+EconSpark Metrics Tests
+Checks who may read /metrics, the per-route request and SQL figures it
+reports, and that failed statements don't skew later query timings
+"""
+
+import os
+import sys
+import tempfile
+from sqlalchemy.exc import OperationalError
+from website import create_app, db
+from website.metrics import metrics
+from website.models import User
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def scrape(client, ip="127.0.0.1", headers=None):
+    return client.get("/metrics", environ_base={"REMOTE_ADDR": ip}, headers=headers or {})
+
+
+def test_access(app):
+    print_section("Testing /metrics Access")
+    client = app.test_client()
+    print_test("Localhost can scrape without a token", scrape(client).status_code == 200)
+    print_test("IPv6 localhost can scrape without a token", scrape(client, ip="::1").status_code == 200)
+    print_test("Remote scrapes are refused without a token", scrape(client, ip="203.0.113.9").status_code == 403)
+
+    app.config["METRICS_TOKEN"] = "s3cret"
+    try:
+        print_test("With a token set, a missing header gets 401", scrape(client).status_code == 401)
+        response = scrape(client, headers={"Authorization": "Bearer wrong"})
+        print_test("A wrong token gets 401", response.status_code == 401)
+        response = scrape(client, ip="203.0.113.9", headers={"Authorization": "Bearer s3cret"})
+        print_test("The right token works from anywhere", response.status_code == 200)
+    finally:
+        app.config["METRICS_TOKEN"] = None
+
+
+def test_request_metrics(app, user_id):
+    print_section("Testing Request Metrics")
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    client.get("/classes/my_classes")
+    client.get("/no/such/page")
+
+    body = scrape(app.test_client()).get_data(as_text=True)
+    print_test(
+        "Requests are counted per endpoint and status",
+        'econspark_requests_total{endpoint="classes.my_classes",method="GET",status="200"} 1' in body,
+    )
+    print_test(
+        "Unmatched URLs share one label",
+        'econspark_requests_total{endpoint="unmatched",method="GET",status="404"} 1' in body,
+    )
+    print_test(
+        "Latency histogram has a +Inf bucket",
+        'econspark_request_duration_seconds_bucket{endpoint="classes.my_classes",method="GET",le="+Inf"} 1' in body,
+    )
+    print_test("SQL statements are counted per endpoint", 'econspark_sql_queries_total{endpoint="classes.my_classes"}' in body)
+    print_test("Cache stats are exported", "econspark_identity_cache_hits_total" in body)
+
+
+def test_failed_statements(app):
+    print_section("Testing Failed Statements")
+    with app.app_context():
+        with db.engine.connect() as connection:
+            for _ in range(3):
+                try:
+                    connection.exec_driver_sql("SELECT * FROM no_such_table")
+                except OperationalError:
+                    pass
+            stack = connection.info.get("metrics_started")
+            print_test("Failed statements leave no start times behind", stack == [])
+
+            before = metrics.sql_queries._series.get(("background",), 0)
+            connection.exec_driver_sql("SELECT 1")
+            print_test(
+                "Later statements on the connection are still recorded",
+                metrics.sql_queries._series.get(("background",), 0) == before + 1,
+            )
+
+    with app.app_context():
+        try:
+            db.session.execute(db.text("SELECT * FROM no_such_table"))
+        except OperationalError:
+            db.session.rollback()
+        print_test("The session still works after a failed statement", User.query.count() >= 1)
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'metrics.db')}",
+                "RATELIMIT_ENABLED": False,
+                "METRICS_TOKEN": None,
+            }
+        )
+        with app.app_context():
+            user = User(username="metrics_teacher", password="x", role="teacher")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        test_access(app)
+        test_request_metrics(app, user_id)
+        test_failed_statements(app)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("METRICS TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All metrics checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,161 @@
+"""
+EconSpark User Provisioning Tests
+Runs the provision-users command on roster CSVs and checks the accounts,
+skipped rows, class enrollments and password hashes it produces
+"""
+
+import os
+import sys
+import tempfile
+from werkzeug.security import check_password_hash, generate_password_hash
+from website import create_app, db
+from website.fragments import data_versions
+from website.models import User, Class, ClassMembership
+
+FAST_METHOD = "pbkdf2:sha256:1000"
+
+ROSTER = """username,password,role,class_code
+alice,password-a,student,PROV01
+bobby,password-b,Teacher,
+carol,password-c,,prov01; PROV02
+dave,password-d,student,NOSUCH
+eve,short,student,PROV01
+ zz ,password-z,student,
+frank,password-f,admin,PROV01
+alice,password-x,student,PROV02
+taken,password-t,student,PROV01
+"""
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def write_roster(directory, name, text):
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def enrolled_codes(username):
+    return sorted(
+        code
+        for (code,) in db.session.query(Class.code)
+        .join(ClassMembership, ClassMembership.class_id == Class.id)
+        .join(User, User.id == ClassMembership.user_id)
+        .filter(User.username == username)
+    )
+
+
+def test_provisioning(app, directory):
+    print_section("Testing provision-users")
+    path = write_roster(directory, "roster.csv", ROSTER)
+    with app.app_context():
+        teacher_id = User.query.filter_by(username="prov_teacher").one().id
+        versions_before = data_versions((ClassMembership,), teacher_id)
+
+    result = app.test_cli_runner().invoke(
+        args=["provision-users", path, "--workers", "1", "--batch-size", "2"]
+    )
+    print_test("Command exits cleanly", result.exit_code == 0)
+    print_test(
+        "Summary counts created and skipped rows",
+        "Created 4 user(s), skipped 2, added 3 class enrollment(s)" in result.output,
+    )
+    for line in ("Line 6: skipped invalid row for 'eve'", "Line 7: skipped invalid row for 'zz'",
+                 "Line 8: skipped invalid row for 'frank'", "Unknown class code 'NOSUCH' for dave"):
+        print_test(f"Reports: {line}", line in result.stderr)
+
+    with app.app_context():
+        users = {user.username: user for user in User.query.all()}
+        print_test(
+            "Valid rows become accounts",
+            {"alice", "bobby", "carol", "dave"} <= set(users) and not {"eve", "zz", "frank"} & set(users),
+        )
+        print_test("Roles are read case-insensitively", users["bobby"].role == "teacher")
+        print_test("Missing role defaults to student", users["carol"].role == "student")
+        print_test(
+            "First row wins for a username repeated in the file",
+            check_password_hash(users["alice"].password, "password-a"),
+        )
+        print_test(
+            "Existing accounts are left alone",
+            check_password_hash(users["taken"].password, "original-password"),
+        )
+        print_test("Hashes use the configured method", users["dave"].password.startswith(FAST_METHOD + "$"))
+        print_test("alice is enrolled in PROV01", enrolled_codes("alice") == ["PROV01"])
+        print_test("Several codes separated by ';' are normalised", enrolled_codes("carol") == ["PROV01", "PROV02"])
+        print_test("Unknown codes enroll nobody", enrolled_codes("dave") == [])
+        print_test(
+            "Enrollments invalidate the teacher's cached fragments",
+            data_versions((ClassMembership,), teacher_id) != versions_before,
+        )
+
+    response = app.test_client().post("/auth/login", data={"username": "carol", "password": "password-c"})
+    print_test("A provisioned user can log in", response.status_code == 302)
+
+
+def test_no_enroll(app, directory):
+    print_section("Testing provision-users --no-enroll")
+    path = write_roster(directory, "no_enroll.csv", "username,password,class_code\ngrace,password-g,PROV01\n")
+    result = app.test_cli_runner().invoke(args=["provision-users", path, "--workers", "1", "--no-enroll"])
+    print_test("Command exits cleanly", result.exit_code == 0)
+    with app.app_context():
+        print_test("User is created", User.query.filter_by(username="grace").count() == 1)
+        print_test("No enrollment is made", enrolled_codes("grace") == [])
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'provision.db')}",
+                "RATELIMIT_ENABLED": False,
+                "PASSWORD_HASH_WORKERS": 0,
+                "PASSWORD_HASH_METHOD": FAST_METHOD,
+            }
+        )
+        with app.app_context():
+            teacher = User(username="prov_teacher", password="x", role="teacher")
+            db.session.add(teacher)
+            db.session.flush()
+            db.session.add_all([
+                Class(name="Provision 1", code="PROV01", teacher_id=teacher.id),
+                Class(name="Provision 2", code="PROV02", teacher_id=teacher.id),
+            ])
+            db.session.add(User(username="taken", password=generate_password_hash("original-password"), role="student"))
+            db.session.commit()
+
+        test_provisioning(app, directory)
+        test_no_enroll(app, directory)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("PROVISIONING TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All provisioning checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,166 @@
+"""
+EconSpark Query Budget Tests
+Runs the busiest pages against seeded data with the query guard on and fails
+on N+1 patterns or routes that exceed their declared query budget
+"""
+
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website.models import User, Class, ClassMembership, QuestionSet, Question
+from website.fragments import fragment_cache
+from website.querybudget import QueryBudgetExceeded, query_budget, query_guard
+
+CLASSES = 5
+STUDENTS_PER_CLASS = 6
+SETS_PER_CLASS = 3
+QUESTIONS_PER_SET = 10
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def seed():
+    """A teacher with several classes, each with students and shared sets"""
+    teacher = User(username="budget_teacher", password="x", role="teacher")
+    db.session.add(teacher)
+    db.session.flush()
+
+    students = [
+        User(username=f"budget_student_{i}", password="x", role="student")
+        for i in range(STUDENTS_PER_CLASS)
+    ]
+    db.session.add_all(students)
+    db.session.flush()
+
+    last_set = None
+    for c in range(CLASSES):
+        class_obj = Class(name=f"Budget Class {c}", code=f"BUDGET{c:02d}", teacher_id=teacher.id)
+        db.session.add(class_obj)
+        db.session.flush()
+        for student in students:
+            db.session.add(ClassMembership(user_id=student.id, class_id=class_obj.id))
+        for s in range(SETS_PER_CLASS):
+            question_set = QuestionSet(name=f"Budget Set {c}-{s}", user_id=teacher.id)
+            db.session.add(question_set)
+            db.session.flush()
+            for q in range(QUESTIONS_PER_SET):
+                db.session.add(
+                    Question(
+                        question=f"Question {q}",
+                        answer=f"Answer {q}",
+                        user_id=teacher.id,
+                        question_set_id=question_set.id,
+                    )
+                )
+            class_obj.question_sets.append(question_set)
+            last_set = question_set
+    db.session.commit()
+    return teacher.id, students[0].id, class_obj.id, last_set.id
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def check_route(client, name, url):
+    """Request a page with the query guard on and report its statement count"""
+    fragment_cache.clear()
+    try:
+        response = client.get(url)
+    except QueryBudgetExceeded as e:
+        print_test(f"{name} within query budget", False)
+        print(f"      {e}")
+        return
+    report = query_guard.last_report
+    print_test(f"{name} returns 200", response.status_code == 200)
+    print_test(
+        f"{name} within query budget ({report['count']}/{report['budget']})",
+        report["budget"] is not None and report["count"] <= report["budget"],
+    )
+    print_test(f"{name} has no repeated statements", not report["repeated"])
+    for shape, count in report["repeated"].items():
+        print(f"      {count}x {shape}")
+
+
+def test_detector(app, user_id):
+    """The guard itself flags a deliberate N+1 and enforces budgets"""
+    print_section("Testing Query Guard")
+    try:
+        client_for(app, user_id).get("/_n_plus_one")
+        raised = False
+    except QueryBudgetExceeded:
+        raised = True
+    print_test("Over-budget route raises QueryBudgetExceeded", raised)
+    print_test(
+        "Repeated statement shape is flagged",
+        any(count >= 5 for count in query_guard.last_report["repeated"].values()),
+    )
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'budget.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+
+        # Deliberately queries in a loop so the detector has something to find
+        @query_budget(3)
+        def n_plus_one():
+            for user in User.query.all():
+                Class.query.filter_by(teacher_id=user.id).all()
+            return "ok"
+
+        app.add_url_rule("/_n_plus_one", "n_plus_one", n_plus_one)
+
+        with app.app_context():
+            teacher_id, student_id, class_id, set_id = seed()
+
+        test_detector(app, student_id)
+
+        print_section("Testing Route Query Budgets")
+        teacher = client_for(app, teacher_id)
+        student = client_for(app, student_id)
+        check_route(teacher, "my_classes (teacher)", "/classes/my_classes")
+        check_route(student, "my_classes (student)", "/classes/my_classes")
+        check_route(teacher, "class_detail (teacher)", f"/classes/class/{class_id}")
+        check_route(student, "class_detail (student)", f"/classes/class/{class_id}")
+        check_route(student, "flashcards (student)", f"/tests/flashcards/{set_id}")
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("QUERY BUDGET TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All routes within budget.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
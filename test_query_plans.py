@@ -0,0 +1,188 @@
+"""
+EconSpark Query Plan Check
+Runs EXPLAIN QUERY PLAN over the app's hot queries and fails on full-table scans
+"""
+
+import re
+import sys
+from sqlalchemy import func, select, text
+from website import create_app, db
+from website.models import (
+    Assignment,
+    ChatMessage,
+    Class,
+    ClassMembership,
+    Question,
+    QuestionSet,
+    QuizAttempt,
+    User,
+    class_question_sets,
+)
+from website.migrations import MIGRATIONS, schema_version
+
+# Plan lines that scan something other than a whole table
+ALLOWED_SCANS = re.compile(r"INDEX|PRIMARY KEY|VIRTUAL TABLE|CONSTANT ROW")
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def query_plan(statement):
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement"""
+    sql = str(
+        statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    )
+    rows = db.session.execute(text("EXPLAIN QUERY PLAN " + sql)).all()
+    return [row[3] for row in rows]
+
+
+def check_plan(name, statement):
+    plan = query_plan(statement)
+    scans = [
+        line for line in plan
+        if line.startswith("SCAN ") and not ALLOWED_SCANS.search(line)
+    ]
+    print_test(name, not scans)
+    for line in plan:
+        print(f"      {line}")
+
+
+def test_schema_version():
+    """Migrations have brought the database up to date"""
+    print_section("Testing Schema Version")
+    latest = max(version for version, _, _ in MIGRATIONS)
+    print_test(f"Schema at latest version ({latest})", schema_version(db.engine) == latest)
+
+
+def test_class_queries():
+    """Class pages: my_classes, class_detail, chat, assignments, sharing"""
+    print_section("Testing Class Query Plans")
+    check_plan("Classes taught by a user", select(Class).where(Class.teacher_id == 1))
+    check_plan(
+        "Memberships of a user",
+        select(ClassMembership).where(ClassMembership.user_id == 1),
+    )
+    check_plan(
+        "Membership check for user and class",
+        select(ClassMembership).where(
+            ClassMembership.user_id == 1, ClassMembership.class_id == 1
+        ),
+    )
+    check_plan(
+        "Classes a student is enrolled in",
+        select(Class).join(ClassMembership).where(ClassMembership.user_id == 1),
+    )
+    check_plan(
+        "Students in a class",
+        select(User).join(ClassMembership).where(ClassMembership.class_id == 1),
+    )
+    check_plan(
+        "Chat history for a class",
+        select(ChatMessage)
+        .where(ChatMessage.class_id == 1)
+        .order_by(ChatMessage.timestamp.asc()),
+    )
+    check_plan(
+        "Assignments for a class",
+        select(Assignment).where(Assignment.class_id == 1).order_by(Assignment.due_date),
+    )
+    check_plan(
+        "Question sets shared with a class",
+        select(QuestionSet)
+        .join(class_question_sets)
+        .where(class_question_sets.c.class_id == 1),
+    )
+    check_plan(
+        "Classes a question set is shared with",
+        select(class_question_sets.c.class_id).where(
+            class_question_sets.c.question_set_id == 1
+        ),
+    )
+
+
+def test_question_queries():
+    """Question banks, flashcards, cloning and deck paging"""
+    print_section("Testing Question Query Plans")
+    check_plan(
+        "Question sets owned by a user",
+        select(QuestionSet).where(QuestionSet.user_id == 1),
+    )
+    check_plan(
+        "Questions in a set",
+        select(Question).where(Question.question_set_id == 1),
+    )
+    check_plan(
+        "Clones of a question set",
+        select(QuestionSet).where(QuestionSet.source_set_id == 1),
+    )
+    replaced = select(Question.source_question_id).where(
+        Question.question_set_id.in_([1, 2]),
+        Question.source_question_id.is_not(None),
+    )
+    check_plan(
+        "Effective questions of a cloned set",
+        select(Question)
+        .where(
+            Question.question_set_id.in_([1, 2]),
+            Question.is_removed.is_(False),
+            Question.id.not_in(replaced),
+        )
+        .order_by(func.coalesce(Question.source_question_id, Question.id)),
+    )
+
+
+def test_attempt_queries():
+    """Flashcard attempts feeding class analytics"""
+    print_section("Testing Attempt Query Plans")
+    check_plan(
+        "New attempts for a class's students and sets",
+        select(QuizAttempt.id, QuizAttempt.question_id, QuizAttempt.correct).where(
+            QuizAttempt.id > 0,
+            QuizAttempt.user_id.in_([1, 2, 3]),
+            QuizAttempt.question_set_id.in_([1, 2]),
+        ),
+    )
+    check_plan(
+        "Attempts by a user",
+        select(QuizAttempt).where(QuizAttempt.user_id == 1),
+    )
+    check_plan(
+        "Attempts on a question",
+        select(QuizAttempt).where(QuizAttempt.question_id == 1),
+    )
+
+
+def run_all_tests():
+    app = create_app()
+    with app.app_context():
+        test_schema_version()
+        test_class_queries()
+        test_question_queries()
+        test_attempt_queries()
+
+    print_section("QUERY PLAN CHECKS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("No full-table scans in hot queries.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
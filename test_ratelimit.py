@@ -0,0 +1,181 @@
+"""
+EconSpark Rate Limiting Tests
+Checks the token-bucket arithmetic, 429 responses for login and chat
+posting, the shared SQLite backend, and that the status endpoint reports
+counts without exposing bucket keys
+"""
+
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website.models import User, Class, ClassMembership, ChatMessage
+from website.ratelimit import SQLiteBackend, take
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def make_app(directory, name, **config):
+    return create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, name)}",
+            "PASSWORD_HASH_WORKERS": 0,
+            **config,
+        }
+    )
+
+
+def seed(app):
+    with app.app_context():
+        teacher = User(username="limit_teacher", password="x", role="teacher")
+        student = User(username="limit_student", password="x", role="student")
+        db.session.add_all([teacher, student])
+        db.session.flush()
+        class_obj = Class(name="Limit Class", code="LIMIT001", teacher_id=teacher.id)
+        db.session.add(class_obj)
+        db.session.flush()
+        db.session.add(ClassMembership(user_id=student.id, class_id=class_obj.id))
+        db.session.commit()
+        return {"teacher": teacher.id, "student": student.id, "class": class_obj.id}
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def login(client, username, ip="10.0.0.1"):
+    return client.post(
+        "/auth/login",
+        data={"username": username, "password": "wrong password"},
+        environ_base={"REMOTE_ADDR": ip},
+    )
+
+
+def test_take():
+    print_section("Testing Token Bucket Arithmetic")
+    print_test("A full bucket allows a request", take(5, 0, 5, 1, 0) == (True, 4, 0.0))
+    allowed, tokens, retry_after = take(0.5, 0, 5, 0.5, 0)
+    print_test("An empty bucket refuses", not allowed and tokens == 0.5)
+    print_test("Retry-After is the time to refill one token", retry_after == 1.0)
+    print_test("Tokens refill with time up to capacity", take(0, 0, 5, 1, 100) == (True, 4, 0.0))
+
+
+def test_login_limits(app):
+    print_section("Testing Login Limits")
+    client = app.test_client()
+    statuses = [login(client, "victim").status_code for _ in range(6)]
+    print_test("First 5 attempts for a username are answered", statuses[:5] == [200] * 5)
+    response = login(client, "victim")
+    print_test("6th attempt gets 429", response.status_code == 429)
+    print_test("429 carries Retry-After", int(response.headers.get("Retry-After", 0)) >= 1)
+    print_test("Username case doesn't dodge the limit", login(client, " VICTIM ").status_code == 429)
+    print_test("Another username is unaffected", login(client, "someone_else").status_code == 200)
+    print_test("Viewing the login form isn't limited", client.get("/auth/login").status_code == 200)
+
+    statuses = {login(client, f"user{i}", ip="10.0.0.2").status_code for i in range(60)}
+    print_test("60 attempts from one address are answered", statuses == {200})
+    print_test("61st attempt from that address gets 429", login(client, "user61", ip="10.0.0.2").status_code == 429)
+    print_test("Another address is unaffected", login(client, "user62", ip="10.0.0.3").status_code == 200)
+
+
+def test_chat_limits(app, ids):
+    print_section("Testing Chat Limits")
+    url = f"/classes/class/{ids['class']}/chat"
+    student = client_for(app, ids["student"])
+    statuses = [student.post(url, data={"message": f"hi {i}"}).status_code for i in range(6)]
+    print_test("First 5 messages are posted", statuses[:5] == [302] * 5)
+    print_test("6th message in the window gets 429", statuses[5] == 429)
+    with app.app_context():
+        print_test("Refused message isn't stored", ChatMessage.query.count() == 5)
+    print_test("Reading the chat isn't limited", student.get(url).status_code == 200)
+    print_test(
+        "The teacher has a bucket of their own",
+        client_for(app, ids["teacher"]).post(url, data={"message": "hello"}).status_code == 302,
+    )
+
+
+def test_status(app, ids):
+    print_section("Testing Limiter Status")
+    response = client_for(app, ids["teacher"]).get("/ratelimit/status")
+    status = response.get_json()
+    body = response.get_data(as_text=True)
+    print_test("Teacher gets limiter status", response.status_code == 200)
+    print_test("Status reports the backend", status["backend"] == app.config["RATELIMIT_BACKEND"])
+    print_test(
+        "Buckets are counted per limit",
+        status["limits"]["login-user"]["buckets"] >= 2 and status["limits"]["chat"]["buckets"] == 2,
+    )
+    print_test("Exhausted buckets are counted", status["limits"]["chat"]["exhausted"] == 1)
+    print_test(
+        "No usernames, addresses or user ids are exposed",
+        not any(leak in body for leak in ("victim", "10.0.0", "user:")),
+    )
+    response = client_for(app, ids["student"]).get("/ratelimit/status")
+    print_test("Students get 403", response.status_code == 403)
+
+
+def test_sqlite_backend(directory):
+    print_section("Testing the Shared SQLite Backend")
+    path = os.path.join(directory, "buckets.db")
+    worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+    results = [worker.consume("login-user:username:shared", 3, 0.01)[0] for worker in (worker_a, worker_b) * 2]
+    print_test("Workers draw from the same bucket", results == [True, True, True, False])
+    print_test(
+        "Summary counts the shared bucket once",
+        worker_b.summary() == {"login-user": {"buckets": 1, "exhausted": 1}},
+    )
+
+    app = make_app(directory, "sqlite.db", RATELIMIT_BACKEND="sqlite",
+                   RATELIMIT_SQLITE_PATH=os.path.join(directory, "app_buckets.db"))
+    client = app.test_client()
+    statuses = [login(client, "sqlite_user").status_code for _ in range(6)]
+    print_test("SQLite backend limits logins too", statuses == [200] * 5 + [429])
+    with app.app_context():
+        db.engine.dispose()
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        test_take()
+
+        app = make_app(directory, "ratelimit.db")
+        ids = seed(app)
+        test_login_limits(app)
+        test_chat_limits(app, ids)
+        test_status(app, ids)
+        with app.app_context():
+            db.engine.dispose()
+
+        test_sqlite_backend(directory)
+
+    print_section("RATE LIMIT TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All rate limit checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
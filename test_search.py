@@ -0,0 +1,196 @@
+"""
+EconSpark Search Tests
+Checks full-text search over question banks, including cloned sets that
+inherit, edit or remove questions from the set they were cloned from
+"""
+
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website.models import User, Class, ClassMembership, QuestionSet, Question
+from website.search import build_match_query, search_questions
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def seed():
+    """
+    A teacher's set shared with a class. One member clones it, edits one
+    question and removes another; a second student clones that clone and
+    is not in the class, so they only reach the teacher's questions through
+    their clone.
+    """
+    teacher = User(username="search_teacher", password="x", role="teacher")
+    member = User(username="search_member", password="x", role="student")
+    outsider = User(username="search_outsider", password="x", role="student")
+    db.session.add_all([teacher, member, outsider])
+    db.session.flush()
+
+    class_obj = Class(name="Search Class", code="SEARCH01", teacher_id=teacher.id)
+    source = QuestionSet(name="Micro Basics", user_id=teacher.id)
+    db.session.add_all([class_obj, source])
+    db.session.flush()
+    db.session.add(ClassMembership(user_id=member.id, class_id=class_obj.id))
+    class_obj.question_sets.append(source)
+    questions = {
+        key: Question(question=text, answer=answer, user_id=teacher.id, question_set_id=source.id)
+        for key, text, answer in (
+            ("elasticity", "What is price elasticity of demand?", "Responsiveness of quantity"),
+            ("opportunity", "Define opportunity cost", "The next best alternative"),
+            ("utility", "What is marginal utility?", "Extra satisfaction from one more unit"),
+        )
+    }
+    db.session.add_all(questions.values())
+    db.session.flush()
+
+    clone = QuestionSet.clone(source, member, "My Micro Basics")
+    db.session.flush()
+    questions["opportunity"].edit_in(clone, "Define sunk cost", "Cost already incurred")
+    questions["utility"].remove_from(clone)
+    db.session.flush()
+    grandchild = QuestionSet.clone(clone, outsider, "Borrowed Micro")
+    db.session.commit()
+    return {
+        "teacher": teacher.id,
+        "member": member.id,
+        "outsider": outsider.id,
+        "source": source.id,
+        "clone": clone.id,
+        "grandchild": grandchild.id,
+    }
+
+
+def hits(user_id, query):
+    """(set id, question text) pairs a user gets for a query"""
+    user = db.session.get(User, user_id)
+    return {
+        (result["set_id"], db.session.get(Question, result["question_id"]).question)
+        for result in search_questions(user, query)
+    }
+
+
+def test_match_query():
+    print_section("Testing Query Building")
+    print_test("Words are quoted with a trailing prefix", build_match_query("supply dem") == '"supply" "dem"*')
+    print_test("FTS operators are neutralised", build_match_query('demand OR "') == '"demand" "OR"*')
+    print_test("Empty input gives no query", build_match_query("  !! ") is None)
+
+
+def test_owner_and_shared(ids):
+    print_section("Testing Owned and Shared Sets")
+    results = hits(ids["teacher"], "elasticity")
+    print_test(
+        "Teacher finds their own question",
+        results == {(ids["source"], "What is price elasticity of demand?")},
+    )
+    results = hits(ids["member"], "elastic")
+    print_test(
+        "Member finds it in the shared set and in their clone",
+        {set_id for set_id, _ in results} == {ids["source"], ids["clone"]},
+    )
+    print_test("Operators in input don't raise", hits(ids["member"], 'cost AND OR "(') is not None)
+
+
+def test_clone_resolution(ids):
+    print_section("Testing Search Through Clones")
+    results = hits(ids["member"], "opportunity")
+    print_test(
+        "Replaced original is found only in the set that still shows it",
+        results == {(ids["source"], "Define opportunity cost")},
+    )
+    results = hits(ids["member"], "sunk")
+    print_test(
+        "Edited copy is found in the clone",
+        results == {(ids["clone"], "Define sunk cost")},
+    )
+    results = hits(ids["member"], "utility")
+    print_test(
+        "Removed question is not found in the clone",
+        results == {(ids["source"], "What is marginal utility?")},
+    )
+
+
+def test_grandchild(ids):
+    print_section("Testing Search Through a Clone of a Clone")
+    print_test(
+        "Inherited question is found through two levels",
+        hits(ids["outsider"], "elasticity")
+        == {(ids["grandchild"], "What is price elasticity of demand?")},
+    )
+    print_test(
+        "Parent clone's edit is inherited",
+        hits(ids["outsider"], "sunk") == {(ids["grandchild"], "Define sunk cost")},
+    )
+    print_test("Replaced original stays hidden", hits(ids["outsider"], "opportunity") == set())
+    print_test("Removed question stays hidden", hits(ids["outsider"], "utility") == set())
+
+    db.session.add(
+        Question(question="What is a Giffen good?", answer="Demand rises with price",
+                 user_id=ids["teacher"], question_set_id=ids["source"])
+    )
+    db.session.commit()
+    print_test(
+        "Questions added to the source after cloning aren't inherited",
+        hits(ids["member"], "giffen") == {(ids["source"], "What is a Giffen good?")}
+        and hits(ids["outsider"], "giffen") == set(),
+    )
+
+
+def test_search_page(app, ids):
+    print_section("Testing Search Page")
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(ids["outsider"])
+    body = client.get("/tests/search?q=elasticity").get_data(as_text=True)
+    print_test("Results link to the clone", f"/tests/flashcards/{ids['grandchild']}" in body)
+    print_test("Matches are highlighted", "<mark>elasticity</mark>" in body)
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'search.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            ids = seed()
+            test_match_query()
+            test_owner_and_shared(ids)
+            test_clone_resolution(ids)
+            test_grandchild(ids)
+        test_search_page(app, ids)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("SEARCH TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All search checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
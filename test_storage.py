@@ -0,0 +1,147 @@
+"""
+EconSpark Storage Profile Tests
+Checks the SQLite connection pragmas for each storage profile and that the
+optional read-only engine opens the same database as the primary one and
+only serves reads for GET/HEAD requests that haven't written
+"""
+
+import os
+import sys
+import tempfile
+from sqlalchemy.exc import OperationalError
+from website import create_app, db
+from website.models import User
+from website.storage import READ_BIND, reader_url
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def make_app(uri, **config):
+    return create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": uri, "RATELIMIT_ENABLED": False, **config})
+
+
+def pragma(engine, name):
+    with engine.connect() as connection:
+        return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_reader_url(directory):
+    print_section("Testing Reader URL")
+    app = make_app(f"sqlite:///{os.path.join(directory, 'url.db')}")
+    absolute = os.path.join(directory, "school.db")
+
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{absolute}"
+    print_test("Absolute path is used as is", reader_url(app) == f"sqlite:///file:{absolute}?mode=ro&uri=true")
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///./school.db"
+    print_test(
+        "Relative path resolves against the instance folder",
+        reader_url(app) == f"sqlite:///file:{os.path.join(app.instance_path, 'school.db')}?mode=ro&uri=true",
+    )
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///file:{absolute}?uri=true"
+    print_test("URI-style paths are unwrapped", reader_url(app) == f"sqlite:///file:{absolute}?mode=ro&uri=true")
+    for uri in ("sqlite://", "sqlite:///:memory:", "postgresql://localhost/econspark"):
+        app.config["SQLALCHEMY_DATABASE_URI"] = uri
+        try:
+            reader_url(app)
+            raised = False
+        except ValueError:
+            raised = True
+        print_test(f"{uri} has no read-only URL", raised)
+
+
+def test_profiles(directory):
+    print_section("Testing Storage Profiles")
+    app = make_app(f"sqlite:///{os.path.join(directory, 'wal.db')}")
+    with app.app_context():
+        print_test("wal profile uses WAL", pragma(db.engine, "journal_mode") == "wal")
+        print_test("wal profile sets a busy timeout", pragma(db.engine, "busy_timeout") == 5000)
+        print_test("wal profile uses synchronous=NORMAL", pragma(db.engine, "synchronous") == 1)
+        print_test("No reader engine by default", READ_BIND not in db.engines)
+        db.engine.dispose()
+
+    app = make_app(f"sqlite:///{os.path.join(directory, 'legacy.db')}", STORAGE_PROFILE="legacy")
+    with app.app_context():
+        print_test("legacy profile keeps the rollback journal", pragma(db.engine, "journal_mode") == "delete")
+        db.engine.dispose()
+
+    try:
+        make_app(f"sqlite:///{os.path.join(directory, 'bad.db')}", STORAGE_PROFILE="turbo")
+        raised = False
+    except ValueError:
+        raised = True
+    print_test("Unknown profile is rejected", raised)
+
+
+def test_read_replica(directory):
+    print_section("Testing the Read-Only Engine")
+    path = os.path.join(directory, "replica.db")
+    app = make_app(f"sqlite:///{path}", STORAGE_READ_REPLICA=True)
+    with app.app_context():
+        reader = db.engines[READ_BIND]
+        print_test("Reader opens the configured database", reader.url.database == f"file:{path}")
+        print_test("Reader connections are query-only", pragma(reader, "query_only") == 1)
+        try:
+            with reader.begin() as connection:
+                connection.exec_driver_sql("DELETE FROM user")
+            raised = False
+        except OperationalError:
+            raised = True
+        print_test("Reader refuses writes", raised)
+
+        db.session.add(User(username="replica_user", password="x", role="student"))
+        db.session.commit()
+        with reader.connect() as connection:
+            count = connection.exec_driver_sql("SELECT count(*) FROM user WHERE username = 'replica_user'").scalar()
+        print_test("Reader sees committed writes", count == 1)
+
+    with app.test_request_context(method="GET"):
+        print_test("GET reads use the reader", db.session.get_bind() is db.engines[READ_BIND])
+        db.session.add(User(username="replica_writer", password="x", role="student"))
+        db.session.flush()
+        print_test("Reads after a flush use the primary", db.session.get_bind() is db.engine)
+        print_test(
+            "The request sees its own write",
+            User.query.filter_by(username="replica_writer").count() == 1,
+        )
+        db.session.rollback()
+    with app.test_request_context(method="POST"):
+        print_test("POST reads use the primary", db.session.get_bind() is db.engine)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def run_all_tests():
+    with tempfile.TemporaryDirectory() as directory:
+        test_reader_url(directory)
+        test_profiles(directory)
+        test_read_replica(directory)
+
+    print_section("STORAGE TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All storage checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
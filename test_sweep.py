@@ -0,0 +1,227 @@
+"""
+EconSpark Parameter Sweep Tests
+Checks sweep parsing and its size limits, that a broadcast sweep matches
+point-by-point evaluation, the result cache, and the sweep endpoint
+"""
+
+import json
+import os
+import sys
+import tempfile
+from website import create_app, db
+from website import simulator
+from website.economics import (
+    MAX_AXIS_STEPS,
+    MAX_SWEEP_VALUES,
+    MODELS,
+    Parameter,
+    model,
+    SweepCache,
+    evaluate,
+    parse_sweep,
+    sweep,
+    sweep_cache,
+    sweep_key,
+)
+from website.models import User
+
+failures = []
+
+
+def print_section(title):
+    """Print a section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60 + "\n")
+
+
+def print_test(test_name, passed):
+    """Print test result"""
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {test_name}")
+    if not passed:
+        failures.append(test_name)
+
+
+def rejected(values, name="market"):
+    try:
+        parse_sweep(name, values)
+    except ValueError:
+        return True
+    return False
+
+
+def test_parsing():
+    print_section("Testing Sweep Parsing")
+    axes, fixed, outcomes = parse_sweep("market", {"demand_intercept": "8:12:5", "tax": "0,1,2"})
+    print_test("Ranges and lists become axes in parameter order", [name for name, _ in axes] == ["demand_intercept", "tax"])
+    print_test("Ranges include both ends", axes[0][1].tolist() == [8, 9, 10, 11, 12])
+    print_test("Other parameters are held at their defaults", fixed == {"demand_slope": 1, "supply_intercept": 2, "supply_slope": 1})
+    print_test("All outcomes are returned by default", "deadweight_loss" in outcomes)
+    _, _, outcomes = parse_sweep("market", {"tax": "0:2:3", "outcomes": "quantity,tax_revenue"})
+    print_test("outcomes narrows the result", outcomes == ["quantity", "tax_revenue"])
+
+    print_test("Unknown parameters are rejected", rejected({"bogus": "1"}))
+    print_test("Unknown outcomes are rejected", rejected({"outcomes": "happiness"}))
+    print_test("Malformed ranges are rejected", rejected({"tax": "0:1"}))
+    print_test("Out-of-range values are rejected", rejected({"tax": "-1:2:3"}))
+    print_test("NaN is rejected", rejected({"tax": "nan"}))
+    print_test("A single-step range is rejected", rejected({"tax": "0:1:1"}))
+    print_test(f"More than {MAX_AXIS_STEPS} steps is rejected", rejected({"tax": f"0:1:{MAX_AXIS_STEPS + 1}"}))
+    print_test(f"{MAX_AXIS_STEPS} steps is allowed", not rejected({"tax": f"0:1:{MAX_AXIS_STEPS}", "outcomes": "quantity"}))
+
+    steps = 1001
+    print_test(
+        f"Grids over {MAX_SWEEP_VALUES} values are rejected",
+        steps * steps > MAX_SWEEP_VALUES
+        and rejected({"tax": f"0:1:{steps}", "demand_intercept": f"5:10:{steps}", "outcomes": "quantity"}),
+    )
+    # 10000**5 cells doesn't fit in int64, so np.prod would wrap
+    huge = {name: f"1:2:{MAX_AXIS_STEPS}" for name in ("demand_intercept", "demand_slope", "supply_intercept", "supply_slope", "tax")}
+    print_test("Grids whose size overflows int64 are rejected", rejected(huge))
+
+
+def test_results():
+    print_section("Testing Sweep Results")
+    axes, fixed, outcomes = parse_sweep(
+        "market", {"demand_intercept": "8:12:3", "tax": "0,2", "outcomes": "quantity,consumer_price"}
+    )
+    result = sweep("market", axes, fixed, outcomes)
+    key = sweep_key("market", axes, fixed, outcomes)
+    print_test("Shape follows the axes", result["shape"] == [3, 2])
+    matches = True
+    for i, intercept in enumerate([8, 10, 12]):
+        for j, tax in enumerate([0, 2]):
+            point = evaluate("market", {"demand_intercept": intercept, "tax": tax})["outcomes"]
+            for outcome in outcomes:
+                if abs(result["outcomes"][outcome]["values"][i * 2 + j] - point[outcome]) > 1e-6:
+                    matches = False
+    print_test("Broadcast sweep matches point-by-point evaluation", matches)
+    print_test("Min and max are reported", result["outcomes"]["quantity"]["min"] == 2 and result["outcomes"]["quantity"]["max"] == 5)
+
+    axes, fixed, outcomes = parse_sweep("ppf", {"x": "0:100:3", "outcomes": "opportunity_cost"})
+    values = sweep("ppf", axes, fixed, outcomes)["outcomes"]["opportunity_cost"]
+    print_test("Infinite values are null and left out of min/max", values["values"][-1] is None and abs(values["max"] - 3 ** -0.5) < 1e-6)
+
+    again = parse_sweep("market", {"tax": "0,2", "demand_intercept": "8:12:3", "outcomes": "quantity,consumer_price"})
+    print_test("Equal sweeps share a key", sweep_key("market", *again) == key)
+    other = parse_sweep("market", {"tax": "0,3", "demand_intercept": "8:12:3", "outcomes": "quantity,consumer_price"})
+    print_test("Different sweeps get different keys", sweep_key("market", *again) != sweep_key("market", *other))
+
+
+def test_lazy_outcomes():
+    print_section("Testing Lazy Outcomes")
+    computed = []
+
+    @model("probe", "Records which outcomes are computed", [Parameter("x", "x", 1, 0, 10)])
+    def probe(x):
+        def outcome(name):
+            def compute():
+                computed.append(name)
+                return x * 1.0
+            return compute
+        return {"cheap": outcome("cheap"), "costly": outcome("costly")}
+
+    try:
+        axes, fixed, outcomes = parse_sweep("probe", {"x": "0:10:11", "outcomes": "cheap"})
+        sweep("probe", axes, fixed, outcomes)
+        print_test("Only requested outcomes are computed", computed == ["cheap"])
+    finally:
+        del MODELS["probe"]
+
+
+def test_cache():
+    print_section("Testing the Sweep Cache")
+    cache = SweepCache(max_bytes=30)
+    calls = []
+
+    def compute(value):
+        def run():
+            calls.append(value)
+            return {"value": value}
+        return run
+
+    first = cache.get("a", compute("a"))
+    print_test("A miss computes and serializes", json.loads(first) == {"value": "a"} and calls == ["a"])
+    print_test("A hit returns the same bytes", cache.get("a", compute("a")) is first and calls == ["a"])
+    cache.get("b", compute("b"))
+    cache.get("a", compute("a"))
+    cache.get("c", compute("c"))
+    print_test("The least recently used entry is evicted", cache.stats()["size"] == 2 and calls == ["a", "b", "c"])
+    cache.get("b", compute("b"))
+    print_test("An evicted entry is recomputed", calls[-1] == "b")
+    stats = cache.stats()
+    print_test("Hits and misses are counted", stats["hits"] == 2 and stats["misses"] == 4)
+
+
+def test_route(app, user_id):
+    print_section("Testing /sim/api/models/<name>/sweep")
+    sweep_cache.clear()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+
+    url = "/sim/api/models/market/sweep?tax=0:2:3&outcomes=quantity"
+    response = client.get(url)
+    print_test("Sweep returns 200", response.status_code == 200)
+    print_test("Sweep values are correct", response.get_json()["outcomes"]["quantity"]["values"] == [4, 3.5, 3])
+    print_test("Results may be cached privately", response.cache_control.private and response.cache_control.max_age == 3600)
+    etag, _ = response.get_etag()
+    print_test("ETag is the sweep key", etag is not None and len(etag) == 32)
+    print_test("Repeat requests revalidate to 304", client.get(url, headers={"If-None-Match": f'"{etag}"'}).status_code == 304)
+    client.get(url)
+    print_test("Repeat requests hit the cache", sweep_cache.stats()["hits"] >= 1)
+
+    print_test("Unknown models get 404", client.get("/sim/api/models/oligopoly/sweep").status_code == 404)
+    response = client.get(f"/sim/api/models/market/sweep?tax=0:1:{MAX_AXIS_STEPS + 1}")
+    print_test("Oversized sweeps get 400 with a message", response.status_code == 400 and "steps" in response.get_json()["error"])
+
+    def failing(*args):
+        raise MemoryError()
+
+    saved = simulator.sweep
+    simulator.sweep = failing
+    try:
+        response = client.get("/sim/api/models/market/sweep?tax=0:2:7&outcomes=quantity")
+    finally:
+        simulator.sweep = saved
+    print_test("Failed computations get a JSON 400", response.status_code == 400 and "error" in response.get_json())
+
+
+def run_all_tests():
+    test_parsing()
+    test_results()
+    test_lazy_outcomes()
+    test_cache()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'sweep.db')}",
+                "RATELIMIT_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            user = User(username="sweep_student", password="x", role="student")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        test_route(app, user_id)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print_section("SWEEP TESTS COMPLETE")
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for name in failures:
+            print(f"  - {name}")
+        return 1
+    print("All sweep checks passed.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
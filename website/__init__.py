@@ -3,16 +3,48 @@ from flask_sqlalchemy import SQLAlchemy
 from os import path
 from flask_login import LoginManager
 import os
+from .storage import RoutingSession, configure_storage, init_storage
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 DB_NAME = "database.db"
 # Initialize the Flask application
-def create_app():
+def create_app(config=None):
     app_root = "."
     app = Flask(__name__)
     app.config["SECRET_KEY"] = "keen"
     app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{app_root}/{DB_NAME}"
+    # Overrides, e.g. TESTING and a separate database for test scripts
+    if config:
+        app.config.update(config)
+    configure_storage(app)
     db.init_app(app)
+    init_storage(app, db)
+
+    from .hashing import password_hasher
+
+    password_hasher.init_app(app)
+
+    from .ratelimit import limiter
+
+    limiter.init_app(app)
+
+    from .metrics import metrics
+
+    metrics.init_app(app)
+
+    from .querybudget import query_guard
+
+    query_guard.init_app(app)
+
+    from .assets import asset_pipeline
+
+    asset_pipeline.init_app(app)
+
+    # Registered after metrics so its after_request hook runs first and
+    # metrics see the final status (e.g. 304)
+    from .compression import compression
+
+    compression.init_app(app)
 
     from .views import views
     from .auth import auth
@@ -21,6 +53,7 @@ def create_app():
     from .simulator import sim
     from .class_info import cls
     from .classes import classes
+    from .export import export
 # Register blueprints
     app.register_blueprint(sim, url_prefix="/sim")
     app.register_blueprint(cls, url_prefix="/cls")
@@ -29,18 +62,31 @@ def create_app():
     app.register_blueprint(tests, url_prefix="/tests")
     app.register_blueprint(sn, url_prefix="/sn")
     app.register_blueprint(classes, url_prefix="/classes")
+    app.register_blueprint(export, url_prefix="/export")
+
+    from .commands import migrate, provision_users, seed_data, vendor_assets
+
+    app.cli.add_command(provision_users)
+    app.cli.add_command(migrate)
+    app.cli.add_command(seed_data)
+    app.cli.add_command(vendor_assets)
 
-    from .models import User
+    from .identity import identity_cache
 
     create_database(app)
+
+    from .dedupe import duplicate_index
+
+    duplicate_index.init_app(app)
 # Setup login manager
     login_manager = LoginManager()
     login_manager.login_view = "auth.login"
     login_manager.init_app(app)
 
+    # Served from a short-TTL snapshot cache instead of a query per request
     @login_manager.user_loader
     def load_user(id):
-        return User.query.get(int(id))
+        return identity_cache.load(int(id))
 
     return app
 
@@ -49,4 +95,14 @@ def create_database(app):
     if not path.exists("website/" + DB_NAME):
         with app.app_context():
             db.create_all()
+    # Bring existing databases up to the current schema
+    from .migrations import upgrade
+
+    with app.app_context():
+        upgrade(db.engine)
+    # Full-text search index over questions (idempotent)
+    from .search import create_search_index
+
+    with app.app_context():
+        create_search_index()
 
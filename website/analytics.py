@@ -0,0 +1,180 @@
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from .models import ClassMembership, Question, QuizAttempt, User, class_question_sets
+from . import db
+
+# Bins for the class accuracy distribution (0-10%, 10-20%, ... 90-100%)
+ACCURACY_BINS = np.linspace(0.0, 1.0, 11)
+
+_AGGREGATE_COLUMNS = ["attempts", "correct", "latency_total", "latency_samples"]
+
+
+class ClassAnalyticsCache:
+    """
+    Running per-class attempt totals.
+
+    Totals are kept per (student, question) pair. Each refresh only reads
+    attempts newer than the last one seen and folds them in, so the attempt
+    table is never rescanned. A change to the class roster or to the shared
+    question sets resets the totals for that class.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def clear(self, class_id=None):
+        with self._lock:
+            if class_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(class_id, None)
+
+    def totals(self, class_id):
+        """Return up-to-date totals for a class as a DataFrame"""
+        student_ids = tuple(
+            db.session.execute(
+                select(ClassMembership.user_id)
+                .where(ClassMembership.class_id == class_id)
+                .order_by(ClassMembership.user_id)
+            ).scalars()
+        )
+        set_ids = tuple(
+            db.session.execute(
+                select(class_question_sets.c.question_set_id)
+                .where(class_question_sets.c.class_id == class_id)
+                .order_by(class_question_sets.c.question_set_id)
+            ).scalars()
+        )
+        signature = (student_ids, set_ids)
+
+        with self._lock:
+            entry = self._entries.get(class_id)
+            if entry is None or entry["signature"] != signature:
+                entry = {
+                    "signature": signature,
+                    "last_attempt_id": 0,
+                    "totals": _empty_totals(),
+                }
+
+            new_rows = _load_attempts(student_ids, set_ids, entry["last_attempt_id"])
+            if not new_rows.empty:
+                entry["last_attempt_id"] = int(new_rows["id"].max())
+                entry["totals"] = _merge_totals(entry["totals"], new_rows)
+
+            self._entries[class_id] = entry
+            return entry["totals"]
+
+
+def _empty_totals():
+    index = pd.MultiIndex.from_arrays([[], []], names=["user_id", "question_id"])
+    return pd.DataFrame(
+        {column: pd.Series(dtype="int64") for column in _AGGREGATE_COLUMNS},
+        index=index,
+    )
+
+
+def _load_attempts(student_ids, set_ids, after_id):
+    if not student_ids or not set_ids:
+        return pd.DataFrame(columns=["id", "user_id", "question_id", "correct", "latency_ms"])
+    rows = db.session.execute(
+        select(
+            QuizAttempt.id,
+            QuizAttempt.user_id,
+            QuizAttempt.question_id,
+            QuizAttempt.correct,
+            QuizAttempt.latency_ms,
+        ).where(
+            QuizAttempt.id > after_id,
+            QuizAttempt.user_id.in_(student_ids),
+            QuizAttempt.question_set_id.in_(set_ids),
+        )
+    ).all()
+    return pd.DataFrame.from_records(
+        rows, columns=["id", "user_id", "question_id", "correct", "latency_ms"]
+    )
+
+
+def _merge_totals(totals, attempts):
+    attempts = attempts.assign(
+        attempts=1,
+        correct=attempts["correct"].astype("int64"),
+        latency_total=attempts["latency_ms"].fillna(0).astype("int64"),
+        latency_samples=attempts["latency_ms"].notna().astype("int64"),
+    )
+    increment = attempts.groupby(["user_id", "question_id"])[_AGGREGATE_COLUMNS].sum()
+    if totals.empty:
+        return increment
+    return totals.add(increment, fill_value=0).astype("int64")
+
+
+def summarise(totals):
+    """
+    Derive the teacher-facing statistics from per (student, question) totals.
+
+    Returns:
+        Dictionary with per-question difficulty, per-student accuracy and a
+        histogram of student accuracy across the class
+    """
+    if totals.empty:
+        return {"questions": [], "students": [], "distribution": [], "attempts": 0}
+
+    by_question = totals.groupby(level="question_id").sum()
+    by_question["difficulty"] = 1.0 - by_question["correct"] / by_question["attempts"]
+    by_question["avg_latency_ms"] = (
+        by_question["latency_total"] / by_question["latency_samples"].replace(0, np.nan)
+    ).fillna(0.0)
+    by_question = by_question.sort_values("difficulty", ascending=False)
+
+    by_student = totals.groupby(level="user_id").sum()
+    by_student["accuracy"] = by_student["correct"] / by_student["attempts"]
+    by_student = by_student.sort_values("accuracy")
+
+    counts, _ = np.histogram(by_student["accuracy"].to_numpy(), bins=ACCURACY_BINS)
+
+    question_text = dict(
+        db.session.execute(
+            select(Question.id, Question.question).where(
+                Question.id.in_(by_question.index.tolist())
+            )
+        ).all()
+    )
+    usernames = dict(
+        db.session.execute(
+            select(User.id, User.username).where(User.id.in_(by_student.index.tolist()))
+        ).all()
+    )
+
+    return {
+        "questions": [
+            {
+                "question": question_text.get(question_id, ""),
+                "attempts": int(row.attempts),
+                "difficulty": float(row.difficulty),
+                "avg_latency_ms": float(row.avg_latency_ms),
+            }
+            for question_id, row in by_question.iterrows()
+        ],
+        "students": [
+            {
+                "username": usernames.get(user_id, ""),
+                "attempts": int(row.attempts),
+                "accuracy": float(row.accuracy),
+            }
+            for user_id, row in by_student.iterrows()
+        ],
+        "distribution": [
+            {
+                "low": int(ACCURACY_BINS[i] * 100),
+                "high": int(ACCURACY_BINS[i + 1] * 100),
+                "students": int(count),
+            }
+            for i, count in enumerate(counts)
+        ],
+        "attempts": int(totals["attempts"].sum()),
+    }
+
+
+class_analytics_cache = ClassAnalyticsCache()
@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+from flask import abort, request, send_file, url_for
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip variants are built
+    brotli = None
+
+# Static files that get fingerprinted copies and precompressed variants
+ASSET_EXTENSIONS = (".js", ".css", ".svg", ".json")
+# Fingerprinted names never change content, so caches can keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+FINGERPRINT_LENGTH = 12
+# Preferred first; "" is the uncompressed file
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"), ("", ""))
+# Third-party files that are committed to the static folder, with where
+# `flask vendor-assets` downloads them from. They are always served from
+# here, fingerprinted like our own files, never from upstream.
+VENDORED_ASSETS = {
+    "kg.0.2.6.js": "https://kineticgraphs.org/js/kg.0.2.6.js",
+    "kg.0.2.6.css": "https://kineticgraphs.org/css/kg.0.2.6.css",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprinted_name(filename, digest):
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def _write_atomic(path, data):
+    # Several worker processes may build at once; each replace is atomic
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class AssetPipeline:
+    """
+    Fingerprinted, precompressed copies of the static JS/CSS.
+
+    On startup every asset in the static folder is hashed and copied to
+    <instance>/assets as name.<hash>.ext, alongside .gz (and .br when the
+    brotli package is installed) variants. /assets/<name> serves the best
+    variant the browser accepts with `Cache-Control: immutable`. Templates
+    link to assets with asset_url("kg-lib.js"), so a changed file gets a new
+    URL instead of waiting for caches to expire.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.output_dir = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.output_dir = os.path.join(app.instance_path, "assets")
+        self.manifest = self.build(app.static_folder, self.output_dir)
+        missing = sorted(set(VENDORED_ASSETS) - set(self.manifest))
+        if missing:
+            logger.error(
+                "Missing from the static folder: %s (run 'flask vendor-assets' and commit them)",
+                ", ".join(missing),
+            )
+        app.extensions["assets"] = self
+
+        app.add_url_rule("/assets/<path:filename>", "asset", self.serve)
+        app.jinja_env.globals["asset_url"] = self.url
+
+    def build(self, source_dir, output_dir):
+        """
+        Fingerprint and compress every asset in source_dir that hasn't
+        been built yet.
+
+        Returns:
+            Manifest mapping source names to fingerprinted names
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = {}
+        for root, _, files in os.walk(source_dir):
+            for name in files:
+                if not name.endswith(ASSET_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, source_dir).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    data = f.read()
+                built = fingerprinted_name(relative, hashlib.sha256(data).hexdigest())
+                manifest[relative] = built
+                self._write_variants(os.path.join(output_dir, built), data)
+
+        _write_atomic(
+            os.path.join(output_dir, "manifest.json"),
+            json.dumps(manifest, indent=2, sort_keys=True).encode(),
+        )
+        return manifest
+
+    def _write_variants(self, target, data):
+        if os.path.exists(target):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Compressed variants first, so the plain file existing means all are done
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            _write_atomic(target + ".gz", compressed)
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                _write_atomic(target + ".br", compressed)
+        _write_atomic(target, data)
+
+    def url(self, filename):
+        """URL of an asset's fingerprinted copy (plain static URL otherwise)"""
+        built = self.manifest.get(filename)
+        if built is None:
+            return url_for("static", filename=filename)
+        return url_for("asset", filename=built)
+
+    def serve(self, filename):
+        if filename not in self.manifest.values():
+            abort(404)
+        path = os.path.join(self.output_dir, filename)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODINGS:
+            if encoding and not accepted[encoding]:
+                continue
+            if os.path.exists(path + suffix):
+                break
+
+        response = send_file(
+            path + suffix,
+            mimetype=mimetype,
+            max_age=IMMUTABLE_MAX_AGE,
+            etag=f"{filename}{suffix}",
+            conditional=True,
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+asset_pipeline = AssetPipeline()
@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
 from .models import User
 from . import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from .hashing import password_hasher
+from .ratelimit import by_form_field, by_ip, limiter
 from flask_login import login_user, logout_user, login_required, current_user
 
 auth = Blueprint("auth", __name__)
@@ -9,12 +10,20 @@ auth = Blueprint("auth", __name__)
 
 # Login route
 @auth.route("/login", methods=["GET", "POST"])
+# Each attempt costs a full password hash, so throttle per account and, more
+# loosely (a classroom may share one address), per IP
+@limiter.limit("login-user", capacity=5, per_seconds=60, keys=(by_form_field("username"),))
+@limiter.limit("login-ip", capacity=60, per_seconds=60, keys=(by_ip,))
 def login():
     if request.method == "POST":
         username = request.form.get("username")
         password = request.form.get("password")
         user = User.query.filter_by(username=username).first()
-        if user and check_password_hash(user.password, password):
+        if user and password_hasher.verify(user.password, password):
+            # Upgrade hashes made with older parameters while we have the password
+            if password_hasher.needs_rehash(user.password):
+                user.password = password_hasher.generate(password)
+                db.session.commit()
             flash("Login successful!", category="success")
             login_user(user, remember=True)
             return redirect(url_for("views.home"))
@@ -53,7 +62,7 @@ def sign_up():
         if len(username) >= 4 and len(password1) >= 8 and password1 == password2:
             new_user = User(
                 username=username,
-                password=generate_password_hash(password1, method="pbkdf2:sha256"),
+                password=password_hasher.generate(password1),
                 role=role,
             )
             db.session.add(new_user)
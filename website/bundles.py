@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from .models import Question, QuestionSet, class_question_sets
+from . import db
+
+# Format version of the bundle payload, bumped if its layout changes
+BUNDLE_FORMAT = 1
+# Number of built class bundles kept in memory
+BUNDLE_CACHE_SIZE = 64
+
+
+class BundleCache:
+    """
+    Built class bundles keyed by class and the versions of its shared sets.
+
+    A bundle is rebuilt only when a set is shared, unshared or changed, so a
+    whole class opening the same sets reuses one serialised, compressed copy.
+    """
+
+    def __init__(self, max_entries=BUNDLE_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+bundle_cache = BundleCache()
+
+
+def shared_set_versions(class_id):
+    """
+    (set id, last change) for every set shared with the class.
+
+    A clone's last change is the latest across the sets it inherits from,
+    so the whole lineage of every shared set is walked in one query.
+    """
+    lineage = (
+        db.select(
+            class_question_sets.c.question_set_id.label("shared_id"),
+            class_question_sets.c.question_set_id.label("set_id"),
+        )
+        .where(class_question_sets.c.class_id == class_id)
+        .cte("lineage", recursive=True)
+    )
+    lineage = lineage.union(
+        db.select(lineage.c.shared_id, QuestionSet.source_set_id)
+        .join(QuestionSet, QuestionSet.id == lineage.c.set_id)
+        .where(QuestionSet.source_set_id.is_not(None))
+    )
+    ancestor = db.aliased(QuestionSet)
+    changed = (
+        db.select(lineage.c.shared_id, db.func.max(ancestor.updated_at).label("changed_at"))
+        .join(ancestor, ancestor.id == lineage.c.set_id)
+        .group_by(lineage.c.shared_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        db.select(QuestionSet, changed.c.changed_at)
+        .join(changed, changed.c.shared_id == QuestionSet.id)
+        .order_by(QuestionSet.id)
+    ).all()
+    return [question_set for question_set, _ in rows], tuple(
+        (question_set.id, (changed_at or datetime(1970, 1, 1)).isoformat())
+        for question_set, changed_at in rows
+    )
+
+
+def build_bundle(class_id, question_sets, versions):
+    """Serialise every shared set's cards as compact [id, question, answer] rows"""
+    sets = []
+    for question_set, (_, version) in zip(question_sets, versions):
+        rows = db.session.execute(
+            question_set.effective_questions_statement().with_only_columns(
+                Question.id, Question.question, Question.answer
+            )
+        ).all()
+        sets.append(
+            {
+                "id": question_set.id,
+                "name": question_set.name,
+                "version": version,
+                "cards": [list(row) for row in rows],
+            }
+        )
+    payload = {"format": BUNDLE_FORMAT, "class_id": class_id, "sets": sets}
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    return {
+        "etag": hashlib.sha256(body).hexdigest(),
+        "body": body,
+        "gzip_body": gzip.compress(body),
+    }
+
+
+def class_bundle(class_id):
+    """
+    Return the bundle for a class, building it only if a shared set changed.
+
+    Returns:
+        Dictionary with the ETag (a hash of the content), the JSON body and
+        its gzip-compressed form
+    """
+    question_sets, versions = shared_set_versions(class_id)
+    key = (class_id, versions)
+    entry = bundle_cache.get(key)
+    if entry is None:
+        entry = build_bundle(class_id, question_sets, versions)
+        bundle_cache.put(key, entry)
+    return entry
@@ -1,8 +1,15 @@
 import random
 import string
-from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app
 from .models import Class, ClassMembership, User, ChatMessage, Assignment, QuestionSet
 from . import db
+from .analytics import class_analytics_cache, summarise
+from .dedupe import find_duplicates, with_source_sets
+from .bundles import class_bundle
+from .fragments import fragment_cache
+from .ratelimit import by_user, limiter
+from .querybudget import query_budget
+from sqlalchemy.orm import joinedload, selectinload
 from flask_login import login_required, current_user
 from datetime import datetime
 
@@ -11,19 +18,44 @@ classes = Blueprint("classes", __name__)
 
 
 @classes.route("/my_classes")
+@query_budget(6)
 @login_required
 def my_classes():
     """Display all classes where user is teacher or student"""
-    # Classes where user is the teacher
-    taught_classes = Class.query.filter_by(teacher_id=current_user.id).all()
-
-    # Classes where user is a student
-    class_memberships = ClassMembership.query.filter_by(user_id=current_user.id).all()
-    enrolled_classes = [m.class_obj for m in class_memberships]
+    # The class lists are cached per user until a write changes them
+    lists_html = fragment_cache.render(
+        "my_classes_lists",
+        current_user.id,
+        (Class, ClassMembership),
+        lambda: render_class_lists(current_user),
+    )
 
     return render_template(
         "my_classes.html",
         user=current_user,
+        lists_html=lists_html,
+    )
+
+
+def render_class_lists(user):
+    # Classes where user is the teacher, with memberships for the student counts
+    taught_classes = (
+        Class.query.filter_by(teacher_id=user.id)
+        .options(selectinload(Class.memberships))
+        .all()
+    )
+
+    # Classes where user is a student, with their teachers
+    enrolled_classes = (
+        Class.query.join(ClassMembership)
+        .filter(ClassMembership.user_id == user.id)
+        .options(joinedload(Class.teacher))
+        .all()
+    )
+
+    return render_template(
+        "_my_classes_lists.html",
+        user=user,
         taught_classes=taught_classes,
         enrolled_classes=enrolled_classes,
     )
@@ -133,6 +165,7 @@ def join_class():
 
 
 @classes.route("/class/<int:class_id>")
+@query_budget(8)
 @login_required
 def class_detail(class_id):
     """View class details and student list"""
@@ -158,24 +191,16 @@ def class_detail(class_id):
         .all()
     )
 
-    my_class = Class.query.get(class_id)
-    # If teacher or class member, load their question sets for sharing UI
-    user_question_sets = None
-    if is_teacher or (
-        ClassMembership.query.filter_by(
-            user_id=current_user.id, class_id=class_id
-        ).first()
-        is not None
-    ):
-        user_question_sets = QuestionSet.query.filter_by(user_id=current_user.id).all()
+    # Access was checked above, so load the user's question sets for the sharing UI
+    user_question_sets = QuestionSet.query.filter_by(user_id=current_user.id).all()
 
     # Shared question sets for this class
-    shared_sets = my_class.question_sets.all()
+    shared_sets = class_obj.question_sets.all()
 
     return render_template(
         "class_detail.html",
         user=current_user,
-        class_=my_class,
+        class_=class_obj,
         is_teacher=is_teacher,
         is_student=is_student,
         students=students,
@@ -218,9 +243,23 @@ def share_question_set(class_id):
         flash("Question set already shared with this class.", "warning")
         return redirect(url_for("classes.class_detail", class_id=class_id))
 
+    # Check the incoming questions against sets already shared with the class
+    existing_set_ids = with_source_sets(s.id for s in class_obj.question_sets)
+    duplicate_count = 0
+    if existing_set_ids:
+        for q in question_set.effective_questions():
+            if find_duplicates(q.question, existing_set_ids, limit=1):
+                duplicate_count += 1
+
     class_obj.question_sets.append(question_set)
     db.session.commit()
     flash("Question set shared with class.", "success")
+    if duplicate_count:
+        flash(
+            f"{duplicate_count} question(s) look like near-duplicates of questions "
+            "already shared with this class. See the duplicate suggestions for this set.",
+            "warning",
+        )
     return redirect(url_for("classes.class_detail", class_id=class_id))
 
 
@@ -254,6 +293,7 @@ def unshare_question_set(class_id, set_id):
 
 @classes.route("/class/<int:class_id>/chat", methods=["GET", "POST"])
 @login_required
+@limiter.limit("chat", capacity=5, per_seconds=10, keys=(by_user,))
 def class_chat(class_id):
     """Class chat room for teachers and students"""
     class_obj = Class.query.get_or_404(class_id)
@@ -302,6 +342,64 @@ def class_chat(class_id):
     )
 
 
+@classes.route("/class/<int:class_id>/analytics")
+@login_required
+def class_analytics(class_id):
+    """Flashcard analytics for a class (teacher only)"""
+    class_obj = Class.query.get_or_404(class_id)
+
+    if class_obj.teacher_id != current_user.id:
+        flash("Only the class teacher can view analytics.", "danger")
+        return redirect(url_for("classes.class_detail", class_id=class_id))
+
+    summary = summarise(class_analytics_cache.totals(class_id))
+
+    return render_template(
+        "class_analytics.html",
+        user=current_user,
+        class_=class_obj,
+        summary=summary,
+    )
+
+
+@classes.route("/class/<int:class_id>/bundle")
+@login_required
+def class_flashcard_bundle(class_id):
+    """Every shared question set in one versioned, gzip-compressed download"""
+    class_obj = Class.query.get_or_404(class_id)
+
+    is_teacher = class_obj.teacher_id == current_user.id
+    is_student = (
+        ClassMembership.query.filter_by(
+            user_id=current_user.id, class_id=class_id
+        ).first()
+        is not None
+    )
+    if not (is_teacher or is_student):
+        return jsonify({"error": "You don't have access to this class."}), 403
+
+    bundle = class_bundle(class_id)
+
+    # The ETag names the content, which is served gzip-encoded or not, so it
+    # is weak: byte-for-byte the two encodings differ
+    if request.if_none_match.contains_weak(bundle["etag"]):
+        response = current_app.response_class(status=304)
+    elif "gzip" in request.accept_encodings:
+        response = current_app.response_class(
+            bundle["gzip_body"], mimetype="application/json"
+        )
+        response.content_encoding = "gzip"
+    else:
+        response = current_app.response_class(
+            bundle["body"], mimetype="application/json"
+        )
+    response.set_etag(bundle["etag"], weak=True)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
 @classes.route("/class/<int:class_id>/delete", methods=["POST"])
 @login_required
 def delete_class(class_id):
@@ -0,0 +1,206 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import click
+import requests
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+from .models import Class, ClassMembership, User
+from . import db
+from .assets import VENDORED_ASSETS
+from .hashing import password_hasher
+from .fragments import bump_data_versions
+from .migrations import MIGRATIONS, schema_version, upgrade
+from .seeding import DEFAULT_SCALE, SEED_PASSWORD, seed_population
+
+VALID_ROLES = ("student", "teacher")
+
+
+def read_roster(roster_file):
+    """
+    Yield cleaned rows from a roster CSV.
+
+    Expected columns: username, password, role (optional, defaults to
+    student) and class_code (optional, one or more codes separated by ';').
+    """
+    reader = csv.DictReader(roster_file)
+    for line_number, row in enumerate(reader, start=2):
+        username = (row.get("username") or "").strip()
+        password = row.get("password") or ""
+        role = (row.get("role") or "student").strip().lower()
+        codes = [
+            code.strip().upper()
+            for code in (row.get("class_code") or "").split(";")
+            if code.strip()
+        ]
+        # Same rules as the sign-up form
+        if len(username) < 4 or len(password) < 8 or role not in VALID_ROLES:
+            click.echo(f"Line {line_number}: skipped invalid row for '{username}'", err=True)
+            continue
+        yield {"username": username, "password": password, "role": role, "codes": codes}
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _provision_batch(batch, pool, class_ids, enroll, stats):
+    """Hash, insert and enroll one batch of roster rows in a transaction"""
+    usernames = [row["username"] for row in batch]
+    existing = set(
+        db.session.execute(
+            select(User.username).where(User.username.in_(usernames))
+        ).scalars()
+    )
+    seen = set()
+    new_rows = []
+    for row in batch:
+        if row["username"] in existing or row["username"] in seen:
+            stats["skipped"] += 1
+            continue
+        seen.add(row["username"])
+        new_rows.append(row)
+    if not new_rows:
+        return
+
+    hash_started = time.perf_counter()
+    hashes = password_hasher.map_generate(
+        [row["password"] for row in new_rows], pool=pool
+    )
+    stats["hash_seconds"] += time.perf_counter() - hash_started
+
+    db.session.execute(
+        insert(User),
+        [
+            {"username": row["username"], "password": pwhash, "role": row["role"]}
+            for row, pwhash in zip(new_rows, hashes)
+        ],
+    )
+    stats["created"] += len(new_rows)
+
+    if enroll:
+        user_ids = dict(
+            db.session.execute(
+                select(User.username, User.id).where(
+                    User.username.in_([row["username"] for row in new_rows])
+                )
+            ).all()
+        )
+        memberships = []
+        for row in new_rows:
+            for code in row["codes"]:
+                if code in class_ids:
+                    memberships.append(
+                        {"user_id": user_ids[row["username"]], "class_id": class_ids[code]}
+                    )
+                else:
+                    click.echo(f"Unknown class code '{code}' for {row['username']}", err=True)
+        if memberships:
+            db.session.execute(insert(ClassMembership), memberships)
+            teachers = db.session.execute(
+                select(Class.teacher_id).where(
+                    Class.id.in_({m["class_id"] for m in memberships})
+                )
+            ).scalars()
+            bump_data_versions(
+                db.session,
+                [ClassMembership],
+                {m["user_id"] for m in memberships} | set(teachers),
+            )
+            stats["enrolled"] += len(memberships)
+
+    db.session.commit()
+
+
+@click.command("provision-users")
+@click.argument("roster", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--batch-size", default=500, show_default=True, help="Users inserted per transaction.")
+@click.option("--workers", default=None, type=int, help="Hashing processes (defaults to CPU count).")
+@click.option("--enroll/--no-enroll", default=True, show_default=True, help="Enroll users into classes listed in class_code.")
+@with_appcontext
+def provision_users(roster, batch_size, workers, enroll):
+    """Create user accounts in bulk from a roster CSV file"""
+    class_ids = {}
+    if enroll:
+        class_ids = dict(db.session.execute(select(Class.code, Class.id)).all())
+
+    stats = {"created": 0, "skipped": 0, "enrolled": 0, "hash_seconds": 0.0}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for batch in batches(read_roster(roster), batch_size):
+            _provision_batch(batch, pool, class_ids, enroll, stats)
+            click.echo(f"  {stats['created']} created so far")
+
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"Created {stats['created']} user(s), skipped {stats['skipped']}, "
+        f"added {stats['enrolled']} class enrollment(s) in {elapsed:.1f}s"
+    )
+    if stats["created"]:
+        click.echo(
+            f"Throughput: {stats['created'] / elapsed:.0f} users/s overall, "
+            f"{stats['created'] / max(stats['hash_seconds'], 1e-9):.0f} hashes/s"
+        )
+
+
+@click.command("migrate")
+@with_appcontext
+def migrate():
+    """Apply pending schema migrations"""
+    applied = upgrade(db.engine)
+    for version, description in applied:
+        click.echo(f"Applied {version}: {description}")
+    latest = max(version for version, _, _ in MIGRATIONS)
+    click.echo(f"Schema at version {schema_version(db.engine)} (latest {latest})")
+
+
+@click.command("seed-data")
+@click.option("--teachers", default=DEFAULT_SCALE["teachers"], show_default=True)
+@click.option("--students", default=DEFAULT_SCALE["students"], show_default=True)
+@click.option("--classes-per-teacher", default=DEFAULT_SCALE["classes_per_teacher"], show_default=True)
+@click.option("--students-per-class", default=DEFAULT_SCALE["students_per_class"], show_default=True)
+@click.option("--sets-per-teacher", default=DEFAULT_SCALE["sets_per_teacher"], show_default=True)
+@click.option("--questions-per-set", default=DEFAULT_SCALE["questions_per_set"], show_default=True)
+@click.option("--sets-shared-per-class", default=DEFAULT_SCALE["sets_shared_per_class"], show_default=True)
+@click.option("--messages-per-class", default=DEFAULT_SCALE["messages_per_class"], show_default=True)
+@click.option("--assignments-per-class", default=DEFAULT_SCALE["assignments_per_class"], show_default=True)
+@click.option("--seed", default=0, show_default=True, help="Random seed for reproducible data.")
+@with_appcontext
+def seed_data(seed, **scale):
+    """Bulk-generate a synthetic school population for load testing"""
+    click.echo(f"Seeding (every account's password is '{SEED_PASSWORD}'):")
+    started = time.perf_counter()
+    # One hash shared by every account keeps seeding fast
+    counts = seed_population(
+        scale, password_hasher.map_generate([SEED_PASSWORD])[0], seed=seed, progress=click.echo
+    )
+    elapsed = time.perf_counter() - started
+    click.echo(f"Inserted {sum(counts.values())} rows in {elapsed:.1f}s")
+
+
+@click.command("vendor-assets")
+@click.option("--force", is_flag=True, help="Download files that are already present.")
+@with_appcontext
+def vendor_assets(force):
+    """Download third-party JS/CSS into the static folder"""
+    for filename, url in VENDORED_ASSETS.items():
+        path = os.path.join(current_app.static_folder, filename)
+        if os.path.exists(path) and not force:
+            click.echo(f"{filename}: already vendored")
+            continue
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            f.write(response.content)
+        click.echo(f"{filename}: {len(response.content)} bytes from {url}")
+    click.echo("Commit the files; the asset pipeline fingerprints them on the next start.")
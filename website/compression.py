@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import threading
+from flask import current_app, request
+from .metrics import Counter
+
+# Bodies smaller than this gain little from gzip and cost a CPU round trip
+MIN_SIZE = 1024
+COMPRESS_LEVEL = 6
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+}
+
+
+class Compression:
+    """
+    Weak ETags, 304s and gzip for dynamic responses.
+
+    Successful GET/HEAD responses get an ETag from a hash of their body, so
+    a browser that sends it back in If-None-Match gets an empty 304. Bodies
+    of COMPRESSION_MIN_SIZE bytes or more are gzipped when the client
+    accepts it. Streamed and file responses, and anything that already has a
+    Content-Encoding, are passed through untouched. Bytes before and after
+    compression and bytes saved by 304s are exported on /metrics.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.bytes_in = Counter(
+            "econspark_compression_bytes_in_total",
+            "Response bytes before compression",
+            ("endpoint",),
+        )
+        self.bytes_out = Counter(
+            "econspark_compression_bytes_out_total",
+            "Response bytes after compression",
+            ("endpoint",),
+        )
+        self.not_modified = Counter(
+            "econspark_not_modified_total",
+            "Responses answered with 304 Not Modified",
+            ("endpoint",),
+        )
+        self.not_modified_bytes = Counter(
+            "econspark_not_modified_bytes_saved_total",
+            "Body bytes not sent because the client's copy was current",
+            ("endpoint",),
+        )
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESSION_ENABLED", True)
+        app.config.setdefault("COMPRESSION_MIN_SIZE", MIN_SIZE)
+        app.config.setdefault("COMPRESSION_LEVEL", COMPRESS_LEVEL)
+        app.extensions["compression"] = self
+        if app.config["COMPRESSION_ENABLED"]:
+            app.after_request(self._process_response)
+
+    def _process_response(self, response):
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        endpoint = request.endpoint or "unmatched"
+        body = response.get_data()
+
+        if request.method in ("GET", "HEAD") and response.status_code == 200:
+            if "ETag" not in response.headers:
+                response.set_etag(hashlib.sha1(body).hexdigest()[:16], weak=True)
+            if "Cache-Control" not in response.headers:
+                # Pages are per user; make browsers revalidate rather than reuse
+                response.headers["Cache-Control"] = "private, no-cache"
+            response.make_conditional(request)
+            if response.status_code == 304:
+                with self._lock:
+                    self.not_modified.inc((endpoint,))
+                    self.not_modified_bytes.inc((endpoint,), len(body))
+                return response
+
+        response.vary.add("Accept-Encoding")
+        if (
+            len(body) < current_app.config["COMPRESSION_MIN_SIZE"]
+            or not request.accept_encodings["gzip"]
+        ):
+            return response
+
+        compressed = gzip.compress(body, compresslevel=current_app.config["COMPRESSION_LEVEL"])
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = "gzip"
+        # A strong ETag promises identical bytes, which no longer holds
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        with self._lock:
+            self.bytes_in.inc((endpoint,), len(body))
+            self.bytes_out.inc((endpoint,), len(compressed))
+        return response
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.bytes_in, self.bytes_out, self.not_modified, self.not_modified_bytes):
+                lines.extend(metric.render())
+        return lines
+
+
+compression = Compression()
@@ -0,0 +1,381 @@
+import re
+import threading
+import time
+import zlib
+from datetime import timedelta
+import numpy as np
+from sqlalchemy import event, select, union
+from sqlalchemy.orm import object_session
+from .models import (
+    Class,
+    ClassMembership,
+    DataVersion,
+    Question,
+    QuestionSet,
+    class_question_sets,
+    utcnow,
+)
+from . import db
+
+# MinHash signature length, split into LSH bands of BAND_ROWS rows each
+NUM_PERMUTATIONS = 128
+BAND_ROWS = 4
+SHINGLE_SIZE = 4
+# Estimated Jaccard similarity at which two questions count as near-duplicates
+DUPLICATE_THRESHOLD = 0.6
+# Lookups check for question writes made by other processes this often
+FRESHNESS_INTERVAL = 1.0
+# Catch-up re-reads rows stamped this long before the watermark, covering
+# transactions that stamped their rows earlier but committed later
+CATCH_UP_OVERLAP = timedelta(seconds=30)
+
+# Hash family (a*h + b) mod p. Every operand is below p < 2**31, so a*h + b
+# stays under 2**62 and can't wrap in uint64 before the modulo.
+_PRIME = np.uint64(2**31 - 1)
+_rng = np.random.default_rng(20240601)
+_HASH_A = _rng.integers(1, _PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, _PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def normalise(text):
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+
+def shingles(text):
+    """Character shingles of the normalised text"""
+    text = normalise(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i : i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """
+    MinHash signature of a question's text.
+
+    Every permutation is applied to every shingle hash in one broadcast, so
+    cost is a single (shingles x permutations) array operation.
+    """
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode()) for s in shingles(text)), dtype=np.uint64
+    ) % _PRIME
+    permuted = (np.outer(hashes, _HASH_A) + _HASH_B) % _PRIME
+    return permuted.min(axis=0)
+
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(signature_a == signature_b))
+
+
+class DuplicateIndex:
+    """
+    Locality-sensitive hashing index over question text.
+
+    A lookup only compares against questions sharing at least one LSH band
+    bucket with the query, so checks stay sub-linear in the number of
+    indexed questions and are cheap enough to run on every insert.
+
+    Each worker process holds its own index, built in a background thread
+    when the app starts; lookups find nothing until it is ready. Commits
+    made in this process are applied as they happen. Writes from other
+    processes are noticed through the question table's data_version counter
+    (see fragments.py), checked at most once per FRESHNESS_INTERVAL seconds.
+    Only rows whose updated_at is past the index's watermark are then
+    re-read. Questions another process hard-deletes stay in the index until
+    a lookup finds they are gone (see find_duplicates).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        # Bumped by init_app so a build for an earlier app is discarded
+        self._generation = 0
+        # data_version of the question table the index reflects
+        self._version = None
+        # Latest question updated_at the index has read
+        self._watermark = None
+        self._checked_at = 0.0
+        self._signatures = {}
+        self._set_ids = {}
+        self._buckets = {}
+
+    def init_app(self, app):
+        """Start building the index for this app in a background thread"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._ready.clear()
+            self._version = None
+            self._watermark = None
+            self._signatures, self._set_ids, self._buckets = {}, {}, {}
+        threading.Thread(
+            target=self._build, args=(app, generation), name="duplicate-index", daemon=True
+        ).start()
+
+    def wait_until_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def _build(self, app, generation):
+        # Filled outside the lock so lookups and commits aren't held up
+        fresh = DuplicateIndex()
+        # Rows migrated from before updated_at existed have none; catching up
+        # from the build's start keeps them from being re-read every time.
+        # SQLite hands datetimes back naive, in UTC.
+        fresh._watermark = utcnow().replace(tzinfo=None)
+        with app.app_context():
+            try:
+                rows = db.session.execute(
+                    _changed_questions().where(Question.is_removed.is_(False))
+                    .execution_options(yield_per=1000)
+                )
+                for question_id, set_id, text, is_removed, updated_at in rows:
+                    fresh._add(question_id, set_id, text)
+                    fresh._advance(updated_at)
+            except Exception:
+                app.logger.exception("Could not build the duplicate index")
+                return
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self._signatures = fresh._signatures
+                self._set_ids = fresh._set_ids
+                self._buckets = fresh._buckets
+                self._watermark = fresh._watermark
+                # Commits made during the build were skipped by apply(); the
+                # catch-up re-reads them
+                self._version = None
+                self._catch_up(_question_version())
+                self._checked_at = time.monotonic()
+                self._ready.set()
+
+    def _band_keys(self, signature):
+        for band in range(NUM_PERMUTATIONS // BAND_ROWS):
+            chunk = signature[band * BAND_ROWS : (band + 1) * BAND_ROWS]
+            yield band, chunk.tobytes()
+
+    def _add(self, question_id, set_id, text):
+        self._remove(question_id)
+        signature = minhash(text)
+        self._signatures[question_id] = signature
+        self._set_ids[question_id] = set_id
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(question_id)
+
+    def _remove(self, question_id):
+        signature = self._signatures.pop(question_id, None)
+        self._set_ids.pop(question_id, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(question_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _advance(self, updated_at):
+        if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+
+    def _catch_up(self, version):
+        """Re-read questions changed since the watermark (caller holds the lock)"""
+        query = _changed_questions()
+        if self._watermark is not None:
+            query = query.where(Question.updated_at >= self._watermark - CATCH_UP_OVERLAP)
+        for question_id, set_id, text, is_removed, updated_at in db.session.execute(query):
+            if is_removed:
+                self._remove(question_id)
+            else:
+                self._add(question_id, set_id, text)
+            self._advance(updated_at)
+        self._version = version
+
+    def ensure_loaded(self):
+        """
+        Catch up with questions written by other processes since the last
+        check. Does nothing until the background build has finished.
+        """
+        if not self._ready.is_set():
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < FRESHNESS_INTERVAL:
+                return
+            self._checked_at = now
+            version = _question_version()
+            if version != self._version:
+                self._catch_up(version)
+
+    def discard(self, question_ids):
+        """Drop questions that no longer exist"""
+        with self._lock:
+            for question_id in question_ids:
+                self._remove(question_id)
+
+    def apply(self, upserts, deletes, version_bumps):
+        """
+        Apply committed question changes (skipped until first load).
+
+        version_bumps is how many times the commit bumped the question
+        data_version. If another process also wrote, the counts no longer
+        line up and the next freshness check catches up.
+        """
+        with self._lock:
+            if not self._ready.is_set():
+                return
+            for question_id in deletes:
+                self._remove(question_id)
+            for question_id, set_id, text in upserts:
+                self._add(question_id, set_id, text)
+            self._version += version_bumps
+
+    def find_similar(self, text, set_ids=None, exclude_ids=(), threshold=DUPLICATE_THRESHOLD):
+        """
+        Find indexed questions similar to the given text.
+
+        Args:
+            text: Question text to check
+            set_ids: Only consider questions in these sets (None for all)
+            exclude_ids: Question ids to leave out of the results
+            threshold: Minimum estimated similarity
+
+        Returns:
+            List of (question_id, similarity) pairs, most similar first
+        """
+        self.ensure_loaded()
+        signature = minhash(text)
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates |= self._buckets.get(key, set())
+            matches = []
+            for question_id in candidates:
+                if question_id in exclude_ids:
+                    continue
+                if set_ids is not None and self._set_ids.get(question_id) not in set_ids:
+                    continue
+                score = similarity(signature, self._signatures[question_id])
+                if score >= threshold:
+                    matches.append((question_id, score))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+
+duplicate_index = DuplicateIndex()
+
+
+def _question_version():
+    return db.session.execute(
+        select(DataVersion.version).where(DataVersion.name == Question.__tablename__)
+    ).scalar() or 0
+
+
+def _changed_questions():
+    return select(
+        Question.id, Question.question_set_id, Question.question, Question.is_removed,
+        Question.updated_at,
+    )
+
+
+def with_source_sets(set_ids):
+    """
+    The given set ids plus every set they were cloned from, directly or
+    through other clones. Index entries sit under the set that holds the
+    row, so this is what a lookup needs to see a clone's inherited questions.
+    """
+    ids = set(set_ids)
+    frontier = set(ids)
+    while frontier:
+        frontier = set(
+            db.session.execute(
+                select(QuestionSet.source_set_id).where(
+                    QuestionSet.id.in_(frontier), QuestionSet.source_set_id.is_not(None)
+                )
+            ).scalars()
+        ) - ids
+        ids |= frontier
+    return ids
+
+
+def accessible_set_ids(user):
+    """
+    Ids of question sets the user owns or that are shared with their
+    classes, plus the sets those were cloned from
+    """
+    class_ids = union(
+        select(Class.id).where(Class.teacher_id == user.id),
+        select(ClassMembership.class_id).where(ClassMembership.user_id == user.id),
+    )
+    owned = select(QuestionSet.id).where(QuestionSet.user_id == user.id)
+    shared = select(class_question_sets.c.question_set_id).where(
+        class_question_sets.c.class_id.in_(class_ids)
+    )
+    return with_source_sets(db.session.execute(union(owned, shared)).scalars())
+
+
+def find_duplicates(text, set_ids, exclude_ids=(), limit=5):
+    """
+    Near-duplicate questions for the given text, limited to some sets.
+
+    Returns:
+        List of dictionaries with the matching Question and its similarity
+    """
+    matches = duplicate_index.find_similar(text, set_ids, exclude_ids)[:limit]
+    if not matches:
+        return []
+    questions = {
+        q.id: q for q in Question.query.filter(Question.id.in_([m[0] for m in matches]))
+    }
+    # Deleted by another process since the index read them
+    gone = [question_id for question_id, _ in matches if question_id not in questions]
+    if gone:
+        duplicate_index.discard(gone)
+    return [
+        {"question": questions[question_id], "similarity": score}
+        for question_id, score in matches
+        if question_id in questions
+    ]
+
+
+# Keep the index in step with committed writes to the question table
+@event.listens_for(Question, "after_insert")
+@event.listens_for(Question, "after_update")
+def _queue_upsert(mapper, connection, target):
+    session = object_session(target)
+    session.info["dedupe_flushed"] = True
+    if target.is_removed:
+        session.info.setdefault("dedupe_deletes", []).append(target.id)
+        return
+    session.info.setdefault("dedupe_upserts", []).append(
+        (target.id, target.question_set_id, target.question)
+    )
+
+
+@event.listens_for(Question, "after_delete")
+def _queue_delete(mapper, connection, target):
+    session = object_session(target)
+    session.info["dedupe_flushed"] = True
+    session.info.setdefault("dedupe_deletes", []).append(target.id)
+
+
+@event.listens_for(db.session, "after_flush")
+def _count_version_bump(session, flush_context):
+    # A flush that wrote questions bumps their data_version once (fragments.py)
+    if session.info.pop("dedupe_flushed", False):
+        session.info["dedupe_bumps"] = session.info.get("dedupe_bumps", 0) + 1
+
+
+@event.listens_for(db.session, "after_commit")
+def _apply_changes(session):
+    upserts = session.info.pop("dedupe_upserts", [])
+    deletes = session.info.pop("dedupe_deletes", [])
+    bumps = session.info.pop("dedupe_bumps", 0)
+    if upserts or deletes:
+        duplicate_index.apply(upserts, deletes, bumps)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    for key in ("dedupe_upserts", "dedupe_deletes", "dedupe_bumps", "dedupe_flushed"):
+        session.info.pop(key, None)
@@ -0,0 +1,440 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+
+# Points per curve returned for plotting
+DEFAULT_CURVE_POINTS = 50
+MAX_CURVE_POINTS = 500
+# Most numbers one sweep may return (grid cells x outcomes); a full sweep is
+# about 1MB of JSON
+MAX_SWEEP_VALUES = 100_000
+MAX_AXIS_STEPS = 10_000
+# Serialized sweeps are kept until this many bytes are cached
+SWEEP_CACHE_BYTES = 64 * 1024 * 1024
+
+Parameter = namedtuple("Parameter", "name label default minimum maximum")
+Model = namedtuple("Model", "name description parameters outcomes curves")
+
+MODELS = {}
+
+
+def model(name, description, parameters):
+    """
+    Register a model's outcome function.
+
+    The function takes every parameter as a keyword argument and must work
+    on NumPy arrays of any broadcastable shape. It returns a dict mapping
+    each outcome to a zero-argument function computing its array, so a
+    sweep only pays for the outcomes it returns. Attach the function that
+    draws the model's curves with `.curves`.
+    """
+
+    def decorator(outcomes):
+        def curves(function):
+            MODELS[name] = MODELS[name]._replace(curves=function)
+            return function
+
+        MODELS[name] = Model(name, description, parameters, outcomes, None)
+        outcomes.curves = curves
+        return outcomes
+
+    return decorator
+
+
+def resolve_parameters(name, values):
+    """
+    Fill in defaults and check a model's parameters.
+
+    Args:
+        name: Registered model name
+        values: Mapping of parameter name to a number (or numeric string)
+
+    Returns:
+        Dict of every parameter as a float
+
+    Raises:
+        KeyError: Unknown model
+        ValueError: Unknown parameter, not a number or out of range
+    """
+    spec = MODELS[name]
+    known = {parameter.name for parameter in spec.parameters}
+    unknown = set(values) - known
+    if unknown:
+        raise ValueError(f"Unknown parameter(s) for {name}: {', '.join(sorted(unknown))}")
+
+    resolved = {}
+    for parameter in spec.parameters:
+        raw = values.get(parameter.name, parameter.default)
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"{parameter.name} must be a number") from None
+        if not parameter.minimum <= value <= parameter.maximum:
+            raise ValueError(
+                f"{parameter.name} must be between {parameter.minimum} and {parameter.maximum}"
+            )
+        resolved[parameter.name] = value
+    return resolved
+
+
+def evaluate(name, values, points=DEFAULT_CURVE_POINTS):
+    """
+    Run a model at a single parameter point.
+
+    Returns:
+        Dict with the resolved parameters, scalar outcomes (None where
+        undefined) and curves as {"x": [...], "y": [...]} lists
+    """
+    spec = MODELS[name]
+    params = resolve_parameters(name, values)
+    points = max(2, min(int(points), MAX_CURVE_POINTS))
+    outcomes = spec.outcomes(**params)
+    curves = spec.curves(points=points, **params) if spec.curves else {}
+    return {
+        "model": name,
+        "parameters": params,
+        "outcomes": {key: _json_number(compute()) for key, compute in outcomes.items()},
+        "curves": {
+            key: {"x": _json_list(x), "y": _json_list(y)} for key, (x, y) in curves.items()
+        },
+    }
+
+
+def parse_sweep(name, values):
+    """
+    Split sweep arguments into grid axes and fixed parameters.
+
+    Each value is a single number (held fixed), "start:stop:steps" (evenly
+    spaced, both ends included) or a comma-separated list of values.
+    "outcomes" optionally names the outcomes to return, comma-separated.
+
+    Returns:
+        (axes, fixed, outcomes): axes is a list of (name, 1-D array) in
+        parameter order, fixed a dict of floats, outcomes a list of names
+
+    Raises:
+        ValueError: Unknown or out-of-range values, or too large a grid
+    """
+    spec = MODELS[name]
+    values = dict(values)
+    requested = values.pop("outcomes", None)
+    known = {parameter.name for parameter in spec.parameters}
+    unknown = set(values) - known
+    if unknown:
+        raise ValueError(f"Unknown parameter(s) for {name}: {', '.join(sorted(unknown))}")
+
+    axes, fixed = [], {}
+    for parameter in spec.parameters:
+        grid = _parse_axis(parameter, str(values.get(parameter.name, parameter.default)))
+        if not (
+            np.isfinite(grid).all()
+            and parameter.minimum <= grid.min()
+            and grid.max() <= parameter.maximum
+        ):
+            raise ValueError(
+                f"{parameter.name} must be between {parameter.minimum} and {parameter.maximum}"
+            )
+        if len(grid) == 1:
+            fixed[parameter.name] = float(grid[0])
+        else:
+            axes.append((parameter.name, grid))
+
+    available = list(spec.outcomes(**{p.name: p.default for p in spec.parameters}))
+    outcomes = requested.split(",") if requested else available
+    missing = [outcome for outcome in outcomes if outcome not in available]
+    if missing:
+        raise ValueError(f"Unknown outcome(s) for {name}: {', '.join(missing)}")
+
+    # Python ints and an early exit, so huge grids can't overflow the count
+    total = len(outcomes)
+    for _, grid in axes:
+        total *= len(grid)
+        if total > MAX_SWEEP_VALUES:
+            raise ValueError(
+                f"Sweep would return more than {MAX_SWEEP_VALUES} values; "
+                "use fewer steps or ask for fewer outcomes"
+            )
+    return axes, fixed, outcomes
+
+
+def _parse_axis(parameter, raw):
+    try:
+        if ":" in raw:
+            start, stop, steps = raw.split(":")
+            start, stop, steps = float(start), float(stop), int(steps)
+        else:
+            return np.array([float(v) for v in raw.split(",")])
+    except ValueError:
+        raise ValueError(
+            f"{parameter.name} must be a number, start:stop:steps or a list"
+        ) from None
+    if not 2 <= steps <= MAX_AXIS_STEPS:
+        raise ValueError(f"{parameter.name} needs between 2 and {MAX_AXIS_STEPS} steps")
+    return np.linspace(start, stop, steps)
+
+
+def sweep_key(name, axes, fixed, outcomes):
+    """Stable hash of a parsed sweep, used as its cache key and ETag"""
+    canonical = json.dumps(
+        [name, [(axis, grid.tolist()) for axis, grid in axes], sorted(fixed.items()), outcomes],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+def sweep(name, axes, fixed, outcomes):
+    """
+    Evaluate a model over the full grid of axis values in one broadcast.
+
+    Axis i is reshaped to lie along dimension i, so NumPy expands the grid
+    inside the model's arithmetic without building it in Python.
+
+    Returns:
+        Dict with the axes, fixed parameters, grid shape, and each outcome
+        as a flat row-major list plus its min/max (for colour scales)
+    """
+    spec = MODELS[name]
+    params = dict(fixed)
+    for i, (axis, grid) in enumerate(axes):
+        shape = [1] * len(axes)
+        shape[i] = len(grid)
+        params[axis] = grid.reshape(shape)
+    results = spec.outcomes(**params)
+
+    payload = {}
+    for outcome in outcomes:
+        values = np.asarray(results[outcome](), dtype=float)
+        finite = values[np.isfinite(values)]
+        payload[outcome] = {
+            "values": _json_list(values.ravel()),
+            "min": _json_number(finite.min()) if finite.size else None,
+            "max": _json_number(finite.max()) if finite.size else None,
+        }
+    return {
+        "model": name,
+        "axes": [{"name": axis, "values": _json_list(grid)} for axis, grid in axes],
+        "fixed": fixed,
+        "shape": [len(grid) for _, grid in axes],
+        "outcomes": payload,
+    }
+
+
+class SweepCache:
+    """
+    Serialized sweep results keyed by sweep_key, evicted least recently
+    used first once more than max_bytes are held. Results depend only on
+    the parameters, so entries never go stale.
+    """
+
+    def __init__(self, max_bytes=SWEEP_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def get(self, key, compute):
+        """Return cached bytes for key, or compute, serialize and cache them"""
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+            self.misses += 1
+
+        body = json.dumps(compute(), separators=(",", ":")).encode()
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = body
+                self._bytes += len(body)
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+        return body
+
+
+sweep_cache = SweepCache()
+
+
+def _arrays(*values):
+    return np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in values))
+
+
+def _json_number(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def _json_list(values):
+    values = np.round(np.asarray(values, dtype=float), 6)
+    if np.isfinite(values).all():
+        return values.tolist()
+    return [v if np.isfinite(v) else None for v in values.tolist()]
+
+
+# Linear supply and demand with a per-unit tax on sellers:
+#   demand  P = a - b*Q
+#   supply  P = c + d*Q (+ tax)
+@model(
+    "market",
+    "Competitive market with linear demand and supply and an optional per-unit tax",
+    [
+        Parameter("demand_intercept", "Demand intercept (price at Q=0)", 10, 0, 1000),
+        Parameter("demand_slope", "Demand slope", 1, 0.01, 100),
+        Parameter("supply_intercept", "Supply intercept (price at Q=0)", 2, -1000, 1000),
+        Parameter("supply_slope", "Supply slope", 1, 0.01, 100),
+        Parameter("tax", "Per-unit tax", 0, 0, 1000),
+    ],
+)
+def market(demand_intercept, demand_slope, supply_intercept, supply_slope, tax):
+    a, b, c, d, t = _arrays(demand_intercept, demand_slope, supply_intercept, supply_slope, tax)
+    quantity = np.maximum((a - c - t) / (b + d), 0.0)
+
+    def total_surplus():
+        return (0.5 * (b + d) * quantity + t) * quantity
+
+    def deadweight_loss():
+        free_quantity = np.maximum((a - c) / (b + d), 0.0)
+        return 0.5 * (b + d) * free_quantity**2 - total_surplus()
+
+    return {
+        "quantity": lambda: quantity,
+        "consumer_price": lambda: a - b * quantity,
+        "producer_price": lambda: a - b * quantity - t,
+        "consumer_surplus": lambda: 0.5 * b * quantity**2,
+        "producer_surplus": lambda: 0.5 * d * quantity**2,
+        "tax_revenue": lambda: t * quantity,
+        "total_surplus": total_surplus,
+        "deadweight_loss": deadweight_loss,
+    }
+
+
+@market.curves
+def market_curves(demand_intercept, demand_slope, supply_intercept, supply_slope, tax, points):
+    q = np.linspace(0.0, demand_intercept / demand_slope, points)
+    curves = {
+        "demand": (q, demand_intercept - demand_slope * q),
+        "supply": (q, supply_intercept + supply_slope * q),
+    }
+    if tax:
+        curves["supply_with_tax"] = (q, supply_intercept + tax + supply_slope * q)
+    return curves
+
+
+# Monopolist facing linear demand P = a - b*Q with marginal cost MC = m + k*Q,
+# compared with the competitive outcome where P = MC
+@model(
+    "monopoly",
+    "Profit-maximising monopoly (MR = MC) compared with perfect competition",
+    [
+        Parameter("demand_intercept", "Demand intercept (price at Q=0)", 10, 0, 1000),
+        Parameter("demand_slope", "Demand slope", 1, 0.01, 100),
+        Parameter("marginal_cost", "Marginal cost at Q=0", 2, 0, 1000),
+        Parameter("marginal_cost_slope", "Marginal cost slope", 0, 0, 100),
+        Parameter("fixed_cost", "Fixed cost", 0, 0, 100000),
+    ],
+)
+def monopoly(demand_intercept, demand_slope, marginal_cost, marginal_cost_slope, fixed_cost):
+    a, b, m, k, f = _arrays(
+        demand_intercept, demand_slope, marginal_cost, marginal_cost_slope, fixed_cost
+    )
+    monopoly_quantity = np.maximum((a - m) / (2 * b + k), 0.0)
+    monopoly_price = a - b * monopoly_quantity
+
+    def competitive_quantity():
+        return np.maximum((a - m) / (b + k), 0.0)
+
+    def deadweight_loss():
+        markup = monopoly_price - (m + k * monopoly_quantity)
+        return 0.5 * markup * (competitive_quantity() - monopoly_quantity)
+
+    def lerner_index():
+        markup = monopoly_price - (m + k * monopoly_quantity)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(monopoly_price > 0, markup / monopoly_price, np.nan)
+
+    return {
+        "monopoly_quantity": lambda: monopoly_quantity,
+        "monopoly_price": lambda: monopoly_price,
+        "marginal_revenue": lambda: a - 2 * b * monopoly_quantity,
+        "competitive_quantity": competitive_quantity,
+        "competitive_price": lambda: a - b * competitive_quantity(),
+        "consumer_surplus": lambda: 0.5 * b * monopoly_quantity**2,
+        "monopoly_profit": lambda: (
+            (monopoly_price - m) * monopoly_quantity - 0.5 * k * monopoly_quantity**2 - f
+        ),
+        "deadweight_loss": deadweight_loss,
+        "lerner_index": lerner_index,
+    }
+
+
+@monopoly.curves
+def monopoly_curves(
+    demand_intercept, demand_slope, marginal_cost, marginal_cost_slope, fixed_cost, points
+):
+    q = np.linspace(0.0, demand_intercept / demand_slope, points)
+    mr_q = q[q <= demand_intercept / (2 * demand_slope)]
+    return {
+        "average_revenue": (q, demand_intercept - demand_slope * q),
+        "marginal_revenue": (mr_q, demand_intercept - 2 * demand_slope * mr_q),
+        "marginal_cost": (q, marginal_cost + marginal_cost_slope * q),
+    }
+
+
+# Quarter-ellipse frontier y = max_y * sqrt(1 - (x / max_x)^2)
+@model(
+    "ppf",
+    "Production possibility frontier between two goods, with technology growth",
+    [
+        Parameter("max_x", "Maximum output of good X", 100, 1, 100000),
+        Parameter("max_y", "Maximum output of good Y", 100, 1, 100000),
+        Parameter("x", "Current output of good X", 50, 0, 100000),
+        Parameter("tech_shift", "Technology improvement (added to both maxima)", 0, 0, 100000),
+    ],
+)
+def ppf(max_x, max_y, x, tech_shift):
+    max_x, max_y, x, tech_shift = _arrays(max_x, max_y, x, tech_shift)
+    share = np.clip(x / max_x, 0.0, 1.0)
+    root = np.sqrt(1 - share**2)
+
+    def opportunity_cost():
+        # Units of Y given up per extra unit of X: -dy/dx along the frontier
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(root > 0, max_y * share / (max_x * root), np.inf)
+
+    def y_with_tech():
+        tech_share = np.clip(x / (max_x + tech_shift), 0.0, 1.0)
+        return (max_y + tech_shift) * np.sqrt(1 - tech_share**2)
+
+    return {
+        "y": lambda: max_y * root,
+        "opportunity_cost": opportunity_cost,
+        "y_with_tech": y_with_tech,
+        "attainable": lambda: (x <= max_x).astype(float),
+    }
+
+
+@ppf.curves
+def ppf_curves(max_x, max_y, x, tech_shift, points):
+    # Even steps in angle put more points where the frontier bends
+    theta = np.linspace(0.0, np.pi / 2, points)
+    curves = {"frontier": (max_x * np.cos(theta), max_y * np.sin(theta))}
+    if tech_shift:
+        curves["frontier_with_tech"] = (
+            (max_x + tech_shift) * np.cos(theta),
+            (max_y + tech_shift) * np.sin(theta),
+        )
+    return curves
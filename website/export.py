@@ -0,0 +1,186 @@
+import csv
+import io
+import json
+from flask import Blueprint, Response, stream_with_context, flash, redirect, url_for
+from flask_login import login_required, current_user
+from sqlalchemy import select
+from .models import (
+    Class,
+    ClassMembership,
+    User,
+    QuestionSet,
+    Question,
+    ChatMessage,
+    Assignment,
+    can_access_question_set,
+)
+from . import db
+
+export = Blueprint("export", __name__)
+
+# Number of rows pulled from the database per round trip while streaming
+EXPORT_BATCH_SIZE = 500
+EXPORT_FORMATS = ("csv", "json")
+
+
+def stream_rows(statement, columns):
+    """
+    Page through a select statement with yield_per so only one batch of
+    rows is held in memory at a time.
+
+    Args:
+        statement: SQLAlchemy select returning plain columns
+        columns: Names for each selected column
+
+    Yields:
+        Dictionaries mapping column name to value
+    """
+    result = db.session.execute(
+        statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for row in result:
+        yield dict(zip(columns, row))
+
+
+def _format_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def generate_csv(rows, columns):
+    """Yield CSV text one line at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerow([_format_value(row[c]) for c in columns])
+        yield buffer.getvalue()
+
+
+def generate_json(rows):
+    """Yield a JSON array one element at a time"""
+    yield "["
+    first = True
+    for row in rows:
+        item = json.dumps({k: _format_value(v) for k, v in row.items()})
+        yield item if first else "," + item
+        first = False
+    yield "]"
+
+
+def streaming_export(statement, columns, fmt, filename):
+    """Build a streamed download response for a select statement"""
+    rows = stream_rows(statement, columns)
+    if fmt == "csv":
+        body = generate_csv(rows, columns)
+        mimetype = "text/csv"
+    else:
+        body = generate_json(rows)
+        mimetype = "application/json"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt}"'
+        },
+    )
+
+
+def _teacher_class_or_none(class_id):
+    class_obj = Class.query.get_or_404(class_id)
+    if class_obj.teacher_id != current_user.id:
+        return None
+    return class_obj
+
+
+@export.route("/question_set/<int:set_id>/<fmt>")
+@login_required
+def export_question_set(set_id, fmt):
+    """Export the questions and answers of a question set"""
+    if fmt not in EXPORT_FORMATS:
+        flash("Unsupported export format.", "error")
+        return redirect(url_for("tests.question_sets"))
+
+    question_set = QuestionSet.query.get_or_404(set_id)
+    if not can_access_question_set(question_set, current_user):
+        flash("You don't have access to this question set.", "error")
+        return redirect(url_for("tests.question_sets"))
+
+    columns = ["id", "question", "answer"]
+    statement = question_set.effective_questions_statement().with_only_columns(
+        Question.id, Question.question, Question.answer
+    )
+    return streaming_export(
+        statement, columns, fmt, f"question_set_{set_id}"
+    )
+
+
+@export.route("/class/<int:class_id>/roster/<fmt>")
+@login_required
+def export_roster(class_id, fmt):
+    """Export the students enrolled in a class (teacher only)"""
+    class_obj = _teacher_class_or_none(class_id)
+    if class_obj is None or fmt not in EXPORT_FORMATS:
+        flash("Only the class teacher can export class data.", "danger")
+        return redirect(url_for("classes.class_detail", class_id=class_id))
+
+    columns = ["user_id", "username", "role", "joined_at"]
+    statement = (
+        select(User.id, User.username, User.role, ClassMembership.joined_at)
+        .join(ClassMembership, ClassMembership.user_id == User.id)
+        .where(ClassMembership.class_id == class_id)
+        .order_by(User.username)
+    )
+    return streaming_export(statement, columns, fmt, f"class_{class_id}_roster")
+
+
+@export.route("/class/<int:class_id>/assignments/<fmt>")
+@login_required
+def export_assignments(class_id, fmt):
+    """Export all assignments set for a class (teacher only)"""
+    class_obj = _teacher_class_or_none(class_id)
+    if class_obj is None or fmt not in EXPORT_FORMATS:
+        flash("Only the class teacher can export class data.", "danger")
+        return redirect(url_for("classes.class_detail", class_id=class_id))
+
+    columns = ["id", "title", "description", "due_date", "created_at", "attachment_url"]
+    statement = (
+        select(
+            Assignment.id,
+            Assignment.title,
+            Assignment.description,
+            Assignment.due_date,
+            Assignment.created_at,
+            Assignment.attachment_url,
+        )
+        .where(Assignment.class_id == class_id)
+        .order_by(Assignment.id)
+    )
+    return streaming_export(
+        statement, columns, fmt, f"class_{class_id}_assignments"
+    )
+
+
+@export.route("/class/<int:class_id>/chat/<fmt>")
+@login_required
+def export_chat(class_id, fmt):
+    """Export the full chat log of a class (teacher only)"""
+    class_obj = _teacher_class_or_none(class_id)
+    if class_obj is None or fmt not in EXPORT_FORMATS:
+        flash("Only the class teacher can export class data.", "danger")
+        return redirect(url_for("classes.class_detail", class_id=class_id))
+
+    columns = ["id", "timestamp", "username", "message"]
+    statement = (
+        select(
+            ChatMessage.id, ChatMessage.timestamp, User.username, ChatMessage.message
+        )
+        .join(User, User.id == ChatMessage.user_id)
+        .where(ChatMessage.class_id == class_id)
+        .order_by(ChatMessage.id)
+    )
+    return streaming_export(statement, columns, fmt, f"class_{class_id}_chat")
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import OrderedDict
+from markupsafe import Markup
+from sqlalchemy import event, select, text, union
+from .models import Assignment, Class, ClassMembership, DataVersion, Question, QuestionSet
+from . import db
+
+# Models whose writes invalidate cached fragments
+TRACKED_MODELS = (Class, ClassMembership, QuestionSet, Assignment, Question)
+FRAGMENT_CACHE_SIZE = 2048
+FRAGMENT_CACHE_TTL = 300
+
+_BUMP_VERSION = text(
+    "INSERT INTO data_version (name, version) VALUES (:name, 1) "
+    "ON CONFLICT(name) DO UPDATE SET version = version + 1"
+)
+
+
+class FragmentCache:
+    """
+    Rendered HTML fragments keyed by fragment name, user and data version.
+
+    Versions live in the data_version table and are bumped in the same
+    transaction as any write to a tracked model, so every worker process
+    sees the invalidation as soon as the write commits. Each user has their
+    own version per table, bumped only by writes to rows they can see, so
+    one teacher's edits don't invalidate everyone else's fragments.
+    """
+
+    def __init__(self, max_entries=FRAGMENT_CACHE_SIZE, ttl=FRAGMENT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def render(self, name, user_id, models, render):
+        """
+        Return a cached fragment, or render and cache it.
+
+        Args:
+            name: Fragment name
+            user_id: Id of the user the fragment was rendered for
+            models: Models whose data the fragment shows
+            render: Callable producing the fragment's HTML on a miss
+        """
+        # Versions are read before rendering so a concurrent write can only
+        # leave newer data under an older key, never the reverse
+        key = (name, user_id, data_versions(models, user_id))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        html = Markup(render())
+        with self._lock:
+            self._entries[key] = (now, html)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+
+fragment_cache = FragmentCache()
+
+
+def data_versions(models, user_id):
+    """Versions of the given tables as seen by one user"""
+    names = sorted(
+        name
+        for model in models
+        for name in (f"{model.__tablename__}:*", f"{model.__tablename__}:{user_id}")
+    )
+    versions = dict(
+        db.session.execute(
+            select(DataVersion.name, DataVersion.version).where(
+                DataVersion.name.in_(names)
+            )
+        ).all()
+    )
+    return tuple((name, versions.get(name, 0)) for name in names)
+
+
+def bump_data_versions(session, models, user_ids=None):
+    """
+    Record a write to these models: bump each table's own version and
+    invalidate the fragments of the given users, or of every user if none
+    are given. Core-level bulk writes skip the ORM flush hook below and
+    must call this themselves.
+    """
+    tables = sorted({model.__tablename__ for model in models})
+    scopes = ["*"] if user_ids is None else sorted(set(user_ids))
+    for table in tables:
+        session.connection().execute(_BUMP_VERSION, {"name": table})
+        for scope in scopes:
+            session.connection().execute(_BUMP_VERSION, {"name": f"{table}:{scope}"})
+
+
+def _set_owners(connection, set_ids):
+    """Owners of these sets and of every set cloned from them"""
+    sets = (
+        select(QuestionSet.id, QuestionSet.user_id)
+        .where(QuestionSet.id.in_(set_ids))
+        .cte("sets", recursive=True)
+    )
+    sets = sets.union(
+        select(QuestionSet.id, QuestionSet.user_id).join(
+            sets, QuestionSet.source_set_id == sets.c.id
+        )
+    )
+    return connection.execute(select(sets.c.user_id)).scalars()
+
+
+def _class_users(connection, class_ids):
+    """Teachers and members of these classes"""
+    return connection.execute(
+        union(
+            select(Class.teacher_id).where(Class.id.in_(class_ids)),
+            select(ClassMembership.user_id).where(ClassMembership.class_id.in_(class_ids)),
+        )
+    ).scalars()
+
+
+@event.listens_for(db.session, "after_flush")
+def _bump_versions(session, flush_context):
+    # Users who can see each touched model's rows: set owners (and owners of
+    # clones, which show inherited questions) or class teachers and members
+    set_ids, class_ids, users = {}, {}, {}
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(instance, TRACKED_MODELS):
+            continue
+        model = type(instance)
+        users.setdefault(model, set())
+        if isinstance(instance, QuestionSet):
+            set_ids.setdefault(model, set()).add(instance.id)
+            users[model].add(instance.user_id)
+        elif isinstance(instance, Question):
+            set_ids.setdefault(model, set()).add(instance.question_set_id)
+        elif isinstance(instance, Class):
+            class_ids.setdefault(model, set()).add(instance.id)
+            users[model].add(instance.teacher_id)
+        else:
+            class_ids.setdefault(model, set()).add(instance.class_id)
+            if isinstance(instance, ClassMembership):
+                users[model].add(instance.user_id)
+
+    connection = session.connection()
+    for model, ids in set_ids.items():
+        users[model].update(_set_owners(connection, ids))
+    for model, ids in class_ids.items():
+        users[model].update(_class_users(connection, ids))
+    for model, user_ids in users.items():
+        bump_data_versions(session, [model], {i for i in user_ids if i is not None})
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+GRAPH_DIR = os.path.join(os.path.dirname(__file__), "simulator_graphs")
+GRAPH_ID = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+
+Graph = namedtuple("Graph", "id title description order payload etag")
+
+
+class GraphDefinitionError(ValueError):
+    """A graph definition file is malformed"""
+
+
+def validate_definition(definition):
+    """
+    Check the parts of a kg definition the simulator relies on.
+
+    Raises:
+        GraphDefinitionError: Describing the first problem found
+    """
+    if not isinstance(definition, dict):
+        raise GraphDefinitionError("definition must be an object")
+    if not isinstance(definition.get("schema"), str):
+        raise GraphDefinitionError("definition.schema must be a string")
+    if not isinstance(definition.get("layout"), dict) or len(definition["layout"]) != 1:
+        raise GraphDefinitionError("definition.layout must name exactly one layout")
+
+    names = set()
+    for i, param in enumerate(definition.get("params", [])):
+        missing = {"name", "value", "min", "max"} - set(param)
+        if missing:
+            raise GraphDefinitionError(f"params[{i}] is missing {', '.join(sorted(missing))}")
+        if param["name"] in names:
+            raise GraphDefinitionError(f"params[{i}] repeats the name {param['name']}")
+        if not param["min"] <= param["value"] <= param["max"]:
+            raise GraphDefinitionError(f"params[{i}] value is outside min..max")
+        names.add(param["name"])
+
+    # Every slider must drive a declared param
+    layout = next(iter(definition["layout"].values()))
+    for control in layout.get("sidebar", {}).get("controls", []):
+        for slider in control.get("sliders", []):
+            if slider.get("param") not in names:
+                raise GraphDefinitionError(f"slider for unknown param {slider.get('param')}")
+
+
+class GraphRegistry:
+    """
+    kg graph definitions loaded from JSON files at startup.
+
+    Each <id>.json file holds a title, an optional description and sort
+    order, and the kg definition itself. Definitions are validated once and
+    kept as minified JSON with an ETag, so the simulator page can fetch
+    only the graph a student opens.
+    """
+
+    def __init__(self):
+        self.graphs = {}
+
+    def load(self, directory=GRAPH_DIR):
+        graphs = {}
+        for filename in sorted(os.listdir(directory)):
+            graph_id, ext = os.path.splitext(filename)
+            if ext != ".json":
+                continue
+            if not GRAPH_ID.match(graph_id):
+                raise GraphDefinitionError(
+                    f"{filename}: ids must be lowercase letters, digits and '-'"
+                )
+            with open(os.path.join(directory, filename)) as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError as e:
+                    raise GraphDefinitionError(f"{filename}: {e}") from None
+            try:
+                if not isinstance(data.get("title"), str):
+                    raise GraphDefinitionError("title must be a string")
+                validate_definition(data.get("definition"))
+            except GraphDefinitionError as e:
+                raise GraphDefinitionError(f"{filename}: {e}") from None
+
+            payload = json.dumps(data["definition"], separators=(",", ":")).encode()
+            graphs[graph_id] = Graph(
+                id=graph_id,
+                title=data["title"],
+                description=data.get("description", ""),
+                order=data.get("order", 0),
+                payload=payload,
+                etag=hashlib.sha256(payload).hexdigest()[:16],
+            )
+        self.graphs = graphs
+
+    def get(self, graph_id):
+        return self.graphs.get(graph_id)
+
+    def ordered(self):
+        return sorted(self.graphs.values(), key=lambda graph: (graph.order, graph.title))
+
+
+graph_registry = GraphRegistry()
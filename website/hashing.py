@@ -0,0 +1,139 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+DEFAULT_HASH_METHOD = "pbkdf2:sha256"
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full; the request should be retried"""
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+def normalise_method(method):
+    """Spell out a werkzeug hash method with its default parameters"""
+    parts = method.split(":")
+    if parts[0] == "pbkdf2":
+        digest = parts[1] if len(parts) > 1 else "sha256"
+        iterations = parts[2] if len(parts) > 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{digest}:{iterations}"
+    if parts[0] == "scrypt":
+        defaults = ["32768", "8", "1"]
+        params = parts[1:] + defaults[len(parts) - 1 :]
+        return "scrypt:" + ":".join(params[:3])
+    return method
+
+
+def _generate(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+class PasswordHasher:
+    """
+    Runs password hashing in a bounded process pool.
+
+    At most PASSWORD_HASH_QUEUE_LIMIT hashes may be running or waiting at
+    once; beyond that HashingBusy is raised straight away so a login storm
+    can't tie up every request thread. Set PASSWORD_HASH_WORKERS to 0 to
+    hash inline (useful for tests and CLI commands).
+    """
+
+    def __init__(self, app=None):
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        self._slots = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = os.cpu_count() or 1
+        app.config.setdefault(
+            "PASSWORD_HASH_METHOD",
+            os.environ.get("PASSWORD_HASH_METHOD", DEFAULT_HASH_METHOD),
+        )
+        app.config.setdefault("PASSWORD_HASH_WORKERS", workers)
+        app.config.setdefault("PASSWORD_HASH_QUEUE_LIMIT", workers * 4)
+        app.config.setdefault("PASSWORD_HASH_TIMEOUT", 30)
+        app.config.setdefault("PASSWORD_HASH_RETRY_AFTER", 5)
+        self._slots = threading.BoundedSemaphore(app.config["PASSWORD_HASH_QUEUE_LIMIT"])
+        app.extensions["password_hasher"] = self
+
+        @app.errorhandler(HashingBusy)
+        def hashing_busy(error):
+            return (
+                "The server is busy signing other users in. Please try again shortly.",
+                503,
+                {"Retry-After": str(error.retry_after)},
+            )
+
+    @property
+    def method(self):
+        return current_app.config["PASSWORD_HASH_METHOD"]
+
+    def _get_pool(self):
+        # A forked worker process must not reuse its parent's pool
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=current_app.config["PASSWORD_HASH_WORKERS"]
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args):
+        if current_app.config["PASSWORD_HASH_WORKERS"] == 0:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(current_app.config["PASSWORD_HASH_RETRY_AFTER"])
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=current_app.config["PASSWORD_HASH_TIMEOUT"])
+        except FutureTimeout:
+            # The pool is backed up; answer 503 rather than a 500
+            future.cancel()
+            raise HashingBusy(current_app.config["PASSWORD_HASH_RETRY_AFTER"])
+
+    def generate(self, password):
+        """Hash a password with the configured method"""
+        return self._run(_generate, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(_verify, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if a stored hash was made with different parameters"""
+        stored_method = pwhash.split("$", 1)[0]
+        return stored_method != normalise_method(self.method)
+
+    def map_generate(self, passwords, pool=None, chunksize=32):
+        """
+        Hash many passwords, preserving order. Intended for CLI use: pass a
+        ProcessPoolExecutor to spread the work across cores. The request
+        queue limit does not apply.
+        """
+        methods = [self.method] * len(passwords)
+        if pool is None:
+            return list(map(_generate, passwords, methods))
+        return list(pool.map(_generate, passwords, methods, chunksize=chunksize))
+
+
+password_hasher = PasswordHasher()
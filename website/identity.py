@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from sqlalchemy import event, inspect, select
+from .models import User
+from . import db
+
+# How long a loaded identity is trusted before it is re-read from the database
+IDENTITY_CACHE_TTL = 30
+IDENTITY_CACHE_SIZE = 10000
+
+
+class UserSnapshot(UserMixin):
+    """Lightweight stand-in for User holding only what requests need"""
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    @property
+    def is_teacher(self):
+        return self.role == "teacher"
+
+    @property
+    def is_student(self):
+        return self.role == "student"
+
+
+class IdentityCache:
+    """
+    Short-lived in-process cache behind Flask-Login's user_loader.
+
+    Entries are dropped as soon as this process changes a user's role,
+    password or username; other worker processes pick the change up when
+    their entry expires.
+    """
+
+    def __init__(self, ttl=IDENTITY_CACHE_TTL, max_entries=IDENTITY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def load(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        row = db.session.execute(
+            select(User.id, User.username, User.role).where(User.id == user_id)
+        ).first()
+        if row is None:
+            self.invalidate(user_id)
+            return None
+
+        snapshot = UserSnapshot(*row)
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+identity_cache = IdentityCache()
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_changed_identity(mapper, connection, target):
+    state = inspect(target)
+    if any(
+        state.attrs[name].history.has_changes()
+        for name in ("role", "password", "username")
+    ):
+        identity_cache.invalidate(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_identity(mapper, connection, target):
+    identity_cache.invalidate(target.id)
@@ -0,0 +1,367 @@
+import secrets
+import threading
+import time
+from collections import deque
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; the dev server is one process there
+    fcntl = None
+
+MECHANISMS = ("double_auction", "posted_price")
+MAX_AGENTS_PER_SIDE = 5000
+MAX_ROUNDS_PER_STEP = 100
+# Round summaries kept per market for late joiners and stream resumes
+ROUND_HISTORY = 1000
+MAX_MARKETS = 100
+MAX_MARKETS_PER_USER = 3
+# Markets nobody has touched for this long are dropped
+MARKET_IDLE_SECONDS = 2 * 3600
+
+
+class MarketError(ValueError):
+    """A market request that can't be carried out (full, bad order, ...)"""
+
+
+def max_surplus(values, costs):
+    """Largest total surplus any allocation of one unit per agent can reach"""
+    n = min(len(values), len(costs))
+    gains = np.sort(values)[::-1][:n] - np.sort(costs)[:n]
+    return float(gains[gains > 0].sum())
+
+
+def clear_double_auction(bids, asks):
+    """
+    Uniform-price call market.
+
+    Bids are sorted high to low and asks low to high; the k-th pair trades
+    while bid >= ask. The price is the midpoint of the range that clears
+    exactly those k units.
+
+    Returns:
+        (price, buyer indices, seller indices); price is None with no trade
+    """
+    buyer_order = np.argsort(-bids, kind="stable")
+    seller_order = np.argsort(asks, kind="stable")
+    sorted_bids = bids[buyer_order]
+    sorted_asks = asks[seller_order]
+    n = min(len(bids), len(asks))
+    # bid - ask falls along the sorted pairs, so the matches are a prefix
+    k = int(np.count_nonzero(sorted_bids[:n] >= sorted_asks[:n]))
+    if k == 0:
+        return None, buyer_order[:0], seller_order[:0]
+
+    low = sorted_asks[k - 1]
+    high = sorted_bids[k - 1]
+    if k < len(sorted_bids):
+        low = max(low, sorted_bids[k])
+    if k < len(sorted_asks):
+        high = min(high, sorted_asks[k])
+    return float((low + high) / 2), buyer_order[:k], seller_order[:k]
+
+
+def clear_posted_price(bids, asks, price, rng):
+    """
+    Everyone willing to trade at the posted price queues up; the long side
+    of the market is rationed at random.
+
+    Returns:
+        (price, buyer indices, seller indices); price is None with no trade
+    """
+    buyers = np.flatnonzero(bids >= price)
+    sellers = np.flatnonzero(asks <= price)
+    volume = min(len(buyers), len(sellers))
+    if volume == 0:
+        return None, buyers[:0], sellers[:0]
+    return float(price), rng.permutation(buyers)[:volume], rng.permutation(sellers)[:volume]
+
+
+class Market:
+    """
+    One-unit-per-agent trading game between buyers and sellers.
+
+    Every agent has a private reservation price: a value for buyers, a cost
+    for sellers. In double auctions bots follow the zero-intelligence
+    constrained strategy, bidding uniformly between the price floor and
+    their value (asking between their cost and the ceiling), so they never
+    trade at a loss. At a posted price there is nothing to bid, so bots
+    take the price whenever it doesn't exceed their value (isn't below
+    their cost).
+    Students who join take over a bot's seat and submit their own order
+    each round. Each step draws all bot orders and clears the round with
+    array operations only.
+
+    State is held in this process; MarketRegistry.claim_host makes sure
+    only one worker serves markets.
+    """
+
+    def __init__(
+        self,
+        owner_id,
+        buyers=500,
+        sellers=500,
+        value_range=(10.0, 100.0),
+        cost_range=(10.0, 100.0),
+        mechanism="double_auction",
+        posted_price=None,
+        seed=None,
+    ):
+        if not (1 <= buyers <= MAX_AGENTS_PER_SIDE and 1 <= sellers <= MAX_AGENTS_PER_SIDE):
+            raise MarketError(f"Each side needs between 1 and {MAX_AGENTS_PER_SIDE} agents")
+        if mechanism not in MECHANISMS:
+            raise MarketError(f"Mechanism must be one of {', '.join(MECHANISMS)}")
+        for low, high in (value_range, cost_range):
+            if not 0 <= low <= high:
+                raise MarketError("Price ranges must satisfy 0 <= low <= high")
+
+        self.id = secrets.token_urlsafe(6)
+        self.owner_id = owner_id
+        self.mechanism = mechanism
+        self.price_floor = float(min(value_range[0], cost_range[0]))
+        self.price_ceiling = float(max(value_range[1], cost_range[1]))
+        if mechanism == "posted_price":
+            if posted_price is None or not self.price_floor <= posted_price <= self.price_ceiling:
+                raise MarketError("A posted-price market needs a price inside the value/cost range")
+            posted_price = float(posted_price)
+        self.posted_price = posted_price
+
+        self._rng = np.random.default_rng(seed)
+        self.values = self._rng.uniform(*value_range, buyers)
+        self.costs = self._rng.uniform(*cost_range, sellers)
+        self.max_surplus = max_surplus(self.values, self.costs)
+
+        # Per-side arrays: human seats, this round's human orders (NaN = none),
+        # running profit and the price of each agent's last trade (NaN = none)
+        self.sides = {
+            side: {
+                "reservation": reservation,
+                "human": np.zeros(len(reservation), dtype=bool),
+                "orders": np.full(len(reservation), np.nan),
+                "profit": np.zeros(len(reservation)),
+                "last_price": np.full(len(reservation), np.nan),
+            }
+            for side, reservation in (("buyer", self.values), ("seller", self.costs))
+        }
+        self.participants = {}
+        self.round = 0
+        self.history = deque(maxlen=ROUND_HISTORY)
+        self.last_active = time.monotonic()
+        self._lock = threading.Lock()
+        self._new_round = threading.Condition(self._lock)
+
+    def join(self, user_id):
+        """
+        Give a user a bot's seat, on whichever side has fewer humans.
+
+        Returns:
+            (side, index) of the user's seat
+        """
+        with self._lock:
+            self.last_active = time.monotonic()
+            if user_id in self.participants:
+                return self.participants[user_id]
+            humans = {side: int(arrays["human"].sum()) for side, arrays in self.sides.items()}
+            for side in sorted(self.sides, key=lambda side: humans[side]):
+                bots = np.flatnonzero(~self.sides[side]["human"])
+                if len(bots):
+                    index = int(bots[0])
+                    self.sides[side]["human"][index] = True
+                    self.participants[user_id] = (side, index)
+                    return side, index
+            raise MarketError("Every seat in this market is taken")
+
+    def submit(self, user_id, price):
+        """Set a participant's order for the next round"""
+        with self._lock:
+            self.last_active = time.monotonic()
+            if user_id not in self.participants:
+                raise MarketError("Join the market before trading")
+            if not (np.isfinite(price) and self.price_floor <= price <= self.price_ceiling):
+                raise MarketError(
+                    f"Orders must be between {self.price_floor:g} and {self.price_ceiling:g}"
+                )
+            side, index = self.participants[user_id]
+            self.sides[side]["orders"][index] = price
+
+    def step(self, rounds=1):
+        """
+        Clear one or more rounds.
+
+        Human orders apply to the next round only; humans without an order
+        sit that round out.
+
+        Returns:
+            List of the new round summaries
+        """
+        if not 1 <= rounds <= MAX_ROUNDS_PER_STEP:
+            raise MarketError(f"Step between 1 and {MAX_ROUNDS_PER_STEP} rounds at a time")
+        with self._lock:
+            self.last_active = time.monotonic()
+            summaries = [self._clear_round() for _ in range(rounds)]
+            self._new_round.notify_all()
+        return summaries
+
+    def _clear_round(self):
+        started = time.perf_counter()
+        buyer, seller = self.sides["buyer"], self.sides["seller"]
+        if self.mechanism == "posted_price":
+            bot_bids, bot_asks = buyer["reservation"], seller["reservation"]
+        else:
+            bot_bids = self._rng.uniform(self.price_floor, buyer["reservation"])
+            bot_asks = self._rng.uniform(seller["reservation"], self.price_ceiling)
+        bids = np.where(buyer["human"], buyer["orders"], bot_bids)
+        asks = np.where(seller["human"], seller["orders"], bot_asks)
+        # Humans who didn't order have NaN and are left out
+        bidders = np.flatnonzero(~np.isnan(bids))
+        askers = np.flatnonzero(~np.isnan(asks))
+        if self.mechanism == "posted_price":
+            price, buyers, sellers = clear_posted_price(
+                bids[bidders], asks[askers], self.posted_price, self._rng
+            )
+        else:
+            price, buyers, sellers = clear_double_auction(bids[bidders], asks[askers])
+        buyers, sellers = bidders[buyers], askers[sellers]
+
+        if price is not None:
+            buyer["profit"][buyers] += buyer["reservation"][buyers] - price
+            seller["profit"][sellers] += price - seller["reservation"][sellers]
+            buyer["last_price"][buyers] = price
+            seller["last_price"][sellers] = price
+        buyer["orders"][:] = np.nan
+        seller["orders"][:] = np.nan
+
+        surplus = float(buyer["reservation"][buyers].sum() - seller["reservation"][sellers].sum())
+        self.round += 1
+        summary = {
+            "round": self.round,
+            "price": price,
+            "volume": len(buyers),
+            "surplus": surplus,
+            "efficiency": surplus / self.max_surplus if self.max_surplus else None,
+            "bids": len(bidders),
+            "asks": len(askers),
+            "human_trades": int(buyer["human"][buyers].sum() + seller["human"][sellers].sum()),
+            "clear_ms": (time.perf_counter() - started) * 1000,
+        }
+        self.history.append(summary)
+        return summary
+
+    def rounds_after(self, round_number, timeout=0):
+        """
+        Summaries of rounds after round_number, waiting up to timeout
+        seconds for a new round if there are none yet.
+        """
+        with self._lock:
+            if self.round <= round_number and timeout:
+                self._new_round.wait_for(lambda: self.round > round_number, timeout)
+            return [summary for summary in self.history if summary["round"] > round_number]
+
+    def state(self, user_id=None):
+        """Market settings, the latest round and, for a participant, their seat"""
+        with self._lock:
+            state = {
+                "id": self.id,
+                "mechanism": self.mechanism,
+                "posted_price": self.posted_price,
+                "price_floor": self.price_floor,
+                "price_ceiling": self.price_ceiling,
+                "buyers": len(self.values),
+                "sellers": len(self.costs),
+                "participants": len(self.participants),
+                "max_surplus": self.max_surplus,
+                "round": self.round,
+                "last_round": self.history[-1] if self.history else None,
+                "seat": None,
+            }
+            if user_id in self.participants:
+                side, index = self.participants[user_id]
+                arrays = self.sides[side]
+                last_price = arrays["last_price"][index]
+                order = arrays["orders"][index]
+                state["seat"] = {
+                    "side": side,
+                    "reservation_price": float(arrays["reservation"][index]),
+                    "pending_order": None if np.isnan(order) else float(order),
+                    "profit": float(arrays["profit"][index]),
+                    "last_trade_price": None if np.isnan(last_price) else float(last_price),
+                }
+            return state
+
+
+class MarketRegistry:
+    """
+    Live markets by id, dropping idle ones and capping how many exist in
+    total and per teacher.
+
+    Markets live in memory, so with several workers a student's requests
+    could land on a process that has never heard of their market. Only the
+    process holding the host lock (see claim_host) serves them.
+    """
+
+    def __init__(
+        self,
+        max_markets=MAX_MARKETS,
+        max_per_user=MAX_MARKETS_PER_USER,
+        idle_seconds=MARKET_IDLE_SECONDS,
+    ):
+        self.max_markets = max_markets
+        self.max_per_user = max_per_user
+        self.idle_seconds = idle_seconds
+        self.is_host = False
+        self._host_file = None
+        self._lock = threading.Lock()
+        self._markets = {}
+
+    def claim_host(self, path):
+        """
+        Take an exclusive lock on path unless this process already holds it.
+
+        Returns:
+            True if this process hosts markets, False if another one does
+        """
+        with self._lock:
+            if not self.is_host:
+                self.is_host = self._take_lock(path)
+            return self.is_host
+
+    def _take_lock(self, path):
+        if fcntl is None:
+            return True
+        lock_file = open(path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held open for the life of the process; the OS drops the lock on exit
+        self._host_file = lock_file
+        return True
+
+    def create(self, owner_id, **settings):
+        market = Market(owner_id, **settings)
+        with self._lock:
+            now = time.monotonic()
+            for market_id, existing in list(self._markets.items()):
+                if now - existing.last_active > self.idle_seconds:
+                    del self._markets[market_id]
+            owned = sum(1 for existing in self._markets.values() if existing.owner_id == owner_id)
+            if owned >= self.max_per_user:
+                raise MarketError(
+                    f"You can run at most {self.max_per_user} markets at once; close one first"
+                )
+            if len(self._markets) >= self.max_markets:
+                raise MarketError("Too many markets are running; try again later")
+            self._markets[market.id] = market
+        return market
+
+    def get(self, market_id):
+        with self._lock:
+            return self._markets.get(market_id)
+
+    def close(self, market_id):
+        with self._lock:
+            self._markets.pop(market_id, None)
+
+
+market_registry = MarketRegistry()
@@ -0,0 +1,249 @@
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, abort, g, has_request_context, request
+from sqlalchemy import event
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# Without METRICS_TOKEN, /metrics only answers requests from these addresses
+LOCAL_ADDRESSES = ("127.0.0.1", "::1")
+
+# Label used for work done outside any request (e.g. background refreshes)
+BACKGROUND = "background"
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, in Prometheus' layout"""
+
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, label_values, value):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * len(self.buckets) + [0, 0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = _format_labels(self.labels, label_values)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-2]}')
+            lines.append(f"{self.name}_count{{{labels}}} {series[-2]}")
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:.6f}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series = {}
+
+    def inc(self, label_values, amount=1):
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{{{_format_labels(self.labels, label_values)}}} {value}")
+        return lines
+
+
+def _format_labels(names, values):
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+def _gauge(name, help, value, kind="gauge"):
+    return [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or "unmatched"
+    return BACKGROUND
+
+
+class Metrics:
+    """
+    Request instrumentation exposed in Prometheus text format at /metrics.
+
+    Every request records its latency, the number and total time of SQL
+    statements it ran and the time spent on outbound HTTP calls, labelled
+    by endpoint (e.g. "classes.class_chat"). The endpoint only answers
+    requests from this machine unless METRICS_TOKEN is set, in which case
+    it requires "Authorization: Bearer <token>" instead.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.request_latency = Histogram(
+            "econspark_request_duration_seconds",
+            "Time spent handling a request",
+            ("endpoint", "method"),
+            LATENCY_BUCKETS,
+        )
+        self.request_queries = Histogram(
+            "econspark_request_sql_queries",
+            "SQL statements run per request",
+            ("endpoint",),
+            QUERY_COUNT_BUCKETS,
+        )
+        self.requests = Counter(
+            "econspark_requests_total", "Requests handled", ("endpoint", "method", "status")
+        )
+        self.sql_queries = Counter(
+            "econspark_sql_queries_total", "SQL statements executed", ("endpoint",)
+        )
+        self.sql_seconds = Counter(
+            "econspark_sql_seconds_total", "Time spent in SQL statements", ("endpoint",)
+        )
+        self.outbound_calls = Counter(
+            "econspark_outbound_requests_total",
+            "Outbound HTTP calls",
+            ("endpoint", "target", "outcome"),
+        )
+        self.outbound_seconds = Counter(
+            "econspark_outbound_seconds_total",
+            "Time spent waiting on outbound HTTP calls",
+            ("endpoint", "target"),
+        )
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("METRICS_TOKEN", os.environ.get("METRICS_TOKEN"))
+        app.extensions["metrics"] = self
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+        from . import db
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+                event.listen(engine, "handle_error", self._handle_error)
+
+        @app.route("/metrics")
+        def metrics_endpoint():
+            token = app.config["METRICS_TOKEN"]
+            if token:
+                supplied = request.headers.get("Authorization", "")
+                if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+                    abort(401)
+            elif request.remote_addr not in LOCAL_ADDRESSES:
+                abort(403)
+            return Response(
+                self.render(), mimetype="text/plain; version=0.0.4; charset=utf-8"
+            )
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_count = 0
+
+    def _finish_request(self, response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = _endpoint()
+        # Streamed bodies are still being generated at this point; their
+        # latency here covers the work done before the first byte
+        with self._lock:
+            self.request_latency.observe((endpoint, request.method), elapsed)
+            self.request_queries.observe((endpoint,), g.pop("metrics_sql_count", 0))
+            self.requests.inc((endpoint, request.method, response.status_code))
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._record_statement(time.perf_counter() - conn.info["metrics_started"].pop())
+
+    def _handle_error(self, exception_context):
+        # A failed statement never reaches after_cursor_execute; drop its
+        # start time so the connection's next statement isn't mistimed
+        conn = exception_context.connection
+        if conn is None or exception_context.execution_context is None:
+            return
+        stack = conn.info.get("metrics_started")
+        if stack:
+            self._record_statement(time.perf_counter() - stack.pop())
+
+    def _record_statement(self, elapsed):
+        endpoint = _endpoint()
+        if has_request_context() and "metrics_sql_count" in g:
+            g.metrics_sql_count += 1
+        with self._lock:
+            self.sql_queries.inc((endpoint,))
+            self.sql_seconds.inc((endpoint,), elapsed)
+
+    @contextmanager
+    def outbound(self, target):
+        """Time an outbound HTTP call made inside the block"""
+        endpoint = _endpoint()
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.outbound_calls.inc((endpoint, target, outcome))
+                self.outbound_seconds.inc((endpoint, target), elapsed)
+
+    def render(self):
+        from .compression import compression
+        from .economics import sweep_cache
+        from .fragments import fragment_cache
+        from .identity import identity_cache
+
+        with self._lock:
+            lines = []
+            for metric in (
+                self.request_latency,
+                self.requests,
+                self.request_queries,
+                self.sql_queries,
+                self.sql_seconds,
+                self.outbound_calls,
+                self.outbound_seconds,
+            ):
+                lines.extend(metric.render())
+        lines.extend(compression.render())
+
+        for prefix, stats in (
+            ("econspark_identity_cache", identity_cache.stats()),
+            ("econspark_fragment_cache", fragment_cache.stats()),
+            ("econspark_sweep_cache", sweep_cache.stats()),
+        ):
+            lines.extend(_gauge(f"{prefix}_hits_total", "Cache hits", stats["hits"], "counter"))
+            lines.extend(_gauge(f"{prefix}_misses_total", "Cache misses", stats["misses"], "counter"))
+            lines.extend(_gauge(f"{prefix}_entries", "Entries currently cached", stats["size"]))
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
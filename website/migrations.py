@@ -0,0 +1,120 @@
+import logging
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+# (version, description, apply) in the order they were written. New tables
+# come from db.create_all(); migrations cover changes to existing tables.
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(apply):
+        MIGRATIONS.append((version, description, apply))
+        return apply
+
+    return register
+
+
+def add_column(connection, table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN, skipped if the column already exists"""
+    existing = {c["name"] for c in inspect(connection).get_columns(table)}
+    if column not in existing:
+        connection.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+
+
+@migration(1, "Copy-on-write clone columns")
+def _clone_columns(connection):
+    add_column(connection, "question_set", "source_set_id", "INTEGER REFERENCES question_set (id)")
+    add_column(connection, "question", "source_question_id", "INTEGER REFERENCES question (id)")
+    add_column(connection, "question", "is_removed", "BOOLEAN NOT NULL DEFAULT 0")
+
+
+@migration(2, "Question set change timestamps")
+def _question_set_updated_at(connection):
+    add_column(connection, "question_set", "updated_at", "DATETIME")
+
+
+@migration(3, "Indexes on foreign keys")
+def _foreign_key_indexes(connection):
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_class_membership_user_class ON class_membership (user_id, class_id)",
+        "CREATE INDEX IF NOT EXISTS ix_class_membership_class_id ON class_membership (class_id)",
+        "CREATE INDEX IF NOT EXISTS ix_class_question_sets_class_set ON class_question_sets (class_id, question_set_id)",
+        "CREATE INDEX IF NOT EXISTS ix_class_question_sets_question_set_id ON class_question_sets (question_set_id)",
+        "CREATE INDEX IF NOT EXISTS ix_question_set_source_set_id ON question_set (source_set_id)",
+        "CREATE INDEX IF NOT EXISTS ix_question_question_set_id ON question (question_set_id)",
+        "CREATE INDEX IF NOT EXISTS ix_question_source_question_id ON question (source_question_id)",
+        "CREATE INDEX IF NOT EXISTS ix_question_user_id ON question (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_chat_message_class_timestamp ON chat_message (class_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_chat_message_user_id ON chat_message (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_assignment_class_id ON assignment (class_id)",
+        "CREATE INDEX IF NOT EXISTS ix_assignment_creator_id ON assignment (creator_id)",
+        "CREATE INDEX IF NOT EXISTS ix_quiz_attempt_user_id ON quiz_attempt (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_quiz_attempt_question_id ON quiz_attempt (question_id)",
+        "CREATE INDEX IF NOT EXISTS ix_quiz_attempt_set_user ON quiz_attempt (question_set_id, user_id)",
+    ):
+        connection.execute(text(statement))
+
+
+@migration(4, "Question change timestamps")
+def _question_updated_at(connection):
+    add_column(connection, "question", "updated_at", "DATETIME")
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_question_updated_at ON question (updated_at)")
+    )
+
+
+@migration(5, "Clone horizons")
+def _cloned_through(connection):
+    add_column(connection, "question_set", "cloned_through", "INTEGER")
+
+
+def _current_version(connection):
+    return connection.execute(
+        text("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    ).scalar()
+
+
+def upgrade(engine):
+    """
+    Apply any migrations newer than the database's schema_version.
+
+    Every migration checks before it changes anything, so running one
+    against a database that db.create_all() has just built is harmless.
+
+    Returns:
+        List of (version, description) applied
+    """
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_version ("
+                "version INTEGER PRIMARY KEY, description TEXT NOT NULL, "
+                "applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+
+    applied = []
+    for version, description, apply in sorted(MIGRATIONS, key=lambda m: m[0]):
+        with engine.begin() as connection:
+            # Another worker may have got here first
+            if _current_version(connection) >= version:
+                continue
+            apply(connection)
+            connection.execute(
+                text(
+                    "INSERT OR IGNORE INTO schema_version (version, description) "
+                    "VALUES (:version, :description)"
+                ),
+                {"version": version, "description": description},
+            )
+        logger.info("Applied migration %s: %s", version, description)
+        applied.append((version, description))
+    return applied
+
+
+def schema_version(engine):
+    with engine.connect() as connection:
+        return _current_version(connection)
+
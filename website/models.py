@@ -1,13 +1,20 @@
 from website import db
 from flask_login import UserMixin
+from datetime import datetime, timezone
 import string
 import random
 
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
 # Association table for sharing question sets with classes
 class_question_sets = db.Table(
     "class_question_sets",
     db.Column("class_id", db.Integer, db.ForeignKey("class.id")),
     db.Column("question_set_id", db.Integer, db.ForeignKey("question_set.id")),
+    db.Index("ix_class_question_sets_class_set", "class_id", "question_set_id"),
+    db.Index("ix_class_question_sets_question_set_id", "question_set_id"),
 )
 
 
@@ -71,16 +78,33 @@ class Class(db.Model):
 class ClassMembership(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
-    class_id = db.Column(db.Integer, db.ForeignKey("class.id"))
+    class_id = db.Column(db.Integer, db.ForeignKey("class.id"), index=True)
     joined_at = db.Column(db.DateTime(timezone=True), default=db.func.now())
 
+    __table_args__ = (
+        # Also serves lookups by user_id alone
+        db.Index("ix_class_membership_user_class", "user_id", "class_id"),
+    )
+
 
 class QuestionSet(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
     description = db.Column(db.String(500))
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
-    questions = db.relationship("Question", backref="question_set", lazy=True)
+    # Set this one was cloned from; unedited questions are read from it
+    source_set_id = db.Column(db.Integer, db.ForeignKey("question_set.id"), index=True)
+    # Highest question id at clone time; questions first added to the
+    # source after that aren't inherited
+    cloned_through = db.Column(db.Integer)
+    # Bumped whenever the set or any of its questions change
+    updated_at = db.Column(db.DateTime(timezone=True), default=utcnow, onupdate=utcnow)
+    questions = db.relationship(
+        "Question", backref="question_set", lazy=True, foreign_keys="Question.question_set_id"
+    )
+    source_set = db.relationship(
+        "QuestionSet", remote_side=[id], backref=db.backref("clones", lazy=True)
+    )
 
     __table_args__ = (
         db.UniqueConstraint(
@@ -88,23 +112,269 @@ class QuestionSet(db.Model):
         ),
     )
 
+    def lineage(self):
+        """
+        (set id, horizon) for this set followed by the sets it was cloned
+        from. Only rows whose original question id is up to the horizon are
+        inherited from that set; None means no limit.
+        """
+        lineage = [(self.id, None)]
+        source_id, horizon = self.source_set_id, self.cloned_through
+        while source_id is not None and source_id not in (i for i, _ in lineage):
+            lineage.append((source_id, horizon))
+            next_id, cloned_through = db.session.execute(
+                db.select(QuestionSet.source_set_id, QuestionSet.cloned_through).where(
+                    QuestionSet.id == source_id
+                )
+            ).one()
+            if cloned_through is not None:
+                horizon = cloned_through if horizon is None else min(horizon, cloned_through)
+            source_id = next_id
+        return lineage
+
+    def lineage_ids(self):
+        """Ids of this set followed by the sets it was cloned from"""
+        return [set_id for set_id, _ in self.lineage()]
+
+    def effective_questions_statement(self):
+        """
+        Select the questions this set shows: its own rows plus questions
+        inherited from the sets it was cloned from.
+
+        Every row descends from an original question (Question.origin_id).
+        For each original, the row in the set nearest this one in the
+        lineage wins, so an edited copy hides the rows it replaces and a
+        removal marker hides the question altogether. Questions added to a
+        source set after the clone was made are not inherited.
+        """
+        lineage = self.lineage()
+        depth = db.case(
+            {set_id: position for position, (set_id, _) in enumerate(lineage)},
+            value=Question.question_set_id,
+        )
+        origin = db.func.coalesce(Question.source_question_id, Question.id)
+        inherited = db.or_(
+            *(
+                Question.question_set_id == set_id
+                if horizon is None
+                else db.and_(Question.question_set_id == set_id, origin <= horizon)
+                for set_id, horizon in lineage
+            )
+        )
+        nearest = (
+            db.select(
+                Question.id,
+                Question.is_removed,
+                db.func.row_number()
+                .over(partition_by=origin, order_by=depth)
+                .label("nearness"),
+            )
+            .where(inherited)
+            .subquery()
+        )
+        return (
+            db.select(Question)
+            .join(nearest, nearest.c.id == Question.id)
+            .where(nearest.c.nearness == 1, nearest.c.is_removed.is_(False))
+            .order_by(origin)
+        )
+
+    def content_version(self):
+        """
+        Latest change time across this set and the sets it inherits from.
+        Used as the validator for cached copies of the set's questions.
+        """
+        lineage = self.lineage_ids()
+        stamps = db.session.execute(
+            db.select(QuestionSet.id, QuestionSet.updated_at).where(
+                QuestionSet.id.in_(lineage)
+            )
+        ).all()
+        return lineage, max(
+            (stamp for _, stamp in stamps if stamp is not None),
+            default=datetime(1970, 1, 1),
+        )
+
+    def effective_questions(self):
+        if self.source_set_id is None:
+            return sorted(
+                (q for q in self.questions if not q.is_removed), key=lambda q: q.origin_id
+            )
+        return db.session.execute(self.effective_questions_statement()).scalars().all()
+
+    @staticmethod
+    def clone(source, owner, name):
+        """Create a copy-on-write clone: a single row pointing at the source"""
+        clone = QuestionSet(
+            name=name,
+            description=source.description,
+            user_id=owner.id,
+            source_set_id=source.id,
+            cloned_through=db.session.execute(db.select(db.func.max(Question.id))).scalar() or 0,
+        )
+        db.session.add(clone)
+        return clone
+
+    def materialize(self):
+        """
+        Copy inherited questions into this set and detach it from its source.
+        Copies keep the original they descend from, so edits and removals
+        made in clones of this set still line up with them.
+        """
+        if self.source_set_id is None:
+            return
+        for q in self.effective_questions():
+            if q.question_set_id != self.id:
+                db.session.add(
+                    Question(
+                        question=q.question,
+                        answer=q.answer,
+                        user_id=self.user_id,
+                        question_set_id=self.id,
+                        source_question_id=q.origin_id,
+                    )
+                )
+        # Markers only hid inherited rows, and there are none left
+        for q in self.questions:
+            if q.is_removed and q.source_question_id is not None:
+                db.session.delete(q)
+        self.source_set_id = None
+        self.cloned_through = None
+
 
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     question = db.Column(db.String(500), nullable=False)
     answer = db.Column(db.String(500), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
-    question_set_id = db.Column(db.Integer, db.ForeignKey("question_set.id"))
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
+    question_set_id = db.Column(db.Integer, db.ForeignKey("question_set.id"), index=True)
+    # In a cloned set: the original question this row replaces
+    source_question_id = db.Column(db.Integer, db.ForeignKey("question.id"), index=True)
+    # Hides the question from its set and from clones that inherit this row
+    is_removed = db.Column(db.Boolean, nullable=False, default=False)
+    # Lets the duplicate index catch up on writes from other processes
+    updated_at = db.Column(db.DateTime(timezone=True), default=utcnow, onupdate=utcnow, index=True)
+
+    @property
+    def origin_id(self):
+        """Id of the original question this row is (a copy of)"""
+        return self.id if self.source_question_id is None else self.source_question_id
+
+    def edit_in(self, question_set, question, answer):
+        """
+        Edit this question as seen in the given set. Inherited questions are
+        copied into the set on first edit; the source set is left untouched.
+        Clones that inherit an edited row keep their own copy of it as it was.
+        """
+        if self.question_set_id == question_set.id:
+            self._pin_in_clones(question_set)
+            self.question = question
+            self.answer = answer
+            return self
+        copy = Question(
+            question=question,
+            answer=answer,
+            user_id=question_set.user_id,
+            question_set_id=question_set.id,
+            source_question_id=self.origin_id,
+        )
+        db.session.add(copy)
+        return copy
+
+    def remove_from(self, question_set):
+        """
+        Remove this question from a set, hiding it if it is inherited.
+        Clones that inherit the row keep their own copy of it.
+        """
+        if self.question_set_id != question_set.id:
+            db.session.add(
+                Question(
+                    question="",
+                    answer="",
+                    user_id=question_set.user_id,
+                    question_set_id=question_set.id,
+                    source_question_id=self.origin_id,
+                    is_removed=True,
+                )
+            )
+            return
+        self._pin_in_clones(question_set)
+        referenced = db.session.execute(
+            db.select(Question.id).where(Question.source_question_id == self.id).limit(1)
+        ).first()
+        if self.source_question_id is None and referenced is None:
+            db.session.delete(self)
+        else:
+            # Copies in clones point at this id, so the row stays as a marker
+            self.is_removed = True
+
+    def _pin_in_clones(self, question_set):
+        """
+        Copy this row, as it is now, into every direct clone of question_set
+        that still inherits it, before it is changed or removed here. Clones
+        of those clones inherit the copy in turn.
+        """
+        clones = db.session.execute(
+            db.select(QuestionSet.id, QuestionSet.user_id).where(
+                QuestionSet.source_set_id == question_set.id
+            )
+        ).all()
+        if not clones:
+            return
+        replaced_in = set(
+            db.session.execute(
+                db.select(Question.question_set_id).where(
+                    Question.source_question_id == self.origin_id,
+                    Question.question_set_id.in_([clone_id for clone_id, _ in clones]),
+                )
+            ).scalars()
+        )
+        for clone_id, owner_id in clones:
+            if clone_id not in replaced_in:
+                db.session.add(
+                    Question(
+                        question=self.question,
+                        answer=self.answer,
+                        user_id=owner_id,
+                        question_set_id=clone_id,
+                        source_question_id=self.origin_id,
+                    )
+                )
+
+
+def can_access_question_set(question_set, user):
+    """Owner, or teacher/member of a class the set is shared with"""
+    if question_set.user_id == user.id:
+        return True
+    shared_class_ids = db.select(class_question_sets.c.class_id).where(
+        class_question_sets.c.question_set_id == question_set.id
+    )
+    if Class.query.filter(
+        Class.id.in_(shared_class_ids), Class.teacher_id == user.id
+    ).first():
+        return True
+    return (
+        ClassMembership.query.filter(
+            ClassMembership.user_id == user.id,
+            ClassMembership.class_id.in_(shared_class_ids),
+        ).first()
+        is not None
+    )
 
 
 class ChatMessage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     message = db.Column(db.String(1000), nullable=False)
     timestamp = db.Column(db.DateTime(timezone=True), default=db.func.now())
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
     class_id = db.Column(db.Integer, db.ForeignKey("class.id"), nullable=False)
     user = db.relationship("User", backref="chat_messages")
 
+    __table_args__ = (
+        # Chat history is always read per class in time order
+        db.Index("ix_chat_message_class_timestamp", "class_id", "timestamp"),
+    )
+
 
 class Assignment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -112,7 +382,46 @@ class Assignment(db.Model):
     description = db.Column(db.Text)
     due_date = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    class_id = db.Column(db.Integer, db.ForeignKey("class.id"), nullable=False)
-    creator_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    class_id = db.Column(db.Integer, db.ForeignKey("class.id"), nullable=False, index=True)
+    creator_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
     attachment_url = db.Column(db.String(500))
     creator = db.relationship("User", backref="created_assignments")
+
+
+class QuizAttempt(db.Model):
+    # Append-only record of a single flashcard answer
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    question_id = db.Column(db.Integer, db.ForeignKey("question.id"), nullable=False, index=True)
+    question_set_id = db.Column(
+        db.Integer, db.ForeignKey("question_set.id"), nullable=False
+    )
+    correct = db.Column(db.Boolean, nullable=False)
+    latency_ms = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime(timezone=True), default=db.func.now())
+
+    __table_args__ = (
+        # Class analytics filter on (set, student) pairs
+        db.Index("ix_quiz_attempt_set_user", "question_set_id", "user_id"),
+    )
+
+
+class DataVersion(db.Model):
+    # Write counter per table ("question") and per table and user
+    # ("question:12", or "question:*" for everyone), used to invalidate
+    # cached page fragments
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Keep QuestionSet.updated_at current when its questions change
+@db.event.listens_for(Question, "after_insert")
+@db.event.listens_for(Question, "after_update")
+@db.event.listens_for(Question, "after_delete")
+def _touch_question_set(mapper, connection, target):
+    if target.question_set_id is not None:
+        connection.execute(
+            db.update(QuestionSet.__table__)
+            .where(QuestionSet.__table__.c.id == target.question_set_id)
+            .values(updated_at=utcnow())
+        )
@@ -0,0 +1,108 @@
+import logging
+import re
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# The same statement shape this many times in one request looks like an N+1
+REPEAT_LIMIT = 3
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in test mode when a route runs more statements than its budget"""
+
+
+def query_budget(max_queries):
+    """
+    Declare the most SQL statements a view may run per request, including
+    the login and cache lookups every request makes. Only enforced while
+    the query guard is enabled. Apply directly below the route decorator.
+    """
+
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+
+    return decorator
+
+
+def statement_shape(statement):
+    """Normalise a statement so repeats with different parameters match"""
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("(?)", statement)).strip()
+
+
+class QueryGuard:
+    """
+    Counts SQL statements per request while QUERY_GUARD is on (it defaults
+    to app.testing). Statement shapes repeated REPEAT_LIMIT or more times are
+    logged as likely N+1s, and a route that goes over its query_budget
+    raises QueryBudgetExceeded. The last request's report is kept on
+    `last_report` for tests to inspect.
+    """
+
+    def __init__(self, app=None):
+        self.last_report = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("QUERY_GUARD", app.testing)
+        app.config.setdefault("QUERY_GUARD_REPEAT_LIMIT", REPEAT_LIMIT)
+        app.extensions["query_guard"] = self
+        if not app.config["QUERY_GUARD"]:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._check_request)
+
+        from . import db
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._record)
+
+    def _start_request(self):
+        g.query_guard_statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and "query_guard_statements" in g:
+            g.query_guard_statements.append(statement_shape(statement))
+
+    def _check_request(self, response):
+        statements = g.pop("query_guard_statements", None)
+        if statements is None:
+            return response
+
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, "query_budget", None)
+        limit = current_app.config["QUERY_GUARD_REPEAT_LIMIT"]
+        repeated = {
+            shape: count
+            for shape, count in Counter(statements).items()
+            if count >= limit
+        }
+        self.last_report = {
+            "endpoint": request.endpoint,
+            "count": len(statements),
+            "budget": budget,
+            "repeated": repeated,
+            "statements": statements,
+        }
+        response.headers["X-Query-Count"] = str(len(statements))
+
+        for shape, count in repeated.items():
+            logger.warning(f"Possible N+1 in {request.endpoint}: {count}x {shape}")
+        if budget is not None and len(statements) > budget:
+            raise QueryBudgetExceeded(
+                f"{request.endpoint} ran {len(statements)} statements "
+                f"(budget {budget}):\n  " + "\n  ".join(statements)
+            )
+        return response
+
+
+query_guard = QueryGuard()
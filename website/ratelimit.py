@@ -0,0 +1,246 @@
+import functools
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app, jsonify, request
+from flask_login import current_user, login_required
+
+# Idle buckets older than this are refilled anyway, so they can be dropped
+BUCKET_IDLE_SECONDS = 3600
+SWEEP_EVERY = 1000
+
+
+class RateLimited(Exception):
+    """Raised when a request has used up one of its token buckets"""
+
+    def __init__(self, retry_after):
+        super().__init__("Rate limit exceeded")
+        self.retry_after = retry_after
+
+
+def refill(tokens, updated, capacity, rate, now):
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+def take(tokens, updated, capacity, rate, now, cost=1):
+    """
+    Apply one token-bucket step.
+
+    Returns:
+        (allowed, tokens left, seconds until enough tokens are available)
+    """
+    tokens = refill(tokens, updated, capacity, rate, now)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / rate
+
+
+def summarise_buckets(rows, now):
+    """
+    Bucket counts per limit name. Keys hold usernames and IP addresses, so
+    only these totals are ever reported.
+    """
+    limits = {}
+    for key, tokens, updated, capacity, rate in rows:
+        counts = limits.setdefault(key.split(":", 1)[0], {"buckets": 0, "exhausted": 0})
+        counts["buckets"] += 1
+        if refill(tokens, updated, capacity, rate, now) < 1:
+            counts["exhausted"] += 1
+    return limits
+
+
+class MemoryBackend:
+    """Buckets in a dict; only correct for a single worker process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._calls = 0
+
+    def consume(self, key, capacity, rate, cost=1):
+        now = time.time()
+        with self._lock:
+            tokens, updated, _, _ = self._buckets.get(key, (capacity, now, capacity, rate))
+            allowed, tokens, retry_after = take(tokens, updated, capacity, rate, now, cost)
+            self._buckets[key] = (tokens, now, capacity, rate)
+            self._calls += 1
+            if self._calls % SWEEP_EVERY == 0:
+                self._sweep(now)
+        return allowed, tokens, retry_after
+
+    def _sweep(self, now):
+        stale = [k for k, v in self._buckets.items() if now - v[1] > BUCKET_IDLE_SECONDS]
+        for key in stale:
+            del self._buckets[key]
+
+    def summary(self):
+        with self._lock:
+            rows = [(key, *bucket) for key, bucket in self._buckets.items()]
+        return summarise_buckets(rows, time.time())
+
+
+class SQLiteBackend:
+    """
+    Buckets in a small SQLite file of their own, shared by every worker.
+
+    Kept apart from the application database so limiter writes never queue
+    behind (or hold) its write lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS bucket ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, "
+            "capacity REAL NOT NULL, rate REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def consume(self, key, capacity, rate, cost=1):
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated FROM bucket WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            allowed, tokens, retry_after = take(tokens, updated, capacity, rate, now, cost)
+            connection.execute(
+                "INSERT INTO bucket (key, tokens, updated, capacity, rate) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "tokens = excluded.tokens, updated = excluded.updated, "
+                "capacity = excluded.capacity, rate = excluded.rate",
+                (key, tokens, now, capacity, rate),
+            )
+            self._calls += 1
+            if self._calls % SWEEP_EVERY == 0:
+                connection.execute(
+                    "DELETE FROM bucket WHERE updated < ?", (now - BUCKET_IDLE_SECONDS,)
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed, tokens, retry_after
+
+    def summary(self):
+        rows = self._connection().execute(
+            "SELECT key, tokens, updated, capacity, rate FROM bucket"
+        )
+        return summarise_buckets(rows, time.time())
+
+
+# Key functions: each returns part of a bucket key, or None to skip that bucket
+def by_ip():
+    return f"ip:{request.remote_addr}"
+
+
+def by_user():
+    if current_user.is_authenticated:
+        return f"user:{current_user.id}"
+    return None
+
+
+def by_form_field(field):
+    def key():
+        value = (request.form.get(field) or "").strip().lower()
+        return f"{field}:{value}" if value else None
+
+    return key
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiting for individual routes.
+
+    Each limited route checks one bucket per key function (e.g. per IP and
+    per user); the request is rejected with 429 if any bucket is empty.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("RATELIMIT_ENABLED", True)
+        app.config.setdefault(
+            "RATELIMIT_BACKEND", os.environ.get("RATELIMIT_BACKEND", "memory")
+        )
+        app.config.setdefault(
+            "RATELIMIT_SQLITE_PATH", os.path.join(app.instance_path, "ratelimit.db")
+        )
+        if app.config["RATELIMIT_BACKEND"] == "sqlite":
+            os.makedirs(os.path.dirname(app.config["RATELIMIT_SQLITE_PATH"]), exist_ok=True)
+            self.backend = SQLiteBackend(app.config["RATELIMIT_SQLITE_PATH"])
+        else:
+            self.backend = MemoryBackend()
+        app.extensions["rate_limiter"] = self
+
+        @app.errorhandler(RateLimited)
+        def rate_limited(error):
+            return (
+                "Too many requests. Please slow down and try again shortly.",
+                429,
+                {"Retry-After": str(math.ceil(error.retry_after))},
+            )
+
+        @app.route("/ratelimit/status")
+        @login_required
+        def rate_limit_status():
+            """Bucket counts per limit (teachers only); never the keys themselves"""
+            if not current_user.is_teacher:
+                return jsonify({"error": "Only teachers can view limiter state."}), 403
+            return jsonify(
+                {
+                    "backend": app.config["RATELIMIT_BACKEND"],
+                    "limits": self.backend.summary(),
+                }
+            )
+
+    def limit(self, name, capacity, per_seconds, keys=(by_ip,), methods=("POST",)):
+        """
+        Limit a view to `capacity` requests per `per_seconds`, with bursts of
+        up to `capacity`, per value of each key function.
+        """
+        rate = capacity / per_seconds
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapped(*args, **kwargs):
+                if request.method in methods and current_app.config["RATELIMIT_ENABLED"]:
+                    self.check(name, capacity, rate, keys)
+                return view(*args, **kwargs)
+
+            return wrapped
+
+        return decorator
+
+    def check(self, name, capacity, rate, keys):
+        waits = []
+        for key_func in keys:
+            key = key_func()
+            if key is None:
+                continue
+            allowed, _, retry_after = self.backend.consume(f"{name}:{key}", capacity, rate)
+            if not allowed:
+                waits.append(retry_after)
+        if waits:
+            raise RateLimited(max(waits))
+
+
+limiter = RateLimiter()
@@ -0,0 +1,180 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import text
+from . import db
+
+# Markers used by snippet() so highlighting survives HTML escaping
+_HIGHLIGHT_START = "\x02"
+_HIGHLIGHT_END = "\x03"
+
+SEARCH_RESULT_LIMIT = 50
+
+_FTS_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS question_fts USING fts5(
+        question, answer,
+        content='question', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS question_fts_insert AFTER INSERT ON question BEGIN
+        INSERT INTO question_fts(rowid, question, answer)
+        VALUES (new.id, new.question, new.answer);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS question_fts_delete AFTER DELETE ON question BEGIN
+        INSERT INTO question_fts(question_fts, rowid, question, answer)
+        VALUES ('delete', old.id, old.question, old.answer);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS question_fts_update AFTER UPDATE ON question BEGIN
+        INSERT INTO question_fts(question_fts, rowid, question, answer)
+        VALUES ('delete', old.id, old.question, old.answer);
+        INSERT INTO question_fts(rowid, question, answer)
+        VALUES (new.id, new.question, new.answer);
+    END
+    """,
+]
+
+# Clone chains longer than this are not followed (they can't form cycles,
+# this only bounds the recursion)
+MAX_LINEAGE_DEPTH = 32
+
+# Matches are resolved per accessible set: the sets the user owns, plus
+# sets shared with a class they teach or belong to. A clone shows matching
+# rows from the sets it was cloned from unless the row is removed, its
+# original question was added after the clone was made (past the horizon),
+# or a set nearer the clone has its own row for the same original question
+# (see QuestionSet.effective_questions_statement).
+_SEARCH_SQL = """
+    WITH RECURSIVE accessible(id) AS (
+        SELECT id FROM question_set WHERE user_id = :user_id
+        UNION
+        SELECT cqs.question_set_id
+        FROM class_question_sets cqs
+        WHERE cqs.class_id IN (
+            SELECT id FROM class WHERE teacher_id = :user_id
+            UNION
+            SELECT class_id FROM class_membership WHERE user_id = :user_id
+        )
+    ),
+    lineage(set_id, ancestor_id, depth, horizon) AS (
+        SELECT id, id, 0, NULL FROM accessible
+        UNION ALL
+        SELECT lineage.set_id, qs.source_set_id, lineage.depth + 1,
+               CASE
+                   WHEN lineage.horizon IS NULL THEN qs.cloned_through
+                   WHEN qs.cloned_through IS NULL THEN lineage.horizon
+                   ELSE MIN(lineage.horizon, qs.cloned_through)
+               END
+        FROM lineage
+        JOIN question_set qs ON qs.id = lineage.ancestor_id
+        WHERE qs.source_set_id IS NOT NULL AND lineage.depth < :max_depth
+    ),
+    matches(id, rank, question_snippet, answer_snippet) AS (
+        SELECT rowid,
+               bm25(question_fts),
+               snippet(question_fts, 0, :hl_start, :hl_end, '...', 16),
+               snippet(question_fts, 1, :hl_start, :hl_end, '...', 16)
+        FROM question_fts
+        WHERE question_fts MATCH :query
+    )
+    SELECT q.id,
+           lineage.set_id,
+           qs.name,
+           matches.question_snippet,
+           matches.answer_snippet
+    FROM matches
+    JOIN question q ON q.id = matches.id
+    JOIN lineage ON lineage.ancestor_id = q.question_set_id
+    JOIN question_set qs ON qs.id = lineage.set_id
+    WHERE NOT q.is_removed
+      AND (lineage.horizon IS NULL OR COALESCE(q.source_question_id, q.id) <= lineage.horizon)
+      AND NOT EXISTS (
+        SELECT 1
+        FROM question copy
+        WHERE copy.source_question_id = COALESCE(q.source_question_id, q.id)
+          AND copy.question_set_id IN (
+            SELECT ancestor_id FROM lineage nearer
+            WHERE nearer.set_id = lineage.set_id AND nearer.depth < lineage.depth
+          )
+      )
+    ORDER BY matches.rank, q.id, lineage.set_id
+    LIMIT :limit
+"""
+
+
+def create_search_index():
+    """Create the FTS5 index and its sync triggers, filling it on first run"""
+    with db.engine.begin() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'question_fts'")
+        ).first()
+        for statement in _FTS_SETUP:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(
+                text("INSERT INTO question_fts(question_fts) VALUES ('rebuild')")
+            )
+
+
+def build_match_query(raw_query):
+    """
+    Turn free text into a safe FTS5 query.
+
+    Every word is quoted so user input can't use FTS operators, and the last
+    word is treated as a prefix so results appear while typing.
+    """
+    terms = re.findall(r"\w+", raw_query or "")
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _highlight(snippet):
+    escaped = str(escape(snippet))
+    return Markup(
+        escaped.replace(_HIGHLIGHT_START, "<mark>").replace(_HIGHLIGHT_END, "</mark>")
+    )
+
+
+def search_questions(user, raw_query, limit=SEARCH_RESULT_LIMIT):
+    """
+    Search every question bank the user can access, best matches first.
+    Cloned sets are searched as they appear to the user, inherited
+    questions included.
+
+    Returns:
+        List of dictionaries with the question id, set id and name, and
+        highlighted question/answer snippets
+    """
+    match_query = build_match_query(raw_query)
+    if match_query is None:
+        return []
+
+    rows = db.session.execute(
+        text(_SEARCH_SQL),
+        {
+            "query": match_query,
+            "user_id": user.id,
+            "limit": limit,
+            "max_depth": MAX_LINEAGE_DEPTH,
+            "hl_start": _HIGHLIGHT_START,
+            "hl_end": _HIGHLIGHT_END,
+        },
+    )
+    return [
+        {
+            "question_id": row[0],
+            "set_id": row[1],
+            "set_name": row[2],
+            "question": _highlight(row[3]),
+            "answer": _highlight(row[4]),
+        }
+        for row in rows
+    ]
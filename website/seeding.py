@@ -0,0 +1,193 @@
+import random
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, insert, select
+from .models import (
+    Assignment,
+    ChatMessage,
+    Class,
+    ClassMembership,
+    Question,
+    QuestionSet,
+    User,
+    class_question_sets,
+)
+from . import db
+from .fragments import bump_data_versions
+
+# Every seeded account uses this password so load tests can sign in
+SEED_PASSWORD = "password123"
+SEED_PREFIX = "seed"
+INSERT_BATCH_SIZE = 5000
+
+DEFAULT_SCALE = {
+    "teachers": 2000,
+    "students": 30000,
+    "classes_per_teacher": 3,
+    "students_per_class": 30,
+    "sets_per_teacher": 4,
+    "questions_per_set": 20,
+    "sets_shared_per_class": 2,
+    "messages_per_class": 40,
+    "assignments_per_class": 5,
+}
+
+_TOPICS = [
+    "inflation", "unemployment", "fiscal policy", "monetary policy", "GDP",
+    "elasticity", "market failure", "externalities", "comparative advantage",
+    "exchange rates", "interest rates", "aggregate demand", "aggregate supply",
+    "price controls", "monopoly", "oligopoly", "public goods", "taxation",
+    "the multiplier", "the balance of payments",
+]
+_QUESTION_TEMPLATES = [
+    "Define {topic}.",
+    "Explain one cause of {topic}.",
+    "Give an example of {topic} in the UK economy.",
+    "Evaluate the impact of {topic} on consumers.",
+    "How does {topic} affect firms in the short run?",
+    "Draw and explain a diagram showing {topic}.",
+]
+_CHAT_LINES = [
+    "Is the homework due Friday?", "Can someone explain question 3?",
+    "I got a different answer for the diagram one", "Thanks, that makes sense now",
+    "Will this be on the test?", "Please revise chapter 4 before next lesson",
+]
+
+
+def _batched_insert(target, rows):
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.session.execute(insert(target), rows[start : start + INSERT_BATCH_SIZE])
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def seed_population(scale, password_hash, seed=0, progress=print):
+    """
+    Bulk-insert a synthetic school population.
+
+    Ids are assigned up front so related rows can be linked without reading
+    anything back; every table is written with executemany in batches.
+
+    Args:
+        scale: Counts, with the same keys as DEFAULT_SCALE
+        password_hash: Hash stored for every seeded account
+        seed: Random seed, so runs with the same scale are identical
+        progress: Called with a message after each table
+
+    Returns:
+        Dict of rows inserted per table
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    counts = {}
+
+    def add(target, name, rows):
+        _batched_insert(target, rows)
+        counts[name] = len(rows)
+        progress(f"  {len(rows)} {name}")
+
+    # Users
+    first_user = _next_id(User)
+    first_student = first_user + scale["teachers"]
+    teacher_ids = list(range(first_user, first_student))
+    student_ids = list(range(first_student, first_student + scale["students"]))
+    run = f"{SEED_PREFIX}{first_user}"
+    add(User, "users", [
+        {"id": uid, "username": f"{run}_teacher_{i}", "password": password_hash, "role": "teacher"}
+        for i, uid in enumerate(teacher_ids)
+    ] + [
+        {"id": uid, "username": f"{run}_student_{i}", "password": password_hash, "role": "student"}
+        for i, uid in enumerate(student_ids)
+    ])
+
+    # Classes and memberships
+    class_id = _next_id(Class)
+    classes = []
+    for i, teacher_id in enumerate(teacher_ids):
+        for c in range(scale["classes_per_teacher"]):
+            classes.append({
+                "id": class_id,
+                "name": f"Economics {c + 1}",
+                "description": f"Seeded class {c + 1} for {run}_teacher_{i}",
+                "teacher_id": teacher_id,
+                "code": f"S{class_id:07d}"[-8:],
+            })
+            class_id += 1
+    add(Class, "classes", classes)
+
+    per_class = min(scale["students_per_class"], len(student_ids))
+    members_by_class = {
+        cls["id"]: rng.sample(student_ids, per_class) for cls in classes
+    }
+    add(ClassMembership, "memberships", [
+        {"user_id": student_id, "class_id": class_id}
+        for class_id, members in members_by_class.items()
+        for student_id in members
+    ])
+
+    # Question sets and questions
+    set_id = _next_id(QuestionSet)
+    question_sets = []
+    for teacher_id in teacher_ids:
+        for s in range(scale["sets_per_teacher"]):
+            question_sets.append({
+                "id": set_id,
+                "name": f"Revision set {s + 1}",
+                "description": f"Seeded set on {rng.choice(_TOPICS)}",
+                "user_id": teacher_id,
+                "updated_at": now,
+            })
+            set_id += 1
+    add(QuestionSet, "question sets", question_sets)
+
+    add(Question, "questions", [
+        {
+            "question": rng.choice(_QUESTION_TEMPLATES).format(topic=rng.choice(_TOPICS)),
+            "answer": f"Model answer {q + 1} covering {rng.choice(_TOPICS)}.",
+            "user_id": question_set["user_id"],
+            "question_set_id": question_set["id"],
+            "is_removed": False,
+        }
+        for question_set in question_sets
+        for q in range(scale["questions_per_set"])
+    ])
+
+    # Share each teacher's sets with their own classes
+    sets_by_teacher = {}
+    for question_set in question_sets:
+        sets_by_teacher.setdefault(question_set["user_id"], []).append(question_set["id"])
+    add(class_question_sets, "shared sets", [
+        {"class_id": cls["id"], "question_set_id": shared_id}
+        for cls in classes
+        for shared_id in sets_by_teacher.get(cls["teacher_id"], [])[: scale["sets_shared_per_class"]]
+    ])
+
+    # Chat and assignments
+    add(ChatMessage, "chat messages", [
+        {
+            "message": rng.choice(_CHAT_LINES),
+            "timestamp": now - timedelta(minutes=scale["messages_per_class"] - m),
+            "user_id": rng.choice(members_by_class[cls["id"]] or [cls["teacher_id"]]),
+            "class_id": cls["id"],
+        }
+        for cls in classes
+        for m in range(scale["messages_per_class"])
+    ])
+    add(Assignment, "assignments", [
+        {
+            "title": f"Homework {a + 1}",
+            "description": f"Answer the questions on {rng.choice(_TOPICS)}.",
+            "due_date": (now + timedelta(days=7 * (a + 1))).replace(tzinfo=None),
+            "class_id": cls["id"],
+            "creator_id": cls["teacher_id"],
+        }
+        for cls in classes
+        for a in range(scale["assignments_per_class"])
+    ])
+
+    bump_data_versions(
+        db.session, [Class, ClassMembership, QuestionSet, Question, Assignment]
+    )
+    db.session.commit()
+    return counts
@@ -1,10 +1,308 @@
-from flask import Blueprint, render_template
+import json
+import os
+import threading
+import time
+from functools import wraps
+from flask import Blueprint, Response, abort, current_app, render_template, request, jsonify
 from flask_login import login_required, current_user
+from .economics import (
+    DEFAULT_CURVE_POINTS,
+    MODELS,
+    evaluate,
+    parse_sweep,
+    sweep,
+    sweep_cache,
+    sweep_key,
+)
+from .graphs import graph_registry
+from .market_sim import MarketError, market_registry
+
+# Market event streams send a comment this often so proxies keep them open,
+# and end after STREAM_SECONDS (EventSource reconnects and resumes)
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_SECONDS = 30
+# Each open stream holds a server thread; past this many, pages poll instead
+MAX_STREAMS = 64
+# Lock file in the instance folder held by the one worker that hosts markets
+MARKET_HOST_LOCK = "markets.lock"
+
+_stream_slots = threading.BoundedSemaphore(MAX_STREAMS)
 
 sim = Blueprint("sim", __name__)
 
 
+@sim.record_once
+def load_graphs(state):
+    # Parse and validate every definition once, so a bad file fails at startup
+    graph_registry.load()
+
+
 @sim.route("/graphing_tool", methods=["GET", "POST"])
 @login_required
 def graphing_tool():
-    return render_template("simulator.html", user=current_user)
+    return render_template(
+        "simulator.html", user=current_user, graphs=graph_registry.ordered()
+    )
+
+
+@sim.route("/graphs/<graph_id>.json")
+@login_required
+def graph_definition(graph_id):
+    graph = graph_registry.get(graph_id)
+    if graph is None:
+        abort(404)
+    response = Response(graph.payload, mimetype="application/json")
+    response.set_etag(graph.etag)
+    # Definitions only change on deploy; revalidating is a cheap 304
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@sim.route("/api/models")
+@login_required
+def list_models():
+    return jsonify({
+        name: {
+            "description": spec.description,
+            "parameters": [parameter._asdict() for parameter in spec.parameters],
+        }
+        for name, spec in MODELS.items()
+    })
+
+
+@sim.route("/api/models/<name>")
+@login_required
+def run_model(name):
+    """
+    Evaluate a model, e.g. /sim/api/models/market?tax=2&demand_intercept=12.
+    Parameters left out take their defaults; `points` sets curve resolution.
+    """
+    if name not in MODELS:
+        return jsonify({"error": f"Unknown model '{name}'."}), 404
+    values = request.args.to_dict()
+    try:
+        points = int(values.pop("points", DEFAULT_CURVE_POINTS))
+        return jsonify(evaluate(name, values, points=points))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@sim.route("/api/models/<name>/sweep")
+@login_required
+def sweep_model(name):
+    """
+    Evaluate a model over a grid of parameter values in one request, e.g.
+    /sim/api/models/market/sweep?demand_intercept=8:12:50&tax=0,1,2&outcomes=quantity
+    Results are cached by parameter hash, which doubles as the ETag.
+    """
+    if name not in MODELS:
+        return jsonify({"error": f"Unknown model '{name}'."}), 404
+    try:
+        axes, fixed, outcomes = parse_sweep(name, request.args.to_dict())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    key = sweep_key(name, axes, fixed, outcomes)
+    try:
+        body = sweep_cache.get(key, lambda: sweep(name, axes, fixed, outcomes))
+    except (ValueError, MemoryError) as e:
+        return jsonify({"error": f"Sweep could not be computed: {e}"}), 400
+    response = Response(body, mimetype="application/json")
+    response.set_etag(key)
+    response.cache_control.private = True
+    response.cache_control.max_age = 3600
+    return response
+
+
+def market_host(view):
+    """Answer 503 unless this worker is the one hosting markets"""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        os.makedirs(current_app.instance_path, exist_ok=True)
+        if not market_registry.claim_host(os.path.join(current_app.instance_path, MARKET_HOST_LOCK)):
+            current_app.logger.warning(
+                "Market request on a worker that doesn't host markets; route /sim/market "
+                "and /sim/trading to one worker (see README)"
+            )
+            return jsonify({"error": "Trading games need the server to run a single worker."}), 503
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def _get_market(market_id):
+    market = market_registry.get(market_id)
+    if market is None:
+        abort(404)
+    return market
+
+
+@sim.route("/market", methods=["POST"])
+@login_required
+@market_host
+def create_market():
+    """Start a trading game; teachers only. Settings come as a JSON body."""
+    if not current_user.is_teacher:
+        return jsonify({"error": "Only teachers can start a market."}), 403
+    payload = request.get_json(silent=True) or {}
+    try:
+        posted_price = payload.get("posted_price")
+        settings = {
+            "buyers": int(payload.get("buyers", 500)),
+            "sellers": int(payload.get("sellers", 500)),
+            "value_range": (
+                float(payload.get("value_min", 10)),
+                float(payload.get("value_max", 100)),
+            ),
+            "cost_range": (
+                float(payload.get("cost_min", 10)),
+                float(payload.get("cost_max", 100)),
+            ),
+            "posted_price": None if posted_price is None else float(posted_price),
+            "seed": None if payload.get("seed") is None else int(payload["seed"]),
+        }
+    except (TypeError, ValueError):
+        return jsonify({"error": "Market settings must be numbers."}), 400
+    try:
+        market = market_registry.create(
+            current_user.id, mechanism=payload.get("mechanism", "double_auction"), **settings
+        )
+    except MarketError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(market.state(current_user.id)), 201
+
+
+@sim.route("/market/<market_id>")
+@login_required
+@market_host
+def market_state(market_id):
+    return jsonify(_get_market(market_id).state(current_user.id))
+
+
+@sim.route("/market/<market_id>", methods=["DELETE"])
+@login_required
+@market_host
+def close_market(market_id):
+    """End a trading game; only the teacher who started it"""
+    market = _get_market(market_id)
+    if market.owner_id != current_user.id:
+        return jsonify({"error": "Only the market's teacher can close it."}), 403
+    market_registry.close(market_id)
+    return "", 204
+
+
+@sim.route("/market/<market_id>/join", methods=["POST"])
+@login_required
+@market_host
+def join_market(market_id):
+    market = _get_market(market_id)
+    try:
+        market.join(current_user.id)
+    except MarketError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify(market.state(current_user.id))
+
+
+@sim.route("/market/<market_id>/order", methods=["POST"])
+@login_required
+@market_host
+def submit_order(market_id):
+    """Place this round's bid (buyers) or ask (sellers): {"price": 42.5}"""
+    market = _get_market(market_id)
+    payload = request.get_json(silent=True) or {}
+    try:
+        price = float(payload.get("price"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Orders need a numeric price."}), 400
+    try:
+        market.submit(current_user.id, price)
+    except MarketError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(market.state(current_user.id))
+
+
+@sim.route("/market/<market_id>/step", methods=["POST"])
+@login_required
+@market_host
+def step_market(market_id):
+    """Clear the next round(s); only the teacher who started the market"""
+    market = _get_market(market_id)
+    if market.owner_id != current_user.id:
+        return jsonify({"error": "Only the market's teacher can run rounds."}), 403
+    payload = request.get_json(silent=True) or {}
+    try:
+        rounds = int(payload.get("rounds", 1))
+    except (TypeError, ValueError):
+        return jsonify({"error": "rounds must be a whole number."}), 400
+    try:
+        summaries = market.step(rounds)
+    except MarketError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"rounds": summaries})
+
+
+@sim.route("/market/<market_id>/stream")
+@login_required
+@market_host
+def stream_market(market_id):
+    """
+    Server-sent events with one "round" event per cleared round. Resumes
+    after the Last-Event-ID header (or ?after=) when reconnecting.
+    """
+    market = _get_market(market_id)
+    after = request.headers.get("Last-Event-ID") or request.args.get("after", 0)
+    try:
+        after = int(after)
+    except ValueError:
+        after = 0
+    if not _stream_slots.acquire(blocking=False):
+        response = jsonify({"error": "Too many live streams; poll the market state instead."})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(STREAM_SECONDS)
+        return response
+
+    def events():
+        last = after
+        deadline = time.monotonic() + STREAM_SECONDS
+        yield "retry: 2000\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            summaries = market.rounds_after(last, timeout=min(STREAM_HEARTBEAT_SECONDS, remaining))
+            if not summaries:
+                yield ": keep-alive\n\n"
+                continue
+            for summary in summaries:
+                last = summary["round"]
+                yield f"id: {last}\nevent: round\ndata: {json.dumps(summary)}\n\n"
+
+    response = Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Runs when the server closes the response, even if it was never iterated
+    response.call_on_close(_stream_slots.release)
+    return response
+
+
+@sim.route("/trading")
+@login_required
+def trading_lobby():
+    return render_template("market.html", user=current_user, market=None)
+
+
+@sim.route("/trading/<market_id>")
+@login_required
+@market_host
+def trading_game(market_id):
+    market = _get_market(market_id)
+    return render_template(
+        "market.html",
+        user=current_user,
+        market=market.state(current_user.id),
+        is_owner=market.owner_id == current_user.id,
+    )
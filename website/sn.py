@@ -5,6 +5,9 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import os
 import logging
+import threading
+import time
+from .metrics import metrics
 
 sn = Blueprint("sn", __name__)
 
@@ -15,6 +18,84 @@ TRADING_ECONOMICS_API_KEY = "d51c6a256c024f7:auxd96wyn3ybiau"
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+HEADLINES_URL = (
+    f"https://newsapi.org/v2/top-headlines?category=business&apiKey={NEWS_API_KEY}"
+)
+# Cached headlines are refreshed in the background once they are this old
+HEADLINES_TTL = 600
+HEADLINES_TIMEOUT = 5
+# After a failed refresh, wait this long before trying News API again
+HEADLINES_RETRY_DELAY = 60
+
+
+class HeadlineCache:
+    """
+    Business headlines kept in memory so pages never wait on News API.
+
+    peek() returns whatever is cached immediately and starts a background
+    refresh when it is stale; fetch() blocks (bounded by the timeout) and is
+    only used by the asynchronously loaded news fragment.
+    """
+
+    def __init__(self, ttl=HEADLINES_TTL):
+        self.ttl = ttl
+        self._lock = threading.Condition()
+        self._articles = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+
+    def _is_stale(self):
+        return time.monotonic() - self._fetched_at > self.ttl
+
+    def peek(self):
+        """Cached articles (or None) without touching the network"""
+        with self._lock:
+            articles = self._articles
+            start_refresh = self._is_stale() and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+        if start_refresh:
+            threading.Thread(target=self._refresh, daemon=True).start()
+        return articles
+
+    def fetch(self):
+        """Cached articles, fetching synchronously if nothing fresh is cached"""
+        with self._lock:
+            if not self._is_stale():
+                return self._articles or []
+            if self._refreshing:
+                # Share the refresh already in flight instead of starting another
+                self._lock.wait(timeout=HEADLINES_TIMEOUT + 1)
+                return self._articles or []
+            self._refreshing = True
+        self._refresh()
+        with self._lock:
+            return self._articles or []
+
+    def _refresh(self):
+        try:
+            with metrics.outbound("newsapi"):
+                response = requests.get(HEADLINES_URL, timeout=HEADLINES_TIMEOUT)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("status") == "error":
+                raise ValueError(data.get("message", "Unknown error from News API"))
+            with self._lock:
+                self._articles = data.get("articles", [])
+                self._fetched_at = time.monotonic()
+        except Exception as e:
+            logger.error(f"Error refreshing headlines: {e}")
+            with self._lock:
+                # Back off so a News API outage isn't retried on every request
+                self._fetched_at = time.monotonic() - self.ttl + HEADLINES_RETRY_DELAY
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._lock.notify_all()
+
+
+headline_cache = HeadlineCache()
+
 
 @sn.route("/news", methods=["GET", "POST"])
 @login_required
@@ -24,7 +105,8 @@ def news():
     articles = []
 
     try:
-        response = requests.get(url, timeout=10)
+        with metrics.outbound("newsapi"):
+            response = requests.get(url, timeout=10)
         response.raise_for_status()  # Raises an HTTPError for bad responses
         
         data = response.json()
@@ -87,7 +169,8 @@ def get_stats():
     gdp_plot_page_filename = None
     
     try:
-        response = requests.get(url, timeout=15)
+        with metrics.outbound("tradingeconomics"):
+            response = requests.get(url, timeout=15)
         response.raise_for_status()
         
         # Parse JSON response
@@ -0,0 +1,147 @@
+import os
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+READ_BIND = "reader"
+READ_METHODS = ("GET", "HEAD")
+
+# Connection settings per storage profile. "legacy" keeps SQLite's defaults
+# (rollback journal, no busy timeout) and exists mainly for benchmarking.
+STORAGE_PROFILES = {
+    "legacy": {
+        "pragmas": {},
+        "pool_size": 5,
+        "max_overflow": 10,
+    },
+    "wal": {
+        # Readers no longer block the writer (or each other); NORMAL is safe
+        # in WAL mode and skips an fsync per commit
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -16000,  # KiB, i.e. 16MB per connection
+        },
+        "pool_size": 10,
+        "max_overflow": 20,
+    },
+}
+DEFAULT_PROFILE = "wal"
+
+# Database-wide settings that a read-only connection cannot (or need not) set
+_WRITER_ONLY_PRAGMAS = ("journal_mode",)
+
+
+def engine_options(profile):
+    """SQLAlchemy engine keyword arguments for a storage profile"""
+    settings = STORAGE_PROFILES[profile]
+    busy_seconds = settings["pragmas"].get("busy_timeout", 5000) / 1000
+    return {
+        "pool_size": settings["pool_size"],
+        "max_overflow": settings["max_overflow"],
+        "pool_pre_ping": False,
+        "connect_args": {"timeout": busy_seconds, "check_same_thread": False},
+    }
+
+
+def install_pragmas(engine, profile, read_only=False):
+    """Apply the profile's pragmas to every new connection from this engine"""
+    pragmas = dict(STORAGE_PROFILES[profile]["pragmas"])
+    if read_only:
+        for name in _WRITER_ONLY_PRAGMAS:
+            pragmas.pop(name, None)
+        pragmas["query_only"] = "ON"
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def reader_url(app):
+    """
+    Read-only URL for the database SQLALCHEMY_DATABASE_URI points at.
+    Relative SQLite paths are resolved against the instance folder, as
+    Flask-SQLAlchemy does for the primary engine.
+    """
+    url = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        raise ValueError("STORAGE_READ_REPLICA needs a file-based SQLite database")
+    db_path = url.database
+    if url.query.get("uri"):
+        db_path = db_path.removeprefix("file:")
+    if not os.path.isabs(db_path):
+        db_path = os.path.join(app.instance_path, db_path)
+    return f"sqlite:///file:{os.path.normpath(db_path)}?mode=ro&uri=true"
+
+
+def configure_storage(app):
+    """
+    Set engine options (and the optional read-only bind) before db.init_app.
+
+    STORAGE_PROFILE picks an entry from STORAGE_PROFILES. With
+    STORAGE_READ_REPLICA set, GET and HEAD requests read through a separate
+    read-only engine so page views use their own connection pool.
+    """
+    app.config.setdefault(
+        "STORAGE_PROFILE", os.environ.get("STORAGE_PROFILE", DEFAULT_PROFILE)
+    )
+    app.config.setdefault(
+        "STORAGE_READ_REPLICA", os.environ.get("STORAGE_READ_REPLICA", "0") == "1"
+    )
+    profile = app.config["STORAGE_PROFILE"]
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown STORAGE_PROFILE '{profile}'")
+
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(profile))
+    if app.config["STORAGE_READ_REPLICA"]:
+        binds = app.config.setdefault("SQLALCHEMY_BINDS", {})
+        binds[READ_BIND] = {
+            "url": reader_url(app),
+            **engine_options(profile),
+        }
+
+
+def init_storage(app, db):
+    """Attach connection pragmas once db.init_app has created the engines"""
+    profile = app.config["STORAGE_PROFILE"]
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            install_pragmas(engine, profile, read_only=bind_key == READ_BIND)
+
+
+class RoutingSession(Session):
+    """
+    Sends reads made while handling a GET or HEAD request to the read-only
+    engine, if one is configured. Flushes, and every query after this
+    session's first flush, use the primary engine so a request always sees
+    its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_reader():
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_reader(self):
+        return (
+            not self._flushing
+            and not self.info.get("wrote")
+            and READ_BIND in self._db.engines
+            and has_request_context()
+            and request.method in READ_METHODS
+        )
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_written(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _clear_written(session):
+    session.info.pop("wrote", None)
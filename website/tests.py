@@ -1,10 +1,47 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for
-from .models import Question, QuestionSet, ClassMembership
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app
+from sqlalchemy import insert, func, select
+from werkzeug.http import is_resource_modified
+import hashlib
+import math
+from .models import Question, QuestionSet, QuizAttempt, can_access_question_set
 from . import db
+from .dedupe import accessible_set_ids, find_duplicates
+from .search import search_questions
+from .fragments import fragment_cache
+from .querybudget import query_budget
 from flask_login import login_required, current_user
 
 tests = Blueprint("tests", __name__)
 
+# Largest number of attempts accepted in one batch from the flashcards page
+MAX_ATTEMPT_BATCH = 500
+# Answer times are clamped to this; longer means the tab was left open
+MAX_ATTEMPT_LATENCY_MS = 3600 * 1000
+# Flashcards are delivered to the page in pages of this many cards
+DECK_PAGE_SIZE = 50
+MAX_DECK_PAGE_SIZE = 200
+
+
+def deck_page(question_set, page, per_page):
+    """One page of a set's cards, selecting only the columns the page needs"""
+    statement = (
+        question_set.effective_questions_statement()
+        .with_only_columns(Question.id, Question.question, Question.answer)
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    )
+    return [
+        {"id": row.id, "question": row.question, "answer": row.answer}
+        for row in db.session.execute(statement)
+    ]
+
+
+def deck_size(question_set):
+    statement = select(func.count()).select_from(
+        question_set.effective_questions_statement().order_by(None).subquery()
+    )
+    return db.session.execute(statement).scalar()
+
 
 @tests.route("/questions/<int:set_id>", methods=["GET", "POST"])
 @login_required
@@ -37,6 +74,20 @@ def questions(set_id):
             db.session.commit()
 
             flash("Question and answer added successfully!", category="success")
+            # Flag near-duplicates the user can already see
+            duplicates = find_duplicates(
+                question_text,
+                accessible_set_ids(current_user),
+                exclude_ids={new_question.id},
+                limit=1,
+            )
+            if duplicates:
+                match = duplicates[0]["question"]
+                flash(
+                    f"A similar question already exists in '{match.question_set.name}': "
+                    f"{match.question}",
+                    category="warning",
+                )
             return redirect(url_for("tests.questions", set_id=set_id))
 
     return render_template(
@@ -55,15 +106,62 @@ def question_sets():
             id=selected_set_id, user_id=current_user.id
         ).first()
 
-    question_sets = QuestionSet.query.filter_by(user_id=current_user.id).all()
+    lists_html = None
+    if not selected_set:
+        # The full list is cached per user until a write changes it
+        lists_html = fragment_cache.render(
+            "question_set_list",
+            current_user.id,
+            (QuestionSet, Question),
+            lambda: render_template(
+                "_question_set_list.html",
+                question_sets=QuestionSet.query.filter_by(user_id=current_user.id).all(),
+            ),
+        )
+
     return render_template(
         "question_sets.html",
         user=current_user,
-        question_sets=question_sets,
+        lists_html=lists_html,
         selected_set=selected_set,
     )
 
 
+@tests.route("/search", methods=["GET"])
+@login_required
+def search():
+    """Full-text search over every question bank the user can access"""
+    query = request.args.get("q", "").strip()
+    results = search_questions(current_user, query) if query else []
+    return render_template(
+        "search.html", user=current_user, query=query, results=results
+    )
+
+
+@tests.route("/duplicates/<int:set_id>", methods=["GET"])
+@login_required
+def duplicates(set_id):
+    """Suggest near-duplicate questions for each question in a set"""
+    question_set = QuestionSet.query.get_or_404(set_id)
+    if not can_access_question_set(question_set, current_user):
+        flash("You don't have access to this question set.", category="error")
+        return redirect(url_for("tests.question_sets"))
+
+    set_ids = accessible_set_ids(current_user)
+    suggestions = []
+    for q in question_set.effective_questions():
+        matches = find_duplicates(q.question, set_ids, exclude_ids={q.id})
+        if matches:
+            suggestions.append({"question": q, "matches": matches})
+
+    return render_template(
+        "duplicates.html",
+        user=current_user,
+        question_set=question_set,
+        suggestions=suggestions,
+    )
+
+
 @tests.route("/create_question_set", methods=["GET", "POST"])
 @login_required
 def create_question_set():
@@ -105,19 +203,82 @@ def delete_question(question_id):
         flash("Question not found.", category="error")
         return redirect(url_for("tests.question_sets"))
 
-    # Verify the question belongs to the current user
-    if question.user_id != current_user.id:
+    # The set the question is being removed from (differs for cloned sets)
+    set_id = request.form.get("set_id", type=int) or question.question_set_id
+    question_set = QuestionSet.query.filter_by(
+        id=set_id, user_id=current_user.id
+    ).first()
+
+    # Verify the question is part of a set owned by the current user
+    if not question_set or question not in question_set.effective_questions():
         flash("You do not have permission to delete this question.", category="error")
         return redirect(url_for("tests.question_sets"))
 
-    set_id = question.question_set_id
-    db.session.delete(question)
+    question.remove_from(question_set)
     db.session.commit()
     flash("Question deleted successfully!", category="success")
     return redirect(url_for("tests.questions", set_id=set_id))
 
 
+@tests.route("/edit_question/<int:set_id>/<int:question_id>", methods=["GET", "POST"])
+@login_required
+def edit_question(set_id, question_id):
+    question_set = QuestionSet.query.filter_by(
+        id=set_id, user_id=current_user.id
+    ).first()
+    question = Question.query.get(question_id)
+
+    if not question_set or not question or question not in question_set.effective_questions():
+        flash("Question not found.", category="error")
+        return redirect(url_for("tests.question_sets"))
+
+    if request.method == "POST":
+        question_text = request.form.get("question")
+        answer_text = request.form.get("answer")
+
+        if not question_text:
+            flash("Question cannot be empty.", category="error")
+        elif not answer_text:
+            flash("Answer cannot be empty.", category="error")
+        else:
+            # Inherited questions are copied into the clone here
+            question.edit_in(question_set, question_text, answer_text)
+            db.session.commit()
+            flash("Question updated successfully!", category="success")
+            return redirect(url_for("tests.questions", set_id=set_id))
+
+    return render_template(
+        "edit_question.html",
+        user=current_user,
+        question_set=question_set,
+        question=question,
+    )
+
+
+@tests.route("/clone_set/<int:set_id>", methods=["POST"])
+@login_required
+def clone_question_set(set_id):
+    """Clone a question set the user can see into their own sets"""
+    source = QuestionSet.query.get_or_404(set_id)
+    if not can_access_question_set(source, current_user):
+        flash("You don't have access to this question set.", category="error")
+        return redirect(url_for("tests.question_sets"))
+
+    # Pick a name that doesn't clash with the user's existing sets
+    name = f"{source.name} (copy)"
+    suffix = 2
+    while QuestionSet.query.filter_by(name=name, user_id=current_user.id).first():
+        name = f"{source.name} (copy {suffix})"
+        suffix += 1
+
+    clone = QuestionSet.clone(source, current_user, name)
+    db.session.commit()
+    flash(f"Question set cloned as '{name}'.", "success")
+    return redirect(url_for("tests.questions", set_id=clone.id))
+
+
 @tests.route("/flashcards/<int:set_id>", methods=["GET"])
+@query_budget(6)
 @login_required
 def flashcards(set_id):
     # Get the question set (allow access if woner or shared with a class the user belongs to)
@@ -128,44 +289,124 @@ def flashcards(set_id):
         return redirect(url_for("tests.question_sets"))
 
     # Access control: owner OR shared with a class where the user is a member or the teacher
-    allowed = False
-    if question_set.user_id == current_user.id:
-        allowed = True
-    else:
-        for cls in question_set.classes:
-            # teacher of the class
-            if cls.teacher_id == current_user.id:
-                allowed = True
-                break
-            # student member
-            if (
-                ClassMembership.query.filter_by(
-                    user_id=current_user.id, class_id=cls.id
-                ).first()
-                is not None
-            ):
-                allowed = True
-                break
-
-    if not allowed:
+    if not can_access_question_set(question_set, current_user):
         flash("You don't have access to this question set.", category="error")
         return redirect(url_for("tests.question_sets"))
 
-    if not question_set.questions:
+    total_cards = deck_size(question_set)
+    if not total_cards:
         flash("This question set has no questions yet.", category="error")
         return redirect(url_for("tests.question_sets"))
 
-    # Convert questions to dictionary format for JSON serialization
-    questions_data = []
-    for q in question_set.questions:
-        questions_data.append({"question": q.question, "answer": q.answer})
+    # Only the first page is embedded; the rest is fetched from the deck endpoint
+    questions_data = deck_page(question_set, 1, DECK_PAGE_SIZE)
 
     return render_template(
         "flashcards.html",
         user=current_user,
         question_set=question_set,
         questions_data=questions_data,
+        total_cards=total_cards,
+        page_size=DECK_PAGE_SIZE,
+    )
+
+
+@tests.route("/flashcards/<int:set_id>/deck", methods=["GET"])
+@login_required
+def flashcard_deck(set_id):
+    """A page of flashcards as JSON, with ETag/Last-Modified validators"""
+    question_set = QuestionSet.query.get_or_404(set_id)
+    if not can_access_question_set(question_set, current_user):
+        return jsonify({"error": "You don't have access to this question set."}), 403
+
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(
+        max(request.args.get("per_page", DECK_PAGE_SIZE, type=int), 1),
+        MAX_DECK_PAGE_SIZE,
     )
+
+    lineage, last_modified = question_set.content_version()
+    etag = hashlib.sha1(
+        f"{lineage}:{last_modified.isoformat()}:{page}:{per_page}".encode()
+    ).hexdigest()
+
+    # Answer revalidation before touching the questions table
+    if not is_resource_modified(
+        request.environ, etag=etag, last_modified=last_modified
+    ):
+        response = current_app.response_class(status=304)
+    else:
+        total = deck_size(question_set)
+        response = jsonify(
+            {
+                "set_id": set_id,
+                "page": page,
+                "per_page": per_page,
+                "total": total,
+                "pages": -(-total // per_page),
+                "cards": deck_page(question_set, page, per_page),
+            }
+        )
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def _attempt_latency(value):
+    """Answer time in whole milliseconds, or None if it isn't a usable number"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if not math.isfinite(value):
+        return None
+    return int(min(max(value, 0), MAX_ATTEMPT_LATENCY_MS))
+
+
+@tests.route("/flashcards/<int:set_id>/attempts", methods=["POST"])
+@login_required
+def record_attempts(set_id):
+    """Append a batch of flashcard attempts sent from the flashcards page"""
+    question_set = QuestionSet.query.get_or_404(set_id)
+    if not can_access_question_set(question_set, current_user):
+        return jsonify({"error": "You don't have access to this question set."}), 403
+
+    payload = request.get_json(silent=True)
+    attempts = payload.get("attempts") if isinstance(payload, dict) else None
+    if not isinstance(attempts, list) or len(attempts) > MAX_ATTEMPT_BATCH:
+        return jsonify({"error": "Invalid attempts payload."}), 400
+
+    valid_ids = set(
+        db.session.execute(
+            question_set.effective_questions_statement().with_only_columns(Question.id)
+        ).scalars()
+    )
+    rows = []
+    for attempt in attempts:
+        if not isinstance(attempt, dict):
+            continue
+        question_id = attempt.get("question_id")
+        if isinstance(question_id, bool) or not isinstance(question_id, int):
+            continue
+        if question_id not in valid_ids:
+            continue
+        rows.append(
+            {
+                "user_id": current_user.id,
+                "question_id": question_id,
+                "question_set_id": set_id,
+                "correct": bool(attempt.get("correct")),
+                "latency_ms": _attempt_latency(attempt.get("latency_ms")),
+            }
+        )
+
+    # One executemany for the whole batch
+    if rows:
+        db.session.execute(insert(QuizAttempt), rows)
+        db.session.commit()
+    return jsonify({"recorded": len(rows)})
+
+
 @tests.route('/delete_set/<int:set_id>', methods=['POST'])
 @login_required
 def delete_question_set(set_id):
@@ -176,6 +417,9 @@ def delete_question_set(set_id):
         flash("You are not authorised to delete this set.", "danger")
         return redirect(url_for('home'))
 
+    # Clones read from this set, so give them their own copies first
+    for clone in question_set.clones:
+        clone.materialize()
     db.session.delete(question_set)
     db.session.commit()
 
@@ -1,48 +1,68 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from .models import Class, ClassMembership, QuestionSet
-import requests
+from .models import Class, ClassMembership, QuestionSet, Question
+from .sn import headline_cache
+from .fragments import fragment_cache
 
 views = Blueprint("views", __name__)
 
-NEWS_API_KEY = "4018749ef228496d8440096348ceee6a"
+# Number of headlines shown on the home page
+HOME_ARTICLE_COUNT = 5
 
 
 @views.route("/")
 @login_required
 def home():
-    if current_user.is_teacher:
+    # Class and question set lists are cached per user until a write changes them
+    lists_html = fragment_cache.render(
+        "home_lists",
+        current_user.id,
+        (Class, ClassMembership, QuestionSet, Question),
+        lambda: render_home_lists(current_user),
+    )
+
+    # Never wait on News API here: use cached headlines, or let the page
+    # load the news panel from the fragment endpoint
+    articles = headline_cache.peek()
+    if articles is not None:
+        articles = articles[:HOME_ARTICLE_COUNT]
+
+    return render_template(
+        "home.html",
+        user=current_user,
+        lists_html=lists_html,
+        articles=articles
+    )
+
+
+def render_home_lists(user):
+    if user.is_teacher:
         # Teachers see classes they teach
-        user_classes = Class.query.filter_by(teacher_id=current_user.id).all()
+        user_classes = Class.query.filter_by(teacher_id=user.id).all()
     else:
         # Students see classes they're enrolled in
         user_classes = Class.query.join(ClassMembership).filter(
-            ClassMembership.user_id == current_user.id
+            ClassMembership.user_id == user.id
         ).all()
-    
+
     # Get user's question sets
-    user_question_sets = QuestionSet.query.filter_by(user_id=current_user.id).all()
-    
-    # Fetch news articles
-    url = f"https://newsapi.org/v2/top-headlines?category=business&apiKey={NEWS_API_KEY}"
-    articles = []
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            articles = data.get("articles", [])[:5]  # Limit to 5 articles for home page
-    except Exception as e:
-        print(f"Error fetching news: {e}")
-    
+    user_question_sets = QuestionSet.query.filter_by(user_id=user.id).all()
+
     return render_template(
-        "home.html", 
-        user=current_user, 
-        user_classes=user_classes, 
+        "_home_lists.html",
+        user=user,
+        user_classes=user_classes,
         user_question_sets=user_question_sets,
-        articles=articles
     )
-   
+
+
+@views.route("/news_fragment")
+@login_required
+def news_fragment():
+    """News panel for the home page, loaded after the page has rendered"""
+    articles = headline_cache.fetch()[:HOME_ARTICLE_COUNT]
+    return render_template("_news_panel.html", articles=articles)
+
 
 @views.route("/flashcards")
 @login_required
@@ -54,7 +74,7 @@ def flashcards():
     if set_id:
         question_set = QuestionSet.query.get_or_404(int(set_id))
         if question_set.user_id == current_user.id:
-            questions = question_set.questions
+            questions = question_set.effective_questions()
         else:
             flash("You don't have access to this question set.", "danger")
             return redirect(url_for("views.home"))